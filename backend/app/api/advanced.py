@@ -3,14 +3,17 @@ API路由 - 高级功能
 """
 from fastapi import APIRouter, Depends, File, UploadFile, Form, HTTPException, status
 from sqlalchemy.orm import Session
-import os
 
+from app.core.errors import RequestRejectedError
 from app.database import get_db
 from app.services.image_service import ImageService
+from app.services.temp_files import TempScope, temp_files, temp_scope
 from app.services.watermark_service import WatermarkService
 from app.services.translation_service import TranslationService
 from app.services.office_service import OfficeService
 from app.services.long_image_service import LongImageService
+from app.services.image_executor import image_executor
+from app.services.ocr_service import ocr_service
 
 router = APIRouter()
 image_service = ImageService()
@@ -25,6 +28,7 @@ async def remove_watermark(
     file: UploadFile = File(...),
     watermark_type: str = Form("text"),  # text/logo
     watermark_text: str = Form(None),
+    temp: TempScope = Depends(temp_scope),
     current_user = Depends(lambda: None)
 ):
     """
@@ -32,20 +36,20 @@ async def remove_watermark(
     """
     try:
         # 保存临时文件
-        temp_path = await image_service.save_upload_file(file)
+        temp_path = temp.track(await image_service.save_upload_file(file))
 
         # 去水印
         if watermark_type == "text":
-            result_path = watermark_service.remove_text_watermark(
+            result_path = await image_executor.run(
+                watermark_service.remove_text_watermark,
                 temp_path,
                 watermark_text
             )
         else:  # logo
-            result_path = watermark_service.remove_logo_watermark(temp_path)
+            result_path = await image_executor.run(watermark_service.remove_logo_watermark, temp_path)
 
-        # 删除临时文件
-        if temp_path != result_path:
-            os.unlink(temp_path)
+        # 处理失败时返回的是上传文件本身，同样留给后台清理回收
+        temp.release(result_path)
 
         return {
             "success": True,
@@ -54,6 +58,8 @@ async def remove_watermark(
             }
         }
 
+    except RequestRejectedError:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -67,6 +73,7 @@ async def add_watermark(
     watermark_text: str = Form("智扫通"),
     position: str = Form("bottom_right"),
     opacity: float = Form(0.3),
+    temp: TempScope = Depends(temp_scope),
     current_user = Depends(lambda: None)
 ):
     """
@@ -74,19 +81,17 @@ async def add_watermark(
     """
     try:
         # 保存临时文件
-        temp_path = await image_service.save_upload_file(file)
+        temp_path = temp.track(await image_service.save_upload_file(file))
 
         # 添加水印
-        result_path = watermark_service.add_watermark(
+        result_path = await image_executor.run(
+            watermark_service.add_watermark,
             temp_path,
             watermark_text,
             position,
             opacity
         )
-
-        # 删除临时文件
-        if temp_path != result_path:
-            os.unlink(temp_path)
+        temp.release(result_path)
 
         return {
             "success": True,
@@ -95,6 +100,8 @@ async def add_watermark(
             }
         }
 
+    except RequestRejectedError:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -136,20 +143,19 @@ async def translate_ocr(
     file: UploadFile = File(...),
     from_lang: str = Form("zh"),
     to_lang: str = Form("en"),
+    temp: TempScope = Depends(temp_scope),
     current_user = Depends(lambda: None)
 ):
     """
     翻译OCR结果
     """
     try:
-        from app.services.ocr_service import OCRService
-
         # 保存临时文件
-        temp_path = await image_service.save_upload_file(file)
+        upload = await image_service.save_upload(file)
+        temp_path = temp.track(upload["path"])
 
         # OCR识别
-        ocr_service = OCRService()
-        ocr_result = await ocr_service.ocr_image(temp_path, from_lang)
+        ocr_result = await ocr_service.ocr_image(temp_path, from_lang, content_hash=upload["sha256"])
 
         # 翻译
         translated_result = await translation_service.translate_ocr_result(
@@ -158,14 +164,13 @@ async def translate_ocr(
             to_lang
         )
 
-        # 删除临时文件
-        os.unlink(temp_path)
-
         return {
             "success": True,
             "data": translated_result
         }
 
+    except RequestRejectedError:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -229,6 +234,7 @@ async def export_excel(
 async def create_long_image(
     files: list[UploadFile] = File(...),
     spacing: int = Form(20),
+    temp: TempScope = Depends(temp_scope),
     current_user = Depends(lambda: None)
 ):
     """
@@ -238,19 +244,17 @@ async def create_long_image(
         # 保存所有文件
         image_paths = []
         for file in files:
-            temp_path = await image_service.save_upload_file(file)
+            temp_path = temp.track(await image_service.save_upload_file(file))
             image_paths.append(temp_path)
 
         # 创建长图片
-        result_path = long_image_service.create_long_image(
+        result_path = await image_executor.run(
+            long_image_service.create_long_image,
             image_paths,
+            output_path=str(temp_files.path(".png")),
             spacing=spacing
         )
 
-        # 删除临时文件
-        for path in image_paths:
-            os.unlink(path)
-
         return {
             "success": True,
             "data": {
@@ -258,6 +262,8 @@ async def create_long_image(
             }
         }
 
+    except RequestRejectedError:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -270,6 +276,7 @@ async def create_grid_image(
     files: list[UploadFile] = File(...),
     columns: int = Form(2),
     spacing: int = Form(10),
+    temp: TempScope = Depends(temp_scope),
     current_user = Depends(lambda: None)
 ):
     """
@@ -279,20 +286,18 @@ async def create_grid_image(
         # 保存所有文件
         image_paths = []
         for file in files:
-            temp_path = await image_service.save_upload_file(file)
+            temp_path = temp.track(await image_service.save_upload_file(file))
             image_paths.append(temp_path)
 
         # 创建网格图片
-        result_path = long_image_service.create_grid_image(
+        result_path = await image_executor.run(
+            long_image_service.create_grid_image,
             image_paths,
+            output_path=str(temp_files.path(".png")),
             columns=columns,
             spacing=spacing
         )
 
-        # 删除临时文件
-        for path in image_paths:
-            os.unlink(path)
-
         return {
             "success": True,
             "data": {
@@ -300,6 +305,8 @@ async def create_grid_image(
             }
         }
 
+    except RequestRejectedError:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
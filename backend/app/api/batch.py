@@ -3,12 +3,14 @@ API路由 - 批量处理
 """
 from fastapi import APIRouter, Depends, File, UploadFile, Form, HTTPException, status
 from sqlalchemy.orm import Session
-import os
+from typing import Optional
 import uuid
 
+from app.core.errors import RequestRejectedError
 from app.database import get_db
 from app.services.batch_service import BatchService
 from app.services.image_service import ImageService
+from app.services.temp_files import TempScope, temp_scope
 
 router = APIRouter()
 batch_service = BatchService()
@@ -19,24 +21,28 @@ image_service = ImageService()
 async def batch_ocr(
     files: list[UploadFile] = File(...),
     lang: str = Form("ch"),
+    quality_gate: Optional[str] = Form(None),  # off/flag/drop，默认使用配置
+    temp: TempScope = Depends(temp_scope),
     current_user = Depends(lambda: None)  # TODO: 添加认证
 ):
     """
-    批量OCR识别
+    批量OCR识别（先做质量检查，空白页不识别，drop模式下模糊图片也不识别）
     """
     try:
+        mode = image_service.quality_mode(quality_gate)
+
         # 保存所有文件
         image_paths = []
+        content_hashes = []
         for file in files:
-            temp_path = await image_service.save_upload_file(file)
-            image_paths.append(temp_path)
+            upload = await image_service.save_upload(file)
+            image_paths.append(temp.track(upload["path"]))
+            content_hashes.append(upload["sha256"])
 
         # 批量OCR
-        results = await batch_service.batch_ocr(image_paths, lang)
-
-        # 删除临时文件
-        for path in image_paths:
-            os.unlink(path)
+        results = await batch_service.batch_ocr(
+            image_paths, lang, quality_gate=mode, content_hashes=content_hashes
+        )
 
         return {
             "success": True,
@@ -46,6 +52,8 @@ async def batch_ocr(
             }
         }
 
+    except RequestRejectedError:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -56,6 +64,7 @@ async def batch_ocr(
 @router.post("/batch/enhance")
 async def batch_enhance(
     files: list[UploadFile] = File(...),
+    temp: TempScope = Depends(temp_scope),
     current_user = Depends(lambda: None)
 ):
     """
@@ -65,7 +74,7 @@ async def batch_enhance(
         # 保存所有文件
         image_paths = []
         for file in files:
-            temp_path = await image_service.save_upload_file(file)
+            temp_path = temp.track(await image_service.save_upload_file(file))
             image_paths.append(temp_path)
 
         # 批量增强
@@ -76,10 +85,6 @@ async def batch_enhance(
             path.replace("static", "/static") for path in enhanced_paths
         ]
 
-        # 删除原始文件
-        for path in image_paths:
-            os.unlink(path)
-
         return {
             "success": True,
             "data": {
@@ -88,6 +93,8 @@ async def batch_enhance(
             }
         }
 
+    except RequestRejectedError:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -99,36 +106,56 @@ async def batch_enhance(
 async def batch_export_pdf(
     files: list[UploadFile] = File(...),
     filename: str = Form(None),
+    quality_gate: Optional[str] = Form(None),  # off/flag/drop，drop模式下空白页和模糊页不放入PDF
+    bilevel: bool = Form(False),  # 扫描模式：黑白二值页面，CCITT G4压缩
+    searchable: bool = Form(False),  # 可搜索PDF（附带OCR文字层）
+    lang: str = Form("ch"),
+    temp: TempScope = Depends(temp_scope),
     current_user = Depends(lambda: None)
 ):
     """
     批量导出为单个PDF
     """
     try:
+        mode = image_service.quality_mode(quality_gate)
+
         # 保存所有文件
         image_paths = []
         for file in files:
-            temp_path = await image_service.save_upload_file(file)
+            temp_path = temp.track(await image_service.save_upload_file(file))
             image_paths.append(temp_path)
 
         # 生成文件名
         if filename is None:
             filename = f"batch_{uuid.uuid4().hex[:8]}.pdf"
 
-        # 批量导出PDF
-        pdf_path = await batch_service.batch_pdf_export(image_paths, filename)
+        # 质量检查：只有drop模式会去掉页面
+        checks = await batch_service.check_quality(image_paths, mode)
+        pages = [
+            path for path, check in zip(image_paths, checks)
+            if mode != "drop" or check["skipped"] is None
+        ]
+        if not pages:
+            raise RequestRejectedError("所有图片都未通过质量检查")
 
-        # 删除临时图片
-        for path in image_paths:
-            os.unlink(path)
+        # 批量导出PDF
+        pdf_path = await batch_service.batch_pdf_export(
+            pages, filename, bilevel=bilevel, searchable=searchable, lang=lang
+        )
 
         return {
             "success": True,
             "data": {
-                "pdf_url": pdf_path
+                "pdf_url": pdf_path,
+                "pages": len(pages),
+                "quality": [
+                    {"filename": file.filename, **check} for file, check in zip(files, checks)
+                ]
             }
         }
 
+    except RequestRejectedError:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
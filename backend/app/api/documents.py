@@ -1,18 +1,20 @@
 """
 API路由 - 文档管理
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.responses import FileResponse
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 import os
 
+from app.core.config import settings
+from app.core.errors import RequestRejectedError
 from app.database import get_db
 from app.models import Document
-from app.services.ocr_service import OCRService
 from app.services.image_service import ImageService
+from app.services.thumbnail_service import thumbnail_service
 
 router = APIRouter()
-ocr_service = OCRService()
 image_service = ImageService()
 
 
@@ -29,7 +31,8 @@ async def get_documents(user_id: str = "default", db: Session = Depends(get_db))
             "name": doc.name,
             "type": doc.type,
             "created_at": doc.created_at.isoformat() if doc.created_at else None,
-            "status": doc.status
+            "status": doc.status,
+            "thumbnail_url": thumbnail_service.url_for(doc.id)
         }
         for doc in documents
     ]
@@ -56,6 +59,7 @@ async def get_document(document_id: str, user_id: str = "default", db: Session =
         "created_at": document.created_at.isoformat() if document.created_at else None,
         "status": document.status,
         "metadata": document.doc_metadata,
+        "thumbnail_url": thumbnail_service.url_for(document.id),
         "text": ""
     }
 
@@ -71,6 +75,72 @@ async def get_document(document_id: str, user_id: str = "default", db: Session =
     return result
 
 
+@router.get("/documents/{document_id}/thumbnail")
+async def get_document_thumbnail(
+    document_id: str,
+    request: Request,
+    size: Optional[int] = None,
+    user_id: str = "default",
+    db: Session = Depends(get_db)
+):
+    """
+    获取文档缩略图
+
+    缩略图内容不会变化，响应带长期缓存头；没有缩略图的旧文档在第一次请求时补生成，
+    PDF文档用第一页生成，无法生成缩略图的文档返回415。
+
+    Args:
+        document_id: 文档ID
+        size: 缩略图长边，必须是配置的尺寸之一，默认第一个
+    """
+    if size is not None and size not in thumbnail_service.sizes:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"不支持的缩略图尺寸: {size}，可选: {thumbnail_service.sizes}"
+        )
+
+    # 先校验文档归属，再处理条件请求：不能让其他用户凭ETag探测文档是否存在
+    document = db.query(Document).filter(
+        Document.id == document_id,
+        Document.user_id == user_id
+    ).first()
+
+    if not document:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="文档不存在"
+        )
+
+    headers = {
+        "Cache-Control": f"private, max-age={settings.THUMBNAIL_CACHE_MAX_AGE}, immutable",
+        "ETag": f'"{document_id}-{size or thumbnail_service.default_size}.{thumbnail_service.extension}"'
+    }
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    try:
+        path = await thumbnail_service.get_or_create(document.id, document.file_path, size)
+    except RequestRejectedError:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+    if path is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="文档图片不存在"
+        )
+
+    # 补生成后记录默认尺寸的缩略图路径
+    if not document.thumbnail_path:
+        document.thumbnail_path = str(thumbnail_service.path_for(document.id))
+        db.commit()
+
+    return FileResponse(path, media_type=thumbnail_service.media_type, headers=headers)
+
+
 @router.delete("/documents/{document_id}", response_model=dict)
 async def delete_document(document_id: str, user_id: str = "default", db: Session = Depends(get_db)):
     """删除文档"""
@@ -89,8 +159,7 @@ async def delete_document(document_id: str, user_id: str = "default", db: Sessio
     if document.file_path and os.path.exists(document.file_path):
         os.unlink(document.file_path)
 
-    if document.thumbnail_path and os.path.exists(document.thumbnail_path):
-        os.unlink(document.thumbnail_path)
+    thumbnail_service.delete(document.id)
 
     # 删除数据库记录
     db.delete(document)
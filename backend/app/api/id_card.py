@@ -3,16 +3,22 @@ API路由 - 证件扫描
 """
 from fastapi import APIRouter, Depends, File, UploadFile, Form, HTTPException, status
 from sqlalchemy.orm import Session
+import logging
 import os
 import uuid
 
+from app.core.errors import RequestRejectedError
 from app.database import get_db
 from app.models import Document, IDCard
-from app.services.ocr_service import OCRService
+from app.services.card_templates import extract_template_info, get_template
+from app.services.ocr_service import ocr_service
 from app.services.image_service import ImageService
+from app.services.temp_files import TempScope, temp_files, temp_scope
+from app.services.thumbnail_service import thumbnail_service
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
-ocr_service = OCRService()
 image_service = ImageService()
 
 
@@ -22,28 +28,40 @@ async def scan_id_card(
     card_type: str = Form("id_card"),  # id_card/passport/license/等
     enhance: bool = Form(True),
     auto_crop: bool = Form(True),
+    use_template: bool = Form(True),  # 有模板的证件只识别字段区域
     user_id: str = Form("default"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    temp: TempScope = Depends(temp_scope)
 ):
     """
     证件扫描
     """
     try:
         # 保存临时文件
-        temp_path = await image_service.save_upload_file(file)
+        upload = await image_service.save_upload(file)
+        temp_path = temp.track(upload["path"])
 
-        # 处理图像
-        processed_path = await image_service.process_document(
-            temp_path,
-            enhance=enhance,
-            auto_crop=auto_crop
+        # 处理图像（解码一次，在内存中处理，只保存最终结果）
+        operations = (["crop"] if auto_crop else []) + (["enhance"] if enhance else [])
+        processed_path, content_hash = await image_service.process_document_image(
+            temp_path, operations, content_hash=upload["sha256"]
         )
+        # 处理结果作为文档保存，移出临时目录
+        processed_path = temp_files.persist(processed_path, image_service.upload_dir)
+
+        # 按模板只识别字段区域，校验不通过时回退到整页识别
+        ocr_result, id_info = None, None
+        template = get_template(card_type) if use_template and auto_crop else None
+        if template:
+            ocr_result = await ocr_service.ocr_regions(processed_path, template["regions"], template["lang"])
+            id_info = extract_template_info(card_type, ocr_result["fields"])
 
-        # OCR识别
-        ocr_result = await ocr_service.ocr_image(processed_path, "ch")
+        if id_info is None:
+            # OCR识别
+            ocr_result = await ocr_service.ocr_image(processed_path, "ch", content_hash=content_hash)
 
-        # 提取证件信息（简化版，实际需要根据不同证件类型解析）
-        id_info = extract_id_info(card_type, ocr_result)
+            # 提取证件信息（简化版，实际需要根据不同证件类型解析）
+            id_info = extract_id_info(card_type, ocr_result)
 
         # 保存到数据库
         document = Document(
@@ -52,13 +70,21 @@ async def scan_id_card(
             type=card_type,
             file_path=processed_path,
             ocr_result=ocr_result,
-            metadata={"file_size": os.path.getsize(processed_path)},
+            doc_metadata={"file_size": os.path.getsize(processed_path)},
             status="success"
         )
         db.add(document)
         db.commit()
         db.refresh(document)
 
+        # 生成缩略图（只解码到缩略图尺寸），失败时等第一次请求再补生成
+        try:
+            await thumbnail_service.generate(processed_path, document.id)
+            document.thumbnail_path = str(thumbnail_service.path_for(document.id))
+            db.commit()
+        except Exception as e:
+            logger.warning(f"缩略图生成失败，将在请求时补生成: {e}")
+
         # 保存证件信息
         id_card = IDCard(
             user_id=user_id,
@@ -70,20 +96,20 @@ async def scan_id_card(
         db.add(id_card)
         db.commit()
 
-        # 删除临时文件
-        os.unlink(temp_path)
-
         return {
             "success": True,
             "data": {
                 "document_id": document.id,
                 "card_type": card_type,
                 "image_url": processed_path.replace("static", "/static"),
+                "thumbnail_url": thumbnail_service.url_for(document.id),
                 "ocr_result": ocr_result,
                 "id_info": id_info
             }
         }
 
+    except RequestRejectedError:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -2,7 +2,7 @@
 应用配置（完整版）
 """
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import List, Optional
 from pathlib import Path
 
 
@@ -28,12 +28,91 @@ class Settings(BaseSettings):
     # OCR配置
     OCR_LANG_DEFAULT: str = "ch"
     OCR_USE_GPU: bool = True
+    OCR_BACKEND: str = "paddle"  # 推理后端: paddle / onnx
+    OCR_PRECISION: str = "fp32"  # 推理精度: fp32 / fp16 / int8（onnx后端int8加载量化模型）
+    OCR_ENABLE_MKLDNN: bool = False  # paddle后端CPU推理是否启用MKLDNN
+    OCR_SERVER_TIMING: bool = False  # 是否在OCR/扫描接口返回Server-Timing响应头
+
+    # OCR工作进程池
+    OCR_USE_WORKER_POOL: bool = True  # 是否启用独立的OCR工作进程池
+    OCR_WORKERS: int = 0  # 工作进程数，0表示按CPU核数自动计算
+    OCR_WORKER_THREADS: int = 2  # 每个工作进程的推理线程数
+
+    # OCR启动预热
+    OCR_WARMUP_ENABLED: bool = True
+    OCR_WARMUP_LANGS: List[str] = []  # 除 OCR_LANG_DEFAULT 外需要预热的语言
+
+    # OCR动态批处理
+    OCR_BATCH_ENABLED: bool = True  # 是否合并并发请求批量识别
+    OCR_BATCH_MAX_SIZE: int = 8  # 每批最多合并的请求数
+    OCR_BATCH_WAIT_MS: float = 10  # 收集请求的最长等待时间（毫秒）
+    OCR_REC_BATCH_NUM: int = 16  # 识别阶段每次推理的文本行数
+
+    # OCR结果缓存
+    OCR_CACHE_ENABLED: bool = True
+    OCR_CACHE_MEMORY_ITEMS: int = 256  # 内存层最多缓存的结果数
+    OCR_CACHE_DISK_MAX_MB: int = 512  # 磁盘层最大占用（MB），0表示不使用磁盘层
+
+    # 自适应分辨率识别
+    OCR_ADAPTIVE_ENABLED: bool = True
+    OCR_ADAPTIVE_TARGET_TEXT_HEIGHT: int = 24  # 第一遍识别时期望的文字高度（像素）
+    OCR_ADAPTIVE_MIN_SIDE: int = 640  # 缩小后长边的下限
+    OCR_ADAPTIVE_CONFIDENCE: float = 0.85  # 低于该置信度的文本行回原图分辨率重新识别
+
+    # 超大图片/长图分块识别
+    OCR_TILE_ENABLED: bool = True
+    OCR_TILE_THRESHOLD_PIXELS: int = 8_000_000  # 像素数超过该值时分块
+    OCR_TILE_MAX_SIDE: int = 4096  # 长边超过该值时分块（长截图）
+    OCR_TILE_SIZE: int = 1600  # 图块边长
+    OCR_TILE_OVERLAP: int = 192  # 相邻图块重叠像素数，应大于最大文字行高
+
+    # 图像处理
+    IMAGE_CROP_PROXY_SIDE: int = 800  # 文档边界检测所用缩略图的长边，0表示在原图上检测
+    IMAGE_ENHANCE_PRESET: str = "document"  # 默认增强预设: document/photo/grayscale/binarized
+
+    # 图片质量检查（OCR前识别空白页和模糊图片）
+    QUALITY_GATE: str = "flag"  # off: 不检查；flag: 空白页不识别，模糊页只标记；drop: 空白页和模糊页都丢弃
+    QUALITY_PROXY_SIDE: int = 1024  # 质量检查所用缩略图的长边
+    QUALITY_BLUR_THRESHOLD: float = 200.0  # 墨迹附近的拉普拉斯方差低于该值判为模糊
+    QUALITY_BLANK_INK: float = 0.0002  # 墨迹像素占比低于该值判为空白页
+
+    # 图像处理工作进程池（裁剪、增强、缩放、水印、拼图、PDF编码）
+    IMAGE_USE_PROCESS_POOL: bool = True  # 关闭时在线程池中执行
+    IMAGE_WORKERS: int = 0  # 工作进程数，0表示按CPU核数自动计算
+    IMAGE_WORKER_THREADS: int = 1  # 每个工作进程的OpenCV线程数
+    IMAGE_MAX_QUEUE: int = 64  # 最多同时排队和执行的任务数，超出时返回503；0表示不限制
+
+    # PDF导出
+    PDF_PAGE_SIZE: str = "auto"  # auto: 页面大小由图片像素和PDF_DPI决定；A3/A4/A5/Letter/Legal: 图片等比缩放居中
+    PDF_DPI: float = 150.0  # auto模式下图片的分辨率
+    PDF_JPEG_QUALITY: int = 85  # 彩色/灰度页面的JPEG质量
+    PDF_MERGE_LINEARIZE: bool = False  # 合并结果线性化（Fast Web View），网页查看时先下载显示第一页
+
+    # PDF输入（/scan、/ocr、/document/process 上传PDF）
+    PDF_INPUT_DPI: float = 200.0  # 没有文字层的页面渲染为图片的分辨率（可按请求指定，72~600）
+    PDF_INPUT_MAX_PAGES: int = 200  # 单个PDF最多页数，超出时返回413
+    PDF_TEXT_MIN_CHARS: int = 10  # 文字层的非空白字符数不少于该值时直接使用，不做OCR
+
+    # 文档缩略图
+    THUMBNAIL_SIZES: List[int] = [256, 768]  # 缩略图长边，第一个为列表页默认尺寸
+    THUMBNAIL_FORMAT: str = "webp"  # webp/jpeg
+    THUMBNAIL_QUALITY: int = 80
+    THUMBNAIL_CACHE_MAX_AGE: int = 365 * 24 * 3600  # 缩略图响应的缓存时间（秒）
+
+    # 临时文件（上传文件和中间结果）
+    TEMP_RAM_DIR: Optional[str] = None  # 放在内存文件系统中，如 /dev/shm/scanmaster；为空时使用磁盘 temp 目录
+    TEMP_MAX_AGE: int = 3600  # 临时文件最长保留时间（秒），超过后由后台清理删除
+    TEMP_MAX_SIZE_MB: int = 1024  # 临时目录最大占用（MB），超出时从最旧的文件开始删除；0表示不限制
+    TEMP_SWEEP_INTERVAL: int = 300  # 后台清理间隔（秒）
 
     # 目录配置
     BASE_DIR: Path = Path(__file__).parent.parent
     UPLOAD_DIR: Path = BASE_DIR / "uploads"
     TEMP_DIR: Path = BASE_DIR / "temp"
     STATIC_DIR: Path = BASE_DIR / "static"
+    OCR_CACHE_DIR: Path = BASE_DIR / "cache" / "ocr"
+    THUMBNAIL_DIR: Path = BASE_DIR / "cache" / "thumbnails"
+    OCR_ONNX_MODEL_DIR: Path = BASE_DIR / "models" / "onnx"  # {lang}/det.onnx、rec.onnx、cls.onnx
 
     # CORS配置
     CORS_ORIGINS: List[str] = ["*"]
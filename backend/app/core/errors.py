@@ -0,0 +1,11 @@
+"""
+请求错误 - 由全局异常处理器转换为对应的HTTP状态码
+"""
+from typing import Dict, Optional
+
+
+class RequestRejectedError(Exception):
+    """请求被拒绝（上传不合法、服务繁忙等），路由不应将其包装为500"""
+
+    status_code: int = 400
+    headers: Optional[Dict[str, str]] = None
@@ -0,0 +1,143 @@
+"""
+运行指标 - 进程内的计数器、直方图与请求阶段耗时
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Any, List, Optional
+
+# 默认分桶（毫秒）
+DEFAULT_MS_BUCKETS = [1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+
+
+class Counter:
+    """计数器"""
+
+    def __init__(self, name: str, description: str = ""):
+        self.name = name
+        self.description = description
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: int = 1):
+        """累加"""
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> int:
+        return self._value
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"type": "counter", "description": self.description, "value": self._value}
+
+
+class Histogram:
+    """直方图（累计分桶）"""
+
+    def __init__(self, name: str, description: str = "", buckets: Optional[List[float]] = None):
+        self.name = name
+        self.description = description
+        self.buckets = sorted(buckets or DEFAULT_MS_BUCKETS)
+        self._counts = [0] * (len(self.buckets) + 1)  # 最后一个为 +Inf
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        """记录一次观测值"""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            self._count += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            cumulative = 0
+            buckets = {}
+            for bound, count in zip(self.buckets + ["+Inf"], self._counts):
+                cumulative += count
+                buckets[str(bound)] = cumulative
+            return {
+                "type": "histogram",
+                "description": self.description,
+                "count": self._count,
+                "sum": round(self._sum, 3),
+                "avg": round(self._sum / self._count, 3) if self._count else 0,
+                "buckets": buckets
+            }
+
+
+class MetricsRegistry:
+    """指标注册表"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, description: str = "") -> Counter:
+        """获取或创建计数器"""
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = Counter(name, description)
+            return self._metrics[name]
+
+    def histogram(self, name: str, description: str = "", buckets: Optional[List[float]] = None) -> Histogram:
+        """获取或创建直方图"""
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = Histogram(name, description, buckets)
+            return self._metrics[name]
+
+    def snapshot(self) -> Dict[str, Any]:
+        """导出所有指标"""
+        with self._lock:
+            metrics = list(self._metrics.items())
+        return {name: metric.snapshot() for name, metric in sorted(metrics)}
+
+
+class StageTimings:
+    """单个请求各处理阶段的耗时（毫秒）"""
+
+    def __init__(self):
+        self._stages: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        """计时一个阶段（同名阶段累加）"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, (time.perf_counter() - started) * 1000)
+
+    def add(self, name: str, ms: float):
+        """累加阶段耗时"""
+        self._stages[name] = self._stages.get(name, 0.0) + ms
+
+    def update(self, stages: Dict[str, float]):
+        """合并其它计时结果（例如工作进程返回的阶段耗时）"""
+        for name, ms in stages.items():
+            self.add(name, ms)
+
+    def as_dict(self) -> Dict[str, float]:
+        return {name: round(ms, 3) for name, ms in self._stages.items()}
+
+    def observe(self, prefix: str):
+        """各阶段耗时记入直方图 {prefix}_{阶段}_ms"""
+        for name, ms in self._stages.items():
+            metrics.histogram(f"{prefix}_{name}_ms", f"{name}阶段耗时（毫秒）").observe(ms)
+
+    def server_timing(self) -> str:
+        """Server-Timing响应头的值"""
+        return ", ".join(f"{name};dur={ms:.1f}" for name, ms in self._stages.items())
+
+
+# 进程级单例
+metrics = MetricsRegistry()
+
+# 当前请求的阶段计时，由路由设置，服务层记录
+request_timings: ContextVar[Optional[StageTimings]] = ContextVar("request_timings", default=None)
@@ -3,9 +3,10 @@
 """
 import logging
 import asyncio
-from typing import List
+import uuid
+from typing import Any, Dict, List, Optional
 from pathlib import Path
-from app.services.ocr_service import OCRService
+from app.services.ocr_service import ocr_service
 from app.services.image_service import ImageService
 from app.services.pdf_service import PDFService
 
@@ -16,43 +17,94 @@ class BatchService:
     """批量处理服务"""
 
     def __init__(self):
-        self.ocr_service = OCRService()
+        self.ocr_service = ocr_service
         self.image_service = ImageService()
         self.pdf_service = PDFService()
 
-    async def batch_ocr(self, image_paths: List[str], lang: str = "ch") -> List[dict]:
+    async def check_quality(self, image_paths: List[str], mode: str) -> List[Dict[str, Any]]:
+        """
+        批量图片质量检查
+
+        Args:
+            image_paths: 图片路径列表
+            mode: 质量检查模式（off/flag/drop）
+
+        Returns:
+            每张图片的 {"quality": 质量指标, "skipped": 跳过原因}；不检查或检查失败时quality为None
+        """
+        if mode == "off":
+            return [{"quality": None, "skipped": None} for _ in image_paths]
+
+        results = await asyncio.gather(
+            *[self.image_service.analyze_quality(path) for path in image_paths],
+            return_exceptions=True
+        )
+
+        checks = []
+        for i, quality in enumerate(results):
+            if isinstance(quality, Exception):
+                # 检查失败不影响后续处理
+                logger.warning(f"图片{i+1}质量检查失败: {quality}")
+                quality = None
+            checks.append({"quality": quality, "skipped": self.image_service.quality_skip_reason(quality, mode)})
+        return checks
+
+    async def batch_ocr(
+        self,
+        image_paths: List[str],
+        lang: str = "ch",
+        quality_gate: str = "off",
+        content_hashes: Optional[List[str]] = None
+    ) -> List[dict]:
         """
         批量OCR识别
 
         Args:
             image_paths: 图片路径列表
             lang: 语言类型
+            quality_gate: 质量检查模式，被跳过的图片不做OCR
+            content_hashes: 与图片路径一一对应的文件SHA-256（上传时计算），用于查询OCR缓存
 
         Returns:
             OCR识别结果列表
         """
+        checks = await self.check_quality(image_paths, quality_gate)
+
+        hashes = content_hashes or [None] * len(image_paths)
         tasks = []
-        for path in image_paths:
-            task = self.ocr_service.ocr_image(path, lang)
-            tasks.append(task)
+        for path, content_hash, check in zip(image_paths, hashes, checks):
+            if check["skipped"] is None:
+                tasks.append(self.ocr_service.ocr_image(path, lang, content_hash=content_hash))
 
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        results = iter(await asyncio.gather(*tasks, return_exceptions=True))
 
         # 处理异常
         processed_results = []
-        for i, result in enumerate(results):
+        for i, check in enumerate(checks):
+            if check["skipped"] is not None:
+                processed_results.append({
+                    "success": True,
+                    "image": image_paths[i],
+                    "result": None,
+                    **check
+                })
+                continue
+
+            result = next(results)
             if isinstance(result, Exception):
                 logger.error(f"图片{i+1} OCR失败: {result}")
                 processed_results.append({
                     "success": False,
                     "image": image_paths[i],
-                    "error": str(result)
+                    "error": str(result),
+                    **check
                 })
             else:
                 processed_results.append({
                     "success": True,
                     "image": image_paths[i],
-                    "result": result
+                    "result": result,
+                    **check
                 })
 
         return processed_results
@@ -114,7 +166,10 @@ class BatchService:
     async def batch_pdf_export(
         self,
         image_paths: List[str],
-        output_filename: str = None
+        output_filename: str = None,
+        bilevel: bool = False,
+        searchable: bool = False,
+        lang: str = "ch"
     ) -> str:
         """
         批量导出为单个PDF
@@ -122,6 +177,9 @@ class BatchService:
         Args:
             image_paths: 图片路径列表
             output_filename: 输出文件名
+            bilevel: 扫描模式（1位黑白页面，CCITT G4压缩）
+            searchable: 可搜索PDF（附带OCR文字层）
+            lang: OCR语言类型
 
         Returns:
             PDF文件路径
@@ -129,5 +187,7 @@ class BatchService:
         if output_filename is None:
             output_filename = f"batch_{uuid.uuid4().hex}.pdf"
 
-        pdf_path = await self.pdf_service.create_pdf(image_paths, output_filename)
+        pdf_path = await self.pdf_service.create_pdf(
+            image_paths, output_filename, bilevel=bilevel, searchable=searchable, lang=lang
+        )
         return pdf_path
@@ -0,0 +1,117 @@
+"""
+证件模板 - 各类证件字段的位置
+
+证件经过自动裁剪后版式固定，字段位置用相对于证件宽高的归一化坐标描述，
+识别时只裁剪这些区域做文字识别，不必对整张证件做检测。
+模板识别结果校验不通过时（例如裁剪不准导致证件号不完整），调用方应回退到整页识别。
+"""
+import re
+from typing import Any, Dict, Optional
+
+# 区域: {"name": 字段名, "box": [x0, y0, x1, y1], "normalized": box是否为归一化坐标,
+#       "multiline": 区域内是否有多行文字}
+CARD_TEMPLATES: Dict[str, Dict[str, Any]] = {
+    # 居民身份证（人像面）
+    "id_card": {
+        "lang": "ch",
+        "regions": [
+            {"name": "name", "box": [0.17, 0.07, 0.62, 0.21], "normalized": True},
+            {"name": "address", "box": [0.17, 0.47, 0.64, 0.80], "normalized": True, "multiline": True},
+            {"name": "id_number", "box": [0.32, 0.78, 0.97, 0.94], "normalized": True},
+        ]
+    },
+    # 护照（资料页底部的机读区）
+    "passport": {
+        "lang": "en",
+        "regions": [
+            {"name": "mrz", "box": [0.02, 0.74, 0.98, 0.99], "normalized": True, "multiline": True},
+        ]
+    },
+}
+
+ID_NUMBER_PATTERN = re.compile(r"\d{17}[\dX]")
+
+
+def get_template(card_type: str) -> Optional[Dict[str, Any]]:
+    """
+    获取证件模板
+
+    Args:
+        card_type: 证件类型
+
+    Returns:
+        模板，没有模板的证件类型返回None
+    """
+    return CARD_TEMPLATES.get(card_type)
+
+
+def parse_mrz(text: str) -> Optional[Dict[str, str]]:
+    """
+    解析护照机读区（TD3格式，两行各44个字符）
+
+    Args:
+        text: 机读区识别文本
+
+    Returns:
+        证件信息，格式不符时返回None
+    """
+    lines = [
+        re.sub(r"\s+", "", line).upper().replace("«", "<")
+        for line in text.split("\n")
+    ]
+    lines = [line for line in lines if len(line) >= 40]
+    if len(lines) < 2 or not lines[0].startswith("P"):
+        return None
+
+    line1, line2 = lines[0], lines[1]
+    names = line1[5:].split("<<", 1)
+    surname = names[0].replace("<", " ").strip()
+    given = names[1].replace("<", " ").strip() if len(names) > 1 else ""
+
+    number = line2[:9].replace("<", "")
+    if not number:
+        return None
+
+    return {
+        "name": f"{surname} {given}".strip(),
+        "id_number": number,
+        "expiry_date": _mrz_date(line2[21:27])
+    }
+
+
+def _mrz_date(value: str) -> str:
+    """机读区日期 YYMMDD 转为 YYYY-MM-DD（无法识别时原样返回）"""
+    if not re.fullmatch(r"\d{6}", value):
+        return value
+    # 有效期都在本世纪
+    return f"20{value[:2]}-{value[2:4]}-{value[4:6]}"
+
+
+def extract_template_info(card_type: str, fields: Dict[str, str]) -> Optional[Dict[str, str]]:
+    """
+    从模板区域的识别结果提取证件信息
+
+    Args:
+        card_type: 证件类型
+        fields: 字段名 -> 识别文本
+
+    Returns:
+        证件信息，校验不通过时返回None
+    """
+    if card_type == "id_card":
+        id_number = re.sub(r"\s+", "", fields.get("id_number", "")).upper()
+        match = ID_NUMBER_PATTERN.search(id_number)
+        if not match:
+            return None
+        return {
+            "name": fields.get("name", "").strip(),
+            "id_number": match.group(0),
+            # 地址折行显示，识别结果按行拼接
+            "address": fields.get("address", "").replace("\n", "")
+        }
+
+    if card_type == "passport":
+        return parse_mrz(fields.get("mrz", ""))
+
+    return None
+
@@ -0,0 +1,119 @@
+"""
+图像增强引擎 - 基于查找表和OpenCV核的向量化实现
+
+PIL的 ImageEnhance 每一步都分配一张新的整图并单线程执行。这里把对比度做成
+256项查找表（cv2.LUT），锐化和去噪用OpenCV的多线程滤波，尽量原地写回uint8数组，
+大图的延迟和峰值内存都明显低于PIL链式调用。"document" 预设与原PIL流程
+（对比度1.5、锐化1.5、3x3中值滤波）结果一致（误差在1个灰度级左右）。
+"""
+import logging
+from functools import lru_cache
+from typing import Any, Dict
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 预设参数：contrast/sharpness 与PIL ImageEnhance的系数含义相同（1表示不变）
+PRESETS: Dict[str, Dict[str, Any]] = {
+    # 文档：提高对比度、锐化、去噪（与原PIL流程一致）
+    "document": {"grayscale": False, "contrast": 1.5, "sharpness": 1.5, "denoise": 3},
+    # 照片：轻度增强，保留色彩和细节
+    "photo": {"grayscale": False, "contrast": 1.1, "sharpness": 1.3, "denoise": 0},
+    # 灰度：去掉颜色，适合黑白打印件
+    "grayscale": {"grayscale": True, "contrast": 1.4, "sharpness": 1.5, "denoise": 3},
+    # 二值化：自适应阈值，适合文字稿和传真件
+    "binarized": {"grayscale": True, "contrast": 1.0, "sharpness": 1.0, "denoise": 3, "binarize": True},
+}
+
+# PIL ImageFilter.SMOOTH 的卷积核（Sharpness的退化图）
+_SMOOTH_KERNEL = np.array([[1, 1, 1], [1, 5, 1], [1, 1, 1]], dtype=np.float32) / 13
+
+
+@lru_cache(maxsize=512)
+def contrast_lut(mean: int, factor: float) -> np.ndarray:
+    """
+    对比度查找表，与PIL ImageEnhance.Contrast相同：out = mean + factor * (v - mean)
+
+    Args:
+        mean: 图片灰度均值
+        factor: 对比度系数
+
+    Returns:
+        256项uint8查找表
+    """
+    values = np.arange(256, dtype=np.float64)
+    # PIL的blend按C语言截断取整
+    lut = np.trunc(mean + factor * (values - mean))
+    lut = np.clip(lut, 0, 255).astype(np.uint8)
+    lut.setflags(write=False)
+    return lut
+
+
+def _gray_mean(image: np.ndarray) -> int:
+    """灰度均值（RGB按ITU-R 601-2加权，不生成灰度图）"""
+    if image.ndim == 2:
+        return int(cv2.mean(image)[0] + 0.5)
+    r, g, b = cv2.mean(image)[:3]
+    return int(r * 0.299 + g * 0.587 + b * 0.114 + 0.5)
+
+
+class EnhanceEngine:
+    """图像增强引擎"""
+
+    def presets(self) -> list:
+        """可用的预设名称"""
+        return list(PRESETS)
+
+    @staticmethod
+    def is_bilevel(preset: str) -> bool:
+        """预设是否输出黑白二值图（可按1位图保存和嵌入PDF）"""
+        return PRESETS.get(preset, {}).get("binarize", False)
+
+    def apply(self, image: np.ndarray, preset: str = "document", inplace: bool = False) -> np.ndarray:
+        """
+        按预设增强图片
+
+        Args:
+            image: RGB或灰度uint8数组
+            preset: 预设名称（document/photo/grayscale/binarized）
+            inplace: 是否直接修改输入数组（输入需可写；灰度类预设会改变通道数，总是返回新数组）
+
+        Returns:
+            增强后的数组（灰度类预设返回二维数组）
+        """
+        params = PRESETS.get(preset)
+        if params is None:
+            raise Exception(f"不支持的增强预设: {preset}")
+
+        if params["grayscale"] and image.ndim == 3:
+            image = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+        elif not inplace or not image.flags.writeable:
+            image = image.copy()
+
+        # 对比度：查找表原地映射
+        if params["contrast"] != 1.0:
+            cv2.LUT(image, contrast_lut(_gray_mean(image), params["contrast"]), dst=image)
+
+        # 锐化：out = smooth + k * (image - smooth)
+        if params["sharpness"] != 1.0:
+            smooth = cv2.filter2D(image, -1, _SMOOTH_KERNEL, borderType=cv2.BORDER_REPLICATE)
+            k = params["sharpness"]
+            cv2.addWeighted(image, k, smooth, 1 - k, 0, dst=image)
+            del smooth
+
+        # 去噪
+        if params["denoise"]:
+            image = cv2.medianBlur(image, params["denoise"])
+
+        if params.get("binarize"):
+            image = cv2.adaptiveThreshold(
+                image, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 31, 15
+            )
+
+        return image
+
+
+# 进程级单例
+enhance_engine = EnhanceEngine()
@@ -0,0 +1,42 @@
+"""
+文件类型识别 - 按文件头魔数判断真实类型，不信任客户端提供的文件名
+"""
+from typing import List, Optional
+
+# (规范扩展名, [(偏移, 文件头字节)])
+SIGNATURES = [
+    (".jpg", [(0, b"\xff\xd8\xff")]),
+    (".png", [(0, b"\x89PNG\r\n\x1a\n")]),
+    (".gif", [(0, b"GIF87a")]),
+    (".gif", [(0, b"GIF89a")]),
+    (".webp", [(0, b"RIFF"), (8, b"WEBP")]),  # RIFF头中间4个字节是长度
+    (".pdf", [(0, b"%PDF-")]),
+]
+
+# 识别所需的最少字节数
+SNIFF_BYTES = 16
+
+# 同一类型的其它扩展名写法
+ALIASES = {".jpeg": ".jpg"}
+
+
+def sniff_extension(head: bytes) -> Optional[str]:
+    """
+    按文件头识别文件类型
+
+    Args:
+        head: 文件开头的字节（至少 SNIFF_BYTES 个）
+
+    Returns:
+        规范扩展名（例如 .jpg），无法识别时返回None
+    """
+    for extension, parts in SIGNATURES:
+        if all(head[offset:offset + len(magic)] == magic for offset, magic in parts):
+            return extension
+    return None
+
+
+def is_allowed(extension: str, allowed: List[str]) -> bool:
+    """扩展名是否在允许列表中（.jpg/.jpeg视为同一类型）"""
+    normalized = {ALIASES.get(ext.lower(), ext.lower()) for ext in allowed}
+    return ALIASES.get(extension, extension) in normalized
@@ -0,0 +1,154 @@
+"""
+图像处理执行器 - CPU密集图像操作的独立工作进程池
+
+裁剪、增强、缩放、水印、拼图、PDF编码都是同步的CV/PIL调用，直接在路由中执行
+会阻塞事件循环，一张大图就能拖慢所有连接。执行器把这些操作提交到按CPU核数
+配置的工作进程池，并限制排队深度：队列已满时立即拒绝（接口返回503），
+而不是无限堆积请求。工作进程池未启动时（测试、关闭进程池的部署）在线程池中执行。
+"""
+import asyncio
+import functools
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+from app.core.errors import RequestRejectedError
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class ImageQueueFullError(RequestRejectedError):
+    """图像处理队列已满"""
+
+    status_code = 503
+    headers = {"Retry-After": "1"}
+
+
+def _init_worker(threads: int):
+    """工作进程初始化：限制每个进程的OpenCV线程数，避免多进程叠加后超额占用CPU"""
+    import cv2
+
+    cv2.setNumThreads(threads)
+    logger.info(f"图像处理工作进程就绪: pid={os.getpid()}")
+
+
+class ImageExecutor:
+    """图像处理执行器"""
+
+    def __init__(self, workers: int = None, threads: int = None, max_queue: int = None):
+        """
+        初始化图像处理执行器
+
+        Args:
+            workers: 工作进程数，默认读取配置（0表示按CPU核数计算）
+            threads: 每个工作进程的OpenCV线程数
+            max_queue: 最多同时排队和执行的任务数，0表示不限制
+        """
+        self.threads = max(1, threads or settings.IMAGE_WORKER_THREADS)
+        workers = workers if workers is not None else settings.IMAGE_WORKERS
+        if workers <= 0:
+            workers = max(1, (os.cpu_count() or 1) // self.threads)
+        self.workers = workers
+        self.max_queue = max_queue if max_queue is not None else settings.IMAGE_MAX_QUEUE
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending = 0
+        self._state_lock = threading.Lock()
+        self.restarts = 0
+
+        self.rejected = metrics.counter("image_executor_rejected", "队列已满被拒绝的图像处理任务数")
+        self.queue_depth = metrics.histogram(
+            "image_executor_queue_depth", "提交任务时的队列深度", buckets=[0, 1, 2, 4, 8, 16, 32, 64, 128]
+        )
+
+    @property
+    def running(self) -> bool:
+        """工作进程池是否已启动"""
+        return self._executor is not None
+
+    @property
+    def pending(self) -> int:
+        """排队和执行中的任务数"""
+        return self._pending
+
+    def start(self):
+        """启动工作进程池"""
+        if self.running:
+            return
+
+        logger.info(f"启动图像处理工作进程池: workers={self.workers}, threads={self.threads}")
+        # 与OCR引擎一样使用spawn，避免fork继承父进程的线程状态
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.threads,)
+        )
+
+    def shutdown(self):
+        """关闭工作进程池"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            logger.info("图像处理工作进程池已关闭")
+
+    def _restart(self, broken: ProcessPoolExecutor):
+        """工作进程异常退出后重建进程池（并发失败的任务只重建一次）"""
+        with self._state_lock:
+            if self._executor is not broken:
+                return
+            self._executor = None
+            self.restarts += 1
+        broken.shutdown(wait=False, cancel_futures=True)
+        logger.error("图像处理工作进程异常退出，重建工作进程池")
+        self.start()
+
+    async def run(self, fn, *args, **kwargs) -> Any:
+        """
+        执行一个图像处理任务
+
+        工作进程异常退出（崩溃、被OOM终止）时进程池不可再用，重建进程池后
+        本次任务返回错误，之后的任务在新的进程池中执行。
+
+        Args:
+            fn: 模块级函数或服务对象的方法（参数和返回值需可pickle）
+            *args, **kwargs: 函数参数
+
+        Returns:
+            函数返回值
+        """
+        if self.max_queue and self._pending >= self.max_queue:
+            self.rejected.inc()
+            raise ImageQueueFullError(f"图像处理队列已满（{self._pending}个任务），请稍后重试")
+
+        self.queue_depth.observe(self._pending)
+        self._pending += 1
+        executor = self._executor
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(executor, functools.partial(fn, *args, **kwargs))
+        except BrokenProcessPool as e:
+            self._restart(executor)
+            raise Exception(f"图像处理工作进程异常退出: {str(e)}")
+        finally:
+            self._pending -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        """执行器状态"""
+        return {
+            "running": self.running,
+            "workers": self.workers,
+            "threads_per_worker": self.threads,
+            "pending": self._pending,
+            "max_queue": self.max_queue,
+            "restarts": self.restarts
+        }
+
+
+# 进程级单例
+image_executor = ImageExecutor()
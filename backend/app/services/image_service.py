@@ -1,19 +1,174 @@
 """
 图像处理服务
 """
+import hashlib
 import logging
 import os
 import uuid
 from pathlib import Path
-from typing import List
+from typing import Any, Dict, List, Optional, Tuple
 import cv2
 import numpy as np
-from PIL import Image, ImageEnhance, ImageFilter
+from PIL import Image, ImageOps
 from fastapi import UploadFile
 import aiofiles
 
+from app.core.config import settings
+from app.core.errors import RequestRejectedError
+from app.core.metrics import metrics
+from app.services.enhance_engine import enhance_engine
+from app.services.file_types import is_allowed, sniff_extension
+from app.services.image_executor import image_executor
+from app.services.ocr_cache import OCRCache
+from app.services.temp_files import temp_files
+
 logger = logging.getLogger(__name__)
 
+# 上传文件每次读取和写入的字节数
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# 质量检查模式: off（不检查）、flag（空白页不识别，模糊页只标记）、drop（空白页和模糊页都丢弃）
+QUALITY_MODES = ("off", "flag", "drop")
+# 比局部背景暗多少（灰度级）算作墨迹，以及估计局部背景的窗口边长（缩略图像素）
+INK_CONTRAST = 40
+INK_BACKGROUND_WINDOW = 15
+# 平均亮度低于/高于该值判为欠曝/过曝
+UNDEREXPOSED_MEAN = 60
+OVEREXPOSED_MEAN = 250
+
+_blank_pages = metrics.counter("quality_blank_pages", "质量检查判为空白页的图片数")
+_blurry_pages = metrics.counter("quality_blurry_pages", "质量检查判为模糊的图片数")
+
+
+class UploadTooLargeError(RequestRejectedError):
+    """上传文件超过大小限制"""
+
+    status_code = 413
+
+
+class UnsupportedFileTypeError(RequestRejectedError):
+    """上传文件类型不在允许列表中"""
+
+    status_code = 415
+
+
+def decode_image(
+    image_path: str,
+    max_side: int = None,
+    mode: str = "RGB",
+    resample: int = Image.Resampling.BOX
+) -> np.ndarray:
+    """
+    读取图片为数组（按EXIF方向旋转），可指定目标尺寸
+
+    指定 max_side 时，JPEG在解码阶段直接做DCT域缩放（1/2、1/4、1/8，PIL draft），
+    只解码不小于目标尺寸的最小一档，再缩放到长边不超过 max_side；
+    其它格式正常解码后缩放。边界检测、缩略图、清晰度检查等只需要小图的场景
+    不必解码后再丢弃大部分像素。
+
+    Args:
+        image_path: 图片路径
+        max_side: 目标长边，None表示原图分辨率
+        mode: 输出模式（RGB/L），JPEG的L模式直接解码亮度通道
+        resample: 缩放到目标尺寸所用的重采样方法
+
+    Returns:
+        图片数组
+    """
+    with Image.open(image_path) as image:
+        if max_side and max(image.size) > max_side:
+            ratio = max_side / max(image.size)
+            image.draft(mode, (max(1, int(image.width * ratio)), max(1, int(image.height * ratio))))
+        image = ImageOps.exif_transpose(image)
+        if image.mode != mode:
+            image = image.convert(mode)
+        if max_side and max(image.size) > max_side:
+            image.thumbnail((max_side, max_side), resample)
+        return np.asarray(image)
+
+
+def image_size(image_path: str) -> Tuple[int, int]:
+    """
+    读取图片按EXIF方向旋转后的尺寸（只读文件头，不解码像素），与 decode_image 的输出一致
+
+    Args:
+        image_path: 图片路径
+
+    Returns:
+        (宽, 高)
+    """
+    with Image.open(image_path) as image:
+        width, height = image.size
+        # EXIF方向5~8需要转置或旋转90度，宽高互换
+        if image.getexif().get(0x0112, 1) in (5, 6, 7, 8):
+            return height, width
+        return width, height
+
+
+def to_bilevel(image: np.ndarray) -> Image.Image:
+    """
+    二值化结果转为1位图（mode "1"）
+
+    透视矫正等插值会在黑白边界产生中间灰度，按128阈值归回黑白。
+
+    Args:
+        image: 二值化后的灰度数组（0/255）
+
+    Returns:
+        1位PIL图片
+    """
+    if image.ndim == 3:
+        image = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+    return Image.fromarray(image > 127)
+
+
+def measure_quality(gray: np.ndarray) -> Dict[str, Any]:
+    """
+    计算灰度缩略图的质量指标
+
+    墨迹是比局部背景（邻域最大值）暗 INK_CONTRAST 以上的像素，对光照不均不敏感；
+    清晰度是墨迹附近的拉普拉斯方差（扣除纸面噪声），不会因为页面留白多而被拉低。
+
+    Args:
+        gray: 灰度图片数组（质量检查用的缩略图）
+
+    Returns:
+        {"sharpness": 清晰度, "ink_coverage": 墨迹占比, "brightness": 平均亮度,
+         "exposure": ok/under/over, "blank": 是否空白页, "blurry": 是否模糊}
+    """
+    kernel = np.ones((INK_BACKGROUND_WINDOW, INK_BACKGROUND_WINDOW), np.uint8)
+    background = cv2.dilate(gray, kernel)
+    ink = cv2.subtract(background, gray) > INK_CONTRAST
+    ink_coverage = float(ink.mean())
+
+    sharpness = 0.0
+    if ink.any():
+        # 减去远离墨迹处（纸面噪声）的方差，噪声大的照片不会被误判为清晰
+        ink_mask = ink.astype(np.uint8)
+        edges = cv2.dilate(ink_mask, np.ones((3, 3), np.uint8)).astype(bool)
+        paper = ~cv2.dilate(ink_mask, np.ones((9, 9), np.uint8)).astype(bool)
+        laplacian = cv2.Laplacian(gray, cv2.CV_32F)
+        noise = float(laplacian[paper].var()) if paper.any() else 0.0
+        sharpness = max(0.0, float(laplacian[edges].var()) - noise)
+
+    brightness = float(gray.mean())
+    if brightness < UNDEREXPOSED_MEAN:
+        exposure = "under"
+    elif brightness > OVEREXPOSED_MEAN:
+        exposure = "over"
+    else:
+        exposure = "ok"
+
+    blank = ink_coverage < settings.QUALITY_BLANK_INK
+    return {
+        "sharpness": round(sharpness, 1),
+        "ink_coverage": round(ink_coverage, 5),
+        "brightness": round(brightness, 1),
+        "exposure": exposure,
+        "blank": blank,
+        "blurry": not blank and sharpness < settings.QUALITY_BLUR_THRESHOLD
+    }
+
 
 class ImageService:
     """图像处理服务"""
@@ -21,79 +176,114 @@ class ImageService:
     def __init__(self):
         """初始化图像处理服务"""
         self.upload_dir = Path("uploads")
-        self.temp_dir = Path("temp")
+        self.temp_dir = temp_files.root
         self.upload_dir.mkdir(exist_ok=True)
-        self.temp_dir.mkdir(exist_ok=True)
 
-    async def save_upload_file(self, file: UploadFile) -> str:
+    async def save_upload(self, file: UploadFile) -> Dict[str, Any]:
         """
-        保存上传的文件
+        流式保存上传的文件
+
+        按块读取和写入，内存占用与文件大小无关；写入的同时计算内容哈希，
+        超过 MAX_UPLOAD_SIZE 时立即停止并删除已写入的部分。
+        文件类型按文件头识别，不信任客户端提供的文件名。
 
         Args:
             file: 上传的文件
 
         Returns:
-            文件路径
+            {"path": 文件路径, "size": 字节数, "sha256": 内容哈希, "extension": 识别出的扩展名}
         """
-        # 生成唯一文件名
-        file_extension = Path(file.filename).suffix
-        unique_filename = f"{uuid.uuid4()}{file_extension}"
-        file_path = self.temp_dir / unique_filename
+        head = await file.read(UPLOAD_CHUNK_SIZE)
+        extension = sniff_extension(head)
+        if extension is None or not is_allowed(extension, settings.ALLOWED_EXTENSIONS):
+            raise UnsupportedFileTypeError(f"不支持的文件类型: {file.filename}")
 
-        # 保存文件
-        async with aiofiles.open(file_path, "wb") as f:
-            content = await file.read()
-            await f.write(content)
+        # 生成唯一文件名
+        file_path = self.temp_dir / f"{uuid.uuid4()}{extension}"
+        digest = hashlib.sha256()
+        size = 0
 
-        logger.info(f"文件保存成功: {file_path}")
-        return str(file_path)
+        try:
+            async with aiofiles.open(file_path, "wb") as f:
+                chunk = head
+                while chunk:
+                    size += len(chunk)
+                    if size > settings.MAX_UPLOAD_SIZE:
+                        raise UploadTooLargeError(
+                            f"文件超过大小限制: {settings.MAX_UPLOAD_SIZE // (1024 * 1024)}MB"
+                        )
+                    digest.update(chunk)
+                    await f.write(chunk)
+                    chunk = await file.read(UPLOAD_CHUNK_SIZE)
+        except Exception:
+            file_path.unlink(missing_ok=True)
+            raise
+
+        logger.info(f"文件保存成功: {file_path} ({size}字节)")
+        return {"path": str(file_path), "size": size, "sha256": digest.hexdigest(), "extension": extension}
 
-    async def enhance_image(self, image_path: str) -> str:
+    async def save_upload_file(self, file: UploadFile) -> str:
         """
-        图像增强（对比度、锐化、去噪）
+        保存上传的文件
 
         Args:
-            image_path: 图片路径
+            file: 上传的文件
 
         Returns:
-            处理后的图片路径
+            文件路径
         """
-        try:
-            # 读取图片
-            image = Image.open(image_path)
+        return (await self.save_upload(file))["path"]
 
-            # 转换为RGB
-            if image.mode != 'RGB':
-                image = image.convert('RGB')
+    async def enhance_image(self, image_path: str, preset: str = None) -> str:
+        """
+        图像增强（在图像处理工作进程中执行）
 
-            # 对比度增强
-            enhancer = ImageEnhance.Contrast(image)
-            image = enhancer.enhance(1.5)
+        Args:
+            image_path: 图片路径
+            preset: 增强预设（document/photo/grayscale/binarized），默认使用配置
 
-            # 锐化
-            enhancer = ImageEnhance.Sharpness(image)
-            image = enhancer.enhance(1.5)
+        Returns:
+            处理后的图片路径
+        """
+        return await image_executor.run(self._enhance_image_sync, image_path, preset)
 
-            # 去噪
-            image = image.filter(ImageFilter.MedianFilter(size=3))
+    def _enhance_image_sync(self, image_path: str, preset: str = None) -> str:
+        """图像增强（同步执行）"""
+        try:
+            image = self.enhance_array(self.load_image(image_path), preset)
 
             # 保存
-            output_path = self.temp_dir / f"{uuid.uuid4()}_enhanced.jpg"
-            image.save(output_path, "JPEG", quality=95)
+            output_path = self.save_array(
+                image, suffix="enhanced", bilevel=enhance_engine.is_bilevel(preset or settings.IMAGE_ENHANCE_PRESET)
+            )
 
             # 删除原文件
             os.unlink(image_path)
 
             logger.info(f"图像增强完成: {output_path}")
-            return str(output_path)
+            return output_path
 
         except Exception as e:
             logger.error(f"图像增强失败: {e}")
             raise Exception(f"图像增强失败: {str(e)}")
 
+    def enhance_array(self, image: np.ndarray, preset: str = None, inplace: bool = False) -> np.ndarray:
+        """
+        图像增强（内存中的RGB数组）
+
+        Args:
+            image: RGB图片数组
+            preset: 增强预设（document/photo/grayscale/binarized），默认使用配置
+            inplace: 是否直接修改输入数组
+
+        Returns:
+            增强后的图片数组（灰度类预设返回二维数组）
+        """
+        return enhance_engine.apply(image, preset or settings.IMAGE_ENHANCE_PRESET, inplace=inplace)
+
     async def auto_crop(self, image_path: str) -> str:
         """
-        自动裁剪（检测文档边界）
+        自动裁剪（检测文档边界，在图像处理工作进程中执行）
 
         Args:
             image_path: 图片路径
@@ -101,58 +291,176 @@ class ImageService:
         Returns:
             处理后的图片路径
         """
+        return await image_executor.run(self._auto_crop_sync, image_path)
+
+    def _auto_crop_sync(self, image_path: str) -> str:
+        """自动裁剪（同步执行）"""
         try:
-            # 读取图片
-            image = cv2.imread(image_path)
+            # 先在缩小解码的灰度图上检测边界，未检测到四边形时不解码原图
+            proxy_side = settings.IMAGE_CROP_PROXY_SIDE or None
+            proxy = decode_image(image_path, proxy_side, mode="L")
+            pts = self._detect_quad(proxy)
+            if pts is not None:
+                # 只有透视变换需要原图分辨率
+                image = decode_image(image_path)
+                gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+                quad = self._map_to_full(pts, proxy.shape, gray)
+                output_path = self.save_array(self._four_point_transform(image, quad), suffix="cropped")
+
+                # 删除原文件
+                os.unlink(image_path)
+
+                logger.info(f"自动裁剪完成: {output_path}")
+                return output_path
 
-            # 转为灰度图
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+            # 如果没有找到四边形，返回原图
+            return image_path
 
-            # 高斯模糊
-            blurred = cv2.GaussianBlur(gray, (5, 5), 0)
+        except Exception as e:
+            logger.error(f"自动裁剪失败: {e}")
+            # 失败返回原图
+            return image_path
 
-            # 边缘检测
-            edged = cv2.Canny(blurred, 75, 200)
+    def crop_document(self, image: np.ndarray, bgr: bool = False) -> Optional[np.ndarray]:
+        """
+        检测文档边界并做透视矫正
 
-            # 查找轮廓
-            contours, _ = cv2.findContours(
-                edged.copy(),
-                cv2.RETR_EXTERNAL,
-                cv2.CHAIN_APPROX_SIMPLE
-            )
+        Args:
+            image: 图片数组（灰度、二值化预设增强后为二维数组）
+            bgr: 是否为OpenCV的BGR通道顺序（默认RGB）
 
-            # 找到最大轮廓（文档）
-            if contours:
-                c = max(contours, key=cv2.contourArea)
+        Returns:
+            矫正后的图片数组（通道数与输入相同），未检测到四边形时返回None
+        """
+        # 转为灰度图
+        if image.ndim == 2:
+            gray = image
+        else:
+            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY if bgr else cv2.COLOR_RGB2GRAY)
 
-                # 多边形近似
-                peri = cv2.arcLength(c, True)
-                approx = cv2.approxPolyDP(c, 0.02 * peri, True)
+        quad = self.find_document_quad(gray)
+        if quad is None:
+            return None
 
-                # 如果是四边形
-                if len(approx) == 4:
-                    # 裁剪
-                    pts = approx.reshape(4, 2)
-                    rect = self._order_points(pts)
-                    warped = self._four_point_transform(image, rect)
+        # 只有最终的透视变换在原图分辨率上进行
+        return self._four_point_transform(image, quad)
 
-                    # 保存
-                    output_path = self.temp_dir / f"{uuid.uuid4()}_cropped.jpg"
-                    cv2.imwrite(str(output_path), warped)
+    def find_document_quad(self, gray: np.ndarray, proxy_side: int = None) -> Optional[np.ndarray]:
+        """
+        在缩略图上检测文档的四个角点，再换算回原图并做亚像素修正
 
-                    # 删除原文件
-                    os.unlink(image_path)
+        模糊、边缘检测和轮廓查找的耗时与像素数成正比，
+        在长边800像素左右的缩略图上检测，对手机照片可以快一个数量级。
 
-                    logger.info(f"自动裁剪完成: {output_path}")
-                    return str(output_path)
+        Args:
+            gray: 原图分辨率的灰度图
+            proxy_side: 缩略图长边，默认读取配置（0表示在原图上检测）
 
-            # 如果没有找到四边形，返回原图
-            return image_path
+        Returns:
+            原图坐标下的四个角点（4x2），未检测到四边形时返回None
+        """
+        if proxy_side is None:
+            proxy_side = settings.IMAGE_CROP_PROXY_SIDE
+        height, width = gray.shape[:2]
+        proxy = gray
+        if 0 < proxy_side < max(height, width):
+            scale = proxy_side / max(height, width)
+            proxy = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+        pts = self._detect_quad(proxy)
+        if pts is None:
+            return None
+        return self._map_to_full(pts, proxy.shape, gray)
+
+    def _detect_quad(self, gray: np.ndarray) -> Optional[np.ndarray]:
+        """
+        在灰度图上检测文档的四个角点
 
-        except Exception as e:
-            logger.error(f"自动裁剪失败: {e}")
-            # 失败返回原图
-            return image_path
+        Args:
+            gray: 灰度图（通常是缩略图）
+
+        Returns:
+            该图坐标下的四个角点（4x2），未检测到四边形时返回None
+        """
+        # 高斯模糊
+        blurred = cv2.GaussianBlur(gray, (5, 5), 0)
+
+        # 边缘检测
+        edged = cv2.Canny(blurred, 75, 200)
+
+        # 查找轮廓
+        contours, _ = cv2.findContours(
+            edged,
+            cv2.RETR_EXTERNAL,
+            cv2.CHAIN_APPROX_SIMPLE
+        )
+
+        # 找到最大轮廓（文档）
+        if not contours:
+            return None
+        c = max(contours, key=cv2.contourArea)
+
+        # 多边形近似
+        peri = cv2.arcLength(c, True)
+        approx = cv2.approxPolyDP(c, 0.02 * peri, True)
+
+        # 如果是四边形
+        if len(approx) != 4:
+            return None
+
+        return approx.reshape(4, 2).astype(np.float32)
+
+    def _map_to_full(self, pts: np.ndarray, proxy_shape: tuple, gray: np.ndarray) -> np.ndarray:
+        """
+        缩略图上的角点换算回原图坐标并做亚像素修正
+
+        Args:
+            pts: 缩略图坐标下的角点
+            proxy_shape: 缩略图尺寸
+            gray: 原图分辨率的灰度图
+
+        Returns:
+            原图坐标下的角点
+        """
+        proxy_height, proxy_width = proxy_shape[:2]
+        height, width = gray.shape[:2]
+        if (proxy_height, proxy_width) == (height, width):
+            return pts
+        # 两个方向分别换算（DCT缩放和取整可能使横纵比例略有差异），按像素中心对齐
+        scale = np.array([proxy_width / width, proxy_height / height], dtype=np.float32)
+        pts = (pts + 0.5) / scale - 0.5
+        return self._refine_corners(gray, pts, float(scale.min()))
+
+    def _refine_corners(self, gray: np.ndarray, pts: np.ndarray, scale: float) -> np.ndarray:
+        """
+        在原图上修正从缩略图换算来的角点
+
+        缩略图上一个像素对应原图 1/scale 个像素，在这个范围内做亚像素角点搜索；
+        修正后偏移超出搜索窗口的点（圆角、阴影等）保留换算结果。
+        """
+        window = max(3, int(round(1 / scale)) * 2)
+        height, width = gray.shape[:2]
+        # 搜索窗口不能越过图片边界
+        inside = (
+            (pts[:, 0] > window) & (pts[:, 0] < width - window - 1)
+            & (pts[:, 1] > window) & (pts[:, 1] < height - window - 1)
+        )
+        if not inside.any():
+            return pts
+
+        corners = pts[inside].reshape(-1, 1, 2).copy()
+        criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 30, 0.01)
+        try:
+            cv2.cornerSubPix(gray, corners, (window, window), (-1, -1), criteria)
+        except cv2.error:
+            return pts
+
+        refined = pts.copy()
+        moved = np.linalg.norm(corners.reshape(-1, 2) - pts[inside], axis=1)
+        refined[inside] = np.where(
+            (moved <= window)[:, None], corners.reshape(-1, 2), pts[inside]
+        )
+        return refined
 
     def _order_points(self, pts):
         """对点进行排序"""
@@ -198,6 +506,113 @@ class ImageService:
 
         return warped
 
+    def load_image(self, image_path: str) -> np.ndarray:
+        """
+        读取图片为RGB数组（按EXIF方向旋正）
+
+        Args:
+            image_path: 图片路径
+
+        Returns:
+            RGB图片数组
+        """
+        return decode_image(image_path)
+
+    def save_array(self, image: np.ndarray, suffix: str = "processed", bilevel: bool = False) -> str:
+        """
+        编码保存RGB数组
+
+        Args:
+            image: RGB图片数组（二值图为二维数组）
+            suffix: 文件名后缀
+            bilevel: 是否按1位黑白PNG保存（二值化的文字稿，比JPEG小一个数量级且没有压缩噪点）
+
+        Returns:
+            文件路径
+        """
+        if bilevel:
+            output_path = self.temp_dir / f"{uuid.uuid4()}_{suffix}.png"
+            to_bilevel(image).save(output_path, "PNG", optimize=True)
+        else:
+            output_path = self.temp_dir / f"{uuid.uuid4()}_{suffix}.jpg"
+            Image.fromarray(image).save(output_path, "JPEG", quality=95)
+        return str(output_path)
+
+    def run_pipeline(self, image: np.ndarray, operations: List[str], enhance_preset: str = None) -> np.ndarray:
+        """
+        在内存中依次执行处理操作
+
+        Args:
+            image: RGB图片数组
+            operations: 操作列表（crop/enhance），按顺序执行
+            enhance_preset: 增强预设，默认使用配置
+
+        Returns:
+            处理后的RGB图片数组
+        """
+        for op in operations:
+            if op == "crop":
+                try:
+                    warped = self.crop_document(image)
+                    if warped is not None:
+                        image = warped
+                except Exception as e:
+                    # 裁剪失败沿用原图
+                    logger.error(f"自动裁剪失败: {e}")
+            elif op == "enhance":
+                # 流程内的中间结果可以原地修改（只读的解码结果会先复制一次）
+                image = self.enhance_array(image, enhance_preset, inplace=True)
+        return image
+
+    def _process_document_sync(
+        self,
+        image_path: str,
+        operations: List[str],
+        enhance_preset: str = None,
+        content_hash: str = None
+    ) -> Tuple[str, str]:
+        """解码一次、内存中处理、只编码最终结果一次"""
+        try:
+            if not operations:
+                return image_path, content_hash or OCRCache.file_hash(image_path)
+
+            image = self.run_pipeline(self.load_image(image_path), operations, enhance_preset)
+            bilevel = "enhance" in operations and enhance_engine.is_bilevel(
+                enhance_preset or settings.IMAGE_ENHANCE_PRESET
+            )
+            output_path = self.save_array(image, bilevel=bilevel)
+            return output_path, OCRCache.file_hash(output_path)
+        except Exception as e:
+            logger.error(f"文档处理失败: {e}")
+            raise Exception(f"文档处理失败: {str(e)}")
+
+    async def process_document_image(
+        self,
+        image_path: str,
+        operations: List[str],
+        enhance_preset: str = None,
+        content_hash: str = None
+    ) -> Tuple[str, str]:
+        """
+        融合的文档处理流程：图片只解码一次，裁剪、增强都在内存中完成，
+        只有最终结果编码保存一次（在图像处理工作进程中执行）
+
+        返回的是结果文件路径和内容哈希而不是像素数组：OCR工作进程按路径读取，
+        缓存按哈希查询，全分辨率的数组不在进程之间反复传递和整体哈希。
+
+        Args:
+            image_path: 图片路径（不会被删除）
+            operations: 操作列表（crop/enhance），按顺序执行
+            enhance_preset: 增强预设，默认使用配置
+            content_hash: 原图的SHA-256（上传时计算），没有操作时直接作为结果的哈希
+
+        Returns:
+            (处理结果路径，没有操作时为原图路径, 结果文件的SHA-256)
+        """
+        return await image_executor.run(
+            self._process_document_sync, image_path, operations, enhance_preset, content_hash
+        )
+
     async def process_document(
         self,
         image_path: str,
@@ -215,19 +630,13 @@ class ImageService:
         Returns:
             处理后的图片路径
         """
-        processed_path = image_path
-
-        if auto_crop:
-            processed_path = await self.auto_crop(processed_path)
-
-        if enhance:
-            processed_path = await self.enhance_image(processed_path)
-
+        operations = (["crop"] if auto_crop else []) + (["enhance"] if enhance else [])
+        processed_path, _ = await self.process_document_image(image_path, operations)
         return processed_path
 
     async def resize_image(self, image_path: str, max_size: int = 1920) -> str:
         """
-        调整图片大小
+        调整图片大小（在图像处理工作进程中执行）
 
         Args:
             image_path: 图片路径
@@ -236,11 +645,13 @@ class ImageService:
         Returns:
             处理后的图片路径
         """
-        try:
-            image = Image.open(image_path)
+        return await image_executor.run(self._resize_image_sync, image_path, max_size)
 
-            # 调整大小
-            image.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
+    def _resize_image_sync(self, image_path: str, max_size: int = 1920) -> str:
+        """调整图片大小（同步执行）"""
+        try:
+            # 缩小解码后调整大小
+            image = Image.fromarray(decode_image(image_path, max_size, resample=Image.Resampling.LANCZOS))
 
             # 保存
             output_path = self.temp_dir / f"{uuid.uuid4()}_resized.jpg"
@@ -254,3 +665,58 @@ class ImageService:
         except Exception as e:
             logger.error(f"调整图片大小失败: {e}")
             return image_path
+
+    async def analyze_quality(self, image_path: str) -> Dict[str, Any]:
+        """
+        图片质量检查：清晰度、墨迹占比、曝光（在图像处理工作进程中执行）
+
+        只在缩小解码的灰度图上计算，JPEG直接在DCT域缩小，耗时远小于一次OCR。
+
+        Args:
+            image_path: 图片路径
+
+        Returns:
+            质量指标，见 measure_quality
+        """
+        quality = await image_executor.run(self._analyze_quality_sync, image_path)
+        if quality["blank"]:
+            _blank_pages.inc()
+        elif quality["blurry"]:
+            _blurry_pages.inc()
+        return quality
+
+    def _analyze_quality_sync(self, image_path: str) -> Dict[str, Any]:
+        """图片质量检查（同步执行）"""
+        try:
+            return measure_quality(decode_image(image_path, settings.QUALITY_PROXY_SIDE, mode="L"))
+        except Exception as e:
+            logger.error(f"图片质量检查失败: {e}")
+            raise Exception(f"图片质量检查失败: {str(e)}")
+
+    @staticmethod
+    def quality_mode(mode: Optional[str]) -> str:
+        """校验质量检查模式，未指定时使用配置"""
+        mode = mode or settings.QUALITY_GATE
+        if mode not in QUALITY_MODES:
+            raise RequestRejectedError(f"不支持的质量检查模式: {mode}")
+        return mode
+
+    @staticmethod
+    def quality_skip_reason(quality: Optional[Dict[str, Any]], mode: str) -> Optional[str]:
+        """
+        按质量检查结果决定是否跳过该图片
+
+        Args:
+            quality: 质量指标，检查失败时为None（照常处理）
+            mode: 质量检查模式
+
+        Returns:
+            跳过原因（blank/blurry），None表示照常处理
+        """
+        if quality is None or mode == "off":
+            return None
+        if quality["blank"]:
+            return "blank"
+        if mode == "drop" and quality["blurry"]:
+            return "blurry"
+        return None
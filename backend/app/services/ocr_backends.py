@@ -0,0 +1,165 @@
+"""
+OCR推理后端 - PaddleOCR原生推理 / ONNX Runtime CPU推理
+
+两种后端都返回PaddleOCR的TextSystem实例（ocr / text_detector / text_classifier /
+text_recognizer 接口一致），上层的批处理、分块、区域识别逻辑不感知后端差异。
+后端、线程数和精度由配置决定。
+"""
+import abc
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Dict
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# 创建ONNX模型时临时替换PaddleOCR的预测器工厂函数，同一时间只允许一个线程替换
+_predictor_lock = threading.Lock()
+
+
+class OCRBackend(abc.ABC):
+    """推理后端基类"""
+
+    name = ""
+
+    def describe(self) -> Dict[str, Any]:
+        """影响识别结果的后端配置（计入模型配置和缓存键）"""
+        return {"backend": self.name, "precision": settings.OCR_PRECISION}
+
+    @abc.abstractmethod
+    def load(self, config: Dict[str, Any]):
+        """
+        创建OCR模型
+
+        Args:
+            config: 模型配置（lang、use_angle_cls）
+
+        Returns:
+            PaddleOCR实例
+        """
+
+
+class PaddleBackend(OCRBackend):
+    """Paddle Inference推理（默认）"""
+
+    name = "paddle"
+
+    def load(self, config: Dict[str, Any]):
+        from paddleocr import PaddleOCR
+
+        return PaddleOCR(
+            use_angle_cls=config["use_angle_cls"],
+            lang=config["lang"],
+            use_gpu=settings.OCR_USE_GPU,
+            cpu_threads=settings.OCR_WORKER_THREADS,
+            enable_mkldnn=settings.OCR_ENABLE_MKLDNN,
+            precision=settings.OCR_PRECISION,
+            rec_batch_num=settings.OCR_REC_BATCH_NUM,
+            show_log=False
+        )
+
+
+class OnnxBackend(OCRBackend):
+    """
+    ONNX Runtime CPU推理
+
+    模型目录结构: {OCR_ONNX_MODEL_DIR}/{lang}/det.onnx、rec.onnx、cls.onnx，
+    精度为int8时优先加载同目录下的 det_int8.onnx 等量化模型。
+    """
+
+    name = "onnx"
+
+    def model_path(self, lang: str, stage: str) -> Path:
+        """
+        模型文件路径
+
+        Args:
+            lang: 模型语言（ch/en）
+            stage: det/rec/cls
+
+        Returns:
+            .onnx文件路径
+        """
+        model_dir = Path(settings.OCR_ONNX_MODEL_DIR) / lang
+        if settings.OCR_PRECISION == "int8":
+            quantized = model_dir / f"{stage}_int8.onnx"
+            if quantized.exists():
+                return quantized
+            logger.warning(f"未找到量化模型 {quantized}，使用fp32模型")
+        path = model_dir / f"{stage}.onnx"
+        if not path.exists():
+            raise Exception(f"未找到ONNX模型: {path}")
+        return path
+
+    def _session(self, path: Path):
+        """创建限制线程数的推理会话"""
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = settings.OCR_WORKER_THREADS
+        options.inter_op_num_threads = 1
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        return ort.InferenceSession(str(path), sess_options=options, providers=["CPUExecutionProvider"])
+
+    def load(self, config: Dict[str, Any]):
+        try:
+            import onnxruntime  # noqa: F401
+        except ImportError:
+            raise Exception("ONNX推理后端需要安装onnxruntime")
+        from paddleocr import PaddleOCR
+        import tools.infer.utility as paddle_utility
+
+        lang = config["lang"]
+        paths = {stage: self.model_path(lang, stage) for stage in ("det", "rec", "cls")}
+
+        # PaddleOCR自己创建的ONNX会话使用默认线程配置（占满所有核），且不能传入会话参数。
+        # 构造期间替换预测器工厂函数，每个模型只创建一次按配置限制线程数的会话，
+        # 多工作进程时互不争抢
+        create_predictor = paddle_utility.create_predictor
+
+        def create_onnx_predictor(args, mode, log):
+            if not args.use_onnx:
+                return create_predictor(args, mode, log)
+            session = self._session(paths[mode])
+            return session, session.get_inputs()[0], None, None
+
+        with _predictor_lock:
+            paddle_utility.create_predictor = create_onnx_predictor
+            try:
+                return PaddleOCR(
+                    use_onnx=True,
+                    use_angle_cls=config["use_angle_cls"],
+                    lang=lang,
+                    use_gpu=False,
+                    det_model_dir=str(paths["det"]),
+                    rec_model_dir=str(paths["rec"]),
+                    cls_model_dir=str(paths["cls"]),
+                    rec_batch_num=settings.OCR_REC_BATCH_NUM,
+                    show_log=False
+                )
+            finally:
+                paddle_utility.create_predictor = create_predictor
+
+
+BACKENDS = {
+    PaddleBackend.name: PaddleBackend,
+    OnnxBackend.name: OnnxBackend,
+}
+
+
+def get_backend(name: str = None) -> OCRBackend:
+    """
+    获取推理后端
+
+    Args:
+        name: 后端名称，默认读取配置 OCR_BACKEND
+
+    Returns:
+        推理后端实例
+    """
+    name = name or settings.OCR_BACKEND
+    if name not in BACKENDS:
+        raise Exception(f"不支持的OCR推理后端: {name}")
+    return BACKENDS[name]()
@@ -0,0 +1,116 @@
+"""
+OCR动态批处理调度器
+
+并发到达的OCR请求在一个很短的时间窗口内按语言聚合成批，
+检测逐图执行、识别阶段把所有请求的文本行裁剪图合并成一批推理，
+最后把结果按请求拆分返回给各自的调用方。
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Set, Tuple
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# 批处理执行函数: (图片路径列表, 语言) -> 结果列表（元素为结果字典或异常）
+BatchRunner = Callable[[List[str], str], Awaitable[List[Any]]]
+
+batch_size_histogram = metrics.histogram(
+    "ocr_batch_size",
+    "每批合并的OCR请求数",
+    buckets=[1, 2, 4, 8, 16, 32, 64]
+)
+batch_wait_histogram = metrics.histogram(
+    "ocr_batch_wait_ms",
+    "OCR请求在批处理队列中的等待时间（毫秒）"
+)
+
+
+class OCRBatcher:
+    """OCR动态批处理调度器"""
+
+    def __init__(self, runner: BatchRunner, max_batch_size: int = None, max_wait_ms: float = None):
+        """
+        初始化调度器
+
+        Args:
+            runner: 批处理执行函数
+            max_batch_size: 每批最大请求数
+            max_wait_ms: 收集请求的最长等待时间（毫秒）
+        """
+        self.runner = runner
+        self.max_batch_size = max(1, max_batch_size or settings.OCR_BATCH_MAX_SIZE)
+        wait_ms = settings.OCR_BATCH_WAIT_MS if max_wait_ms is None else max_wait_ms
+        self.max_wait = max(0.0, wait_ms) / 1000
+        # 按语言分组的待处理请求: lang -> [(图片路径, future, 入队时间)]
+        self._pending: Dict[str, List[Tuple[str, asyncio.Future, float]]] = {}
+        self._timers: Dict[str, asyncio.TimerHandle] = {}
+        # 执行中的批次任务（事件循环只保留弱引用，需要持有强引用）
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def submit(self, image_path: str, lang: str = "ch") -> Dict[str, Any]:
+        """
+        提交一个OCR请求，等待所在批次完成
+
+        Args:
+            image_path: 图片路径
+            lang: 语言类型
+
+        Returns:
+            该请求自己的OCR结果
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        queue = self._pending.setdefault(lang, [])
+        queue.append((image_path, future, time.perf_counter()))
+
+        if len(queue) >= self.max_batch_size:
+            self._flush(lang)
+        elif lang not in self._timers:
+            self._timers[lang] = loop.call_later(self.max_wait, self._flush, lang)
+
+        return await future
+
+    def _flush(self, lang: str):
+        """取出当前批次并异步执行"""
+        timer = self._timers.pop(lang, None)
+        if timer is not None:
+            timer.cancel()
+
+        batch = self._pending.pop(lang, [])
+        if batch:
+            task = asyncio.ensure_future(self._run_batch(lang, batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+            task.add_done_callback(self._on_batch_done)
+
+    @staticmethod
+    def _on_batch_done(task: asyncio.Task):
+        """记录批次任务的意外失败（执行函数的异常已在批次内分发给各调用方）"""
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"OCR批处理任务异常: {task.exception()}")
+
+    async def _run_batch(self, lang: str, batch: List[Tuple[str, asyncio.Future, float]]):
+        """执行批次并把结果分发给各个调用方"""
+        started = time.perf_counter()
+        batch_size_histogram.observe(len(batch))
+        for _, _, enqueued in batch:
+            batch_wait_histogram.observe((started - enqueued) * 1000)
+
+        image_paths = [item[0] for item in batch]
+        try:
+            results = await self.runner(image_paths, lang)
+        except Exception as e:
+            logger.error(f"OCR批处理失败: {e}")
+            results = [e] * len(batch)
+
+        for (_, future, _), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
@@ -0,0 +1,277 @@
+"""
+OCR结果缓存 - 内存LRU + 磁盘两级缓存
+
+缓存键由图片文件内容（上传时计算的SHA-256）、语言和模型配置共同计算，
+同一张图片重复上传（客户端重试、重复扫描）时直接返回之前的识别结果。
+没有对应文件的已解码数组按像素数据计算。
+"""
+import copy
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# 结果格式变化时递增，使旧缓存失效
+CACHE_VERSION = 2
+
+# 计算文件哈希时每次读取的字节数
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+class OCRCache:
+    """OCR结果缓存"""
+
+    def __init__(
+        self,
+        memory_items: int = None,
+        disk_dir: Path = None,
+        disk_max_bytes: int = None
+    ):
+        """
+        初始化缓存
+
+        Args:
+            memory_items: 内存层最多缓存的结果数
+            disk_dir: 磁盘层目录
+            disk_max_bytes: 磁盘层最大占用字节数
+        """
+        self.memory_items = memory_items if memory_items is not None else settings.OCR_CACHE_MEMORY_ITEMS
+        self.disk_dir = Path(disk_dir or settings.OCR_CACHE_DIR)
+        if disk_max_bytes is None:
+            disk_max_bytes = settings.OCR_CACHE_DISK_MAX_MB * 1024 * 1024
+        self.disk_max_bytes = disk_max_bytes
+
+        self._memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_index: Optional[Dict[str, int]] = None  # 键 -> 文件大小（懒加载）
+        self._disk_bytes = 0
+
+        self.memory_hits = metrics.counter("ocr_cache_memory_hits", "OCR缓存内存层命中次数")
+        self.disk_hits = metrics.counter("ocr_cache_disk_hits", "OCR缓存磁盘层命中次数")
+        self.misses = metrics.counter("ocr_cache_misses", "OCR缓存未命中次数")
+
+    @staticmethod
+    def make_key(image_path: Union[str, np.ndarray], lang: str, model_config: Dict[str, Any]) -> str:
+        """
+        计算缓存键
+
+        图片路径按文件内容哈希计算（与 make_file_key 一致，不解码图片）；
+        已解码的数组没有对应的文件，按像素数据计算。
+
+        Args:
+            image_path: 图片路径，或已解码的RGB数组
+            lang: 语言类型
+            model_config: 影响识别结果的模型配置
+
+        Returns:
+            十六进制哈希
+        """
+        if not isinstance(image_path, np.ndarray):
+            return OCRCache.make_file_key(OCRCache.file_hash(image_path), lang, model_config)
+
+        digest = hashlib.sha256()
+        height, width = image_path.shape[:2]
+        mode = "RGB" if image_path.ndim == 3 else "L"
+        digest.update(f"{mode}:{(width, height)}".encode())
+        digest.update(np.ascontiguousarray(image_path).tobytes())
+        config = json.dumps(model_config, sort_keys=True)
+        digest.update(f"|{lang}|{config}|v{CACHE_VERSION}".encode())
+        return digest.hexdigest()
+
+    @staticmethod
+    def file_hash(path: str) -> str:
+        """
+        分块读取文件计算SHA-256（与上传时计算的内容哈希一致）
+
+        Args:
+            path: 文件路径
+
+        Returns:
+            十六进制哈希
+        """
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    @staticmethod
+    def make_file_key(content_hash: str, lang: str, model_config: Dict[str, Any]) -> str:
+        """
+        按上传文件的内容哈希计算缓存键（上传时已在写盘的同时算好，查询缓存不需要解码图片）
+
+        Args:
+            content_hash: 文件内容的SHA-256
+            lang: 语言类型
+            model_config: 影响识别结果的模型配置
+
+        Returns:
+            十六进制哈希
+        """
+        config = json.dumps(model_config, sort_keys=True)
+        return hashlib.sha256(f"file:{content_hash}|{lang}|{config}|v{CACHE_VERSION}".encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        查询缓存（先内存后磁盘）
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            命中时返回OCR结果，否则返回None
+        """
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.memory_hits.inc()
+                return copy.deepcopy(self._memory[key])
+
+        value = self._read_disk(key)
+        if value is not None:
+            self.disk_hits.inc()
+            self._put_memory(key, value)
+            return value
+
+        self.misses.inc()
+        return None
+
+    def set(self, key: str, value: Dict[str, Any]):
+        """
+        写入缓存（同时写内存和磁盘）
+
+        Args:
+            key: 缓存键
+            value: OCR结果
+        """
+        self._put_memory(key, value)
+        self._write_disk(key, value)
+
+    def _put_memory(self, key: str, value: Dict[str, Any]):
+        """写入内存层并按LRU淘汰"""
+        if self.memory_items <= 0:
+            return
+        with self._lock:
+            self._memory[key] = copy.deepcopy(value)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_items:
+                self._memory.popitem(last=False)
+
+    def _disk_path(self, key: str) -> Path:
+        """磁盘文件路径（按前两位分目录）"""
+        return self.disk_dir / key[:2] / f"{key}.json"
+
+    def _load_disk_index(self):
+        """扫描磁盘目录建立索引"""
+        if self._disk_index is not None:
+            return
+        self._disk_index = {}
+        self._disk_bytes = 0
+        if self.disk_dir.exists():
+            for path in self.disk_dir.glob("*/*.json"):
+                size = path.stat().st_size
+                self._disk_index[path.stem] = size
+                self._disk_bytes += size
+
+    def _read_disk(self, key: str) -> Optional[Dict[str, Any]]:
+        """读取磁盘层"""
+        if self.disk_max_bytes <= 0:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                value = json.load(f)
+            # 更新访问时间，淘汰时按最久未访问排序
+            os.utime(path)
+            return value
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"读取OCR缓存失败: {e}")
+            return None
+
+    def _write_disk(self, key: str, value: Dict[str, Any]):
+        """写入磁盘层并按总大小淘汰"""
+        if self.disk_max_bytes <= 0:
+            return
+        path = self._disk_path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            data = json.dumps(value, ensure_ascii=False).encode("utf-8")
+            # 先写临时文件再改名，避免并发读到半个文件
+            tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+
+            with self._lock:
+                self._load_disk_index()
+                self._disk_bytes += len(data) - self._disk_index.get(key, 0)
+                self._disk_index[key] = len(data)
+                if self._disk_bytes > self.disk_max_bytes:
+                    self._evict_disk()
+        except Exception as e:
+            logger.warning(f"写入OCR缓存失败: {e}")
+
+    def _evict_disk(self):
+        """淘汰最久未访问的磁盘缓存，直到低于上限的90%"""
+        target = self.disk_max_bytes * 0.9
+        entries = []
+        for key in self._disk_index:
+            try:
+                entries.append((self._disk_path(key).stat().st_mtime, key))
+            except FileNotFoundError:
+                entries.append((0, key))
+        entries.sort()
+
+        for _, key in entries:
+            if self._disk_bytes <= target:
+                break
+            try:
+                self._disk_path(key).unlink()
+            except FileNotFoundError:
+                pass
+            self._disk_bytes -= self._disk_index.pop(key)
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._memory.clear()
+            self._load_disk_index()
+            for key in list(self._disk_index):
+                try:
+                    self._disk_path(key).unlink()
+                except FileNotFoundError:
+                    pass
+            self._disk_index = {}
+            self._disk_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """缓存统计"""
+        with self._lock:
+            self._load_disk_index()
+        hits = self.memory_hits.value + self.disk_hits.value
+        total = hits + self.misses.value
+        return {
+            "memory_items": len(self._memory),
+            "disk_bytes": self._disk_bytes,
+            "memory_hits": self.memory_hits.value,
+            "disk_hits": self.disk_hits.value,
+            "misses": self.misses.value,
+            "hit_rate": round(hits / total, 4) if total else 0
+        }
+
+
+# 进程级单例
+ocr_cache = OCRCache()
@@ -0,0 +1,356 @@
+"""
+OCR执行引擎 - 独立工作进程池
+
+PaddleOCR推理是CPU密集的同步调用，直接在路由中执行会阻塞整个事件循环。
+引擎维护一组工作进程，每个进程启动时加载一次模型，之后的识别任务
+以可等待的Future形式返回给调用方。
+"""
+import asyncio
+import functools
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _init_worker(langs: List[str], threads: int, warmup: bool):
+    """工作进程初始化：限制推理线程数，预加载并预热模型"""
+    # 必须在导入paddle之前设置，避免每个进程都占满所有核
+    for name in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[name] = str(threads)
+
+    from app.services.ocr_registry import ocr_registry
+
+    ocr_registry.preload(langs, warmup)
+    logger.info(f"OCR工作进程就绪: pid={os.getpid()}, langs={langs}")
+
+
+def _worker_ping(langs: List[str], warmup: bool) -> Dict[str, Any]:
+    """
+    状态查询任务，用于拉起工作进程，返回该进程的模型注册表状态
+
+    启动时加载或预热失败的模型在这里重试，已就绪的模型直接跳过。
+    """
+    from app.services.ocr_registry import ocr_registry
+
+    ocr_registry.preload(langs, warmup)
+    return ocr_registry.stats()
+
+
+def _worker_ocr_image(image_path: str, lang: str) -> Dict[str, Any]:
+    """在工作进程中执行OCR"""
+    from app.services.ocr_service import ocr_service
+
+    return ocr_service.ocr_image_sync(image_path, lang)
+
+
+def _worker_ocr_tiles(tiles: List[Any], image_path: str, lang: str) -> List[Any]:
+    """在工作进程中解码图片并识别其中一段图块（分块OCR）"""
+    from app.services.ocr_service import ocr_service
+
+    return ocr_service.ocr_tiles_sync(tiles, image_path, lang)
+
+
+def _worker_ocr_regions(image_path: str, regions: List[Dict[str, Any]], lang: str) -> Dict[str, Any]:
+    """在工作进程中执行区域OCR"""
+    from app.services.ocr_service import ocr_service
+
+    return ocr_service.ocr_regions_sync(image_path, regions, lang)
+
+
+def _worker_ocr_images_batch(image_paths: List[str], lang: str) -> List[Any]:
+    """在工作进程中执行批量OCR"""
+    from app.services.ocr_service import ocr_service
+
+    return ocr_service.ocr_images_batch_sync(image_paths, lang)
+
+
+class OCREngine:
+    """OCR执行引擎"""
+
+    def __init__(self, workers: int = None, threads: int = None):
+        """
+        初始化OCR执行引擎
+
+        Args:
+            workers: 工作进程数，默认读取配置（0表示按CPU核数计算）
+            threads: 每个工作进程的推理线程数
+        """
+        self.threads = max(1, threads or settings.OCR_WORKER_THREADS)
+        workers = workers if workers is not None else settings.OCR_WORKERS
+        if workers <= 0:
+            workers = max(1, (os.cpu_count() or 1) // self.threads)
+        self.workers = workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._langs: List[str] = []
+        self._warmup = True
+        self.restarts = 0
+        # 已启动的工作进程: pid -> 该进程的模型注册表状态
+        self._worker_models: Dict[int, Dict[str, Any]] = {}
+        self._pending_pings = 0
+        self._state_lock = threading.Lock()
+        self._started_at = 0.0
+        self.warmup_seconds: Optional[float] = None
+
+    @property
+    def running(self) -> bool:
+        """引擎是否已启动"""
+        return self._executor is not None
+
+    @property
+    def ready(self) -> bool:
+        """所有工作进程都已启动，且各自的模型都已预热完成（未启用预热时加载完成即可）"""
+        if not self.running or len(self._worker_models) < self.workers:
+            return False
+        return all(
+            model["ready"] or (not self._warmup and model["loaded"])
+            for stats in self._worker_models.values()
+            for model in stats["models"]
+        )
+
+    @property
+    def starting(self) -> bool:
+        """是否还有工作进程在启动中"""
+        return self.running and self._pending_pings > 0
+
+    def start(self, langs: List[str] = None):
+        """
+        启动工作进程池
+
+        Args:
+            langs: 每个工作进程启动时预加载的语言模型，默认为 OCR_LANG_DEFAULT，空列表表示不预加载
+        """
+        if self.running:
+            return
+
+        langs = [settings.OCR_LANG_DEFAULT] if langs is None else list(langs)
+        self._langs = langs
+        self._warmup = settings.OCR_WARMUP_ENABLED
+        self._started_at = time.perf_counter()
+        self.warmup_seconds = None
+        logger.info(f"启动OCR工作进程池: workers={self.workers}, threads={self.threads}")
+
+        # 使用spawn避免fork继承父进程中的线程和模型状态
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(langs, self.threads, self._warmup)
+        )
+        self._worker_models = {}
+        self._pending_pings = 0
+
+        # 同时提交与进程数相同的状态查询任务，让所有进程在启动阶段就加载模型
+        for _ in range(self.workers):
+            self._ping()
+
+    def _ping(self):
+        """提交一个状态查询任务，结果用于登记工作进程状态"""
+        with self._state_lock:
+            self._pending_pings += 1
+        future = self._executor.submit(_worker_ping, self._langs, self._warmup)
+        future.add_done_callback(functools.partial(self._on_worker_ready, self._executor))
+
+    def _on_worker_ready(self, executor: ProcessPoolExecutor, future):
+        """工作进程启动回调（已关闭或重建前的进程池的回调忽略）"""
+        with self._state_lock:
+            if executor is not self._executor:
+                return
+            self._pending_pings -= 1
+        if future.cancelled():
+            return
+        if future.exception() is not None:
+            logger.error(f"OCR工作进程启动失败: {future.exception()}")
+            return
+
+        stats = future.result()
+        known = stats["pid"] in self._worker_models
+        self._worker_models[stats["pid"]] = stats
+
+        if self.ready and self.warmup_seconds is None:
+            self.warmup_seconds = time.perf_counter() - self._started_at
+            logger.info(f"OCR工作进程池预热完成，耗时{self.warmup_seconds:.2f}秒")
+        elif known and len(self._worker_models) < self.workers:
+            # 先启动完的进程可能抢到多个查询任务，为尚未登记的进程补发
+            self._ping()
+
+    def refresh(self):
+        """
+        重新查询各工作进程的模型状态（就绪检查时调用）
+
+        启动阶段的状态只在进程启动时上报一次，预热失败的进程之后不会自动更新。
+        未就绪且没有进行中的查询时，按进程数提交状态查询任务，工作进程会重试加载或预热。
+        """
+        if not self.running or self.starting or self.ready:
+            return
+        for _ in range(self.workers):
+            self._ping()
+
+    async def wait_ready(self, poll_interval: float = 0.1) -> bool:
+        """
+        等待工作进程池启动完成
+
+        Returns:
+            是否全部就绪
+        """
+        while self.starting and not self.ready:
+            await asyncio.sleep(poll_interval)
+        return self.ready
+
+    def shutdown(self):
+        """关闭工作进程池"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            self._worker_models = {}
+            logger.info("OCR工作进程池已关闭")
+
+    def _restart(self, broken: ProcessPoolExecutor):
+        """工作进程异常退出后重建进程池（并发失败的任务只重建一次）"""
+        with self._state_lock:
+            if self._executor is not broken:
+                return
+            self._executor = None
+            self.restarts += 1
+        broken.shutdown(wait=False, cancel_futures=True)
+        logger.error("OCR工作进程异常退出，重建工作进程池")
+        self.start(self._langs)
+
+    async def submit(self, fn, *args) -> Any:
+        """
+        提交任务到工作进程池
+
+        工作进程异常退出（崩溃、被OOM终止）时进程池不可再用，重建进程池后
+        本次任务返回错误，之后的任务在新的进程池中执行。
+
+        Args:
+            fn: 模块级函数（需可pickle）
+            *args: 函数参数
+
+        Returns:
+            函数返回值
+        """
+        executor = self._executor
+        if executor is None:
+            raise RuntimeError("OCR工作进程池未启动")
+
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(executor, fn, *args)
+        except BrokenProcessPool as e:
+            self._restart(executor)
+            raise Exception(f"OCR工作进程异常退出: {str(e)}")
+
+    async def ocr_image(self, image_path: str, lang: str = "ch") -> Dict[str, Any]:
+        """
+        在工作进程中执行OCR
+
+        Args:
+            image_path: 图片路径
+            lang: 语言类型
+
+        Returns:
+            OCR识别结果
+        """
+        return await self.submit(_worker_ocr_image, image_path, lang)
+
+
+    async def ocr_regions(self, image_path: str, regions: List[Dict[str, Any]], lang: str = "ch") -> Dict[str, Any]:
+        """
+        在工作进程中执行区域OCR
+
+        Args:
+            image_path: 图片路径
+            regions: 区域列表
+            lang: 语言类型
+
+        Returns:
+            各区域的识别结果
+        """
+        return await self.submit(_worker_ocr_regions, image_path, regions, lang)
+
+    async def map_chunks(self, fn, items: List[Any], *args) -> List[Any]:
+        """
+        把一批输入按工作进程数拆成连续的若干段，各段并行提交到不同的工作进程
+
+        Args:
+            fn: 模块级函数，fn(一段输入, *args) 返回与该段一一对应的结果列表
+            items: 输入列表
+            *args: 函数的其它参数
+
+        Returns:
+            与输入一一对应的结果列表（某一段执行失败时，该段的每个输入对应异常对象）
+        """
+        count = min(self.workers, len(items))
+        if count == 0:
+            return []
+        size, extra = divmod(len(items), count)
+        chunks = []
+        start = 0
+        for i in range(count):
+            end = start + size + (1 if i < extra else 0)
+            chunks.append(items[start:end])
+            start = end
+
+        chunk_results = await asyncio.gather(
+            *[self.submit(fn, chunk, *args) for chunk in chunks],
+            return_exceptions=True
+        )
+        results = []
+        for chunk, result in zip(chunks, chunk_results):
+            results.extend([result] * len(chunk) if isinstance(result, Exception) else result)
+        return results
+
+    async def ocr_images_batch(self, image_paths: List[str], lang: str = "ch") -> List[Any]:
+        """
+        执行一批OCR：按工作进程数拆分后并行识别，每个进程内的图片合并成一批推理
+
+        Args:
+            image_paths: 图片路径列表
+            lang: 语言类型
+
+        Returns:
+            结果列表（失败的图片对应异常对象）
+        """
+        return await self.map_chunks(_worker_ocr_images_batch, image_paths, lang)
+
+    async def ocr_tiles(self, image_path: str, tiles: List[Any], lang: str = "ch") -> List[Any]:
+        """
+        分块OCR：图块按工作进程数拆成连续的若干段，各进程解码一次图片并识别自己那一段
+
+        只传输图片路径和图块坐标，不传输像素数据。
+
+        Args:
+            image_path: 图片路径
+            tiles: 图块列表 [(x0, y0, x1, y1)]
+            lang: 语言类型
+
+        Returns:
+            与图块一一对应的 {"lines": 文本行列表, "_counts": 自适应识别的计数}（失败的图块对应异常对象）
+        """
+        return await self.map_chunks(_worker_ocr_tiles, tiles, image_path, lang)
+
+    def stats(self) -> Dict[str, Any]:
+        """引擎状态"""
+        return {
+            "running": self.running,
+            "workers": self.workers,
+            "ready": self.ready,
+            "started_workers": len(self._worker_models),
+            "warmup_seconds": round(self.warmup_seconds, 3) if self.warmup_seconds is not None else None,
+            "threads_per_worker": self.threads,
+            "restarts": self.restarts,
+            "worker_models": list(self._worker_models.values())
+        }
+
+
+# 进程级单例
+ocr_engine = OCREngine()
@@ -0,0 +1,260 @@
+"""
+OCR模型注册表 - 进程内共享的PaddleOCR模型
+
+各路由和服务不再各自持有模型实例，统一从注册表获取。
+注册表按模型的实际配置去重（例如 ch 与 ch_en 使用同一个中文模型），
+并记录已加载的模型及其内存占用。
+"""
+import json
+import logging
+import os
+import resource
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from app.core.config import settings
+from app.services.ocr_backends import get_backend
+
+logger = logging.getLogger(__name__)
+
+
+def current_rss() -> int:
+    """当前进程的常驻内存（字节）"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        # 非Linux平台退化为峰值内存
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def warmup_langs() -> List[str]:
+    """启动时需要预热的语言（默认语言 + 额外配置的语言，去重）"""
+    langs = [settings.OCR_LANG_DEFAULT] + list(settings.OCR_WARMUP_LANGS)
+    return list(dict.fromkeys(langs))
+
+
+def _synthetic_image() -> np.ndarray:
+    """生成带文字的合成图片，用于预热推理"""
+    image = Image.new("RGB", (320, 96), "white")
+    draw = ImageDraw.Draw(image)
+    draw.text((16, 20), "ScanMaster 2026", fill="black")
+    draw.text((16, 56), "OCR warmup 0123456789", fill="black")
+    return np.array(image)
+
+
+class _ModelEntry:
+    """注册表条目"""
+
+    def __init__(self, config: Dict[str, Any]):
+        self.config = config
+        self.model = None
+        self.langs = set()
+        self.load_seconds = 0.0
+        self.memory_bytes = 0
+        self.ready = False  # 完成预热或成功识别过一次
+        self.warmup_seconds = 0.0
+        self.error: Optional[str] = None
+        # 加载锁与推理锁分开：PaddleOCR预测器不是线程安全的
+        self.load_lock = threading.Lock()
+        self.infer_lock = threading.Lock()
+
+
+class OCRModelRegistry:
+    """OCR模型注册表"""
+
+    def __init__(self):
+        self._entries: Dict[str, _ModelEntry] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def model_config(lang: str) -> Dict[str, Any]:
+        """
+        语言对应的实际模型配置
+
+        Args:
+            lang: 语言类型 (ch/en/ch_en)
+
+        Returns:
+            决定模型权重和识别结果的配置
+        """
+        return {
+            # PaddleOCR的中文模型本身支持中英文混排，ch_en 与 ch 共用
+            "lang": "en" if lang == "en" else "ch",
+            "use_angle_cls": True,
+            # 不同推理后端和精度的识别结果可能不同
+            **get_backend().describe()
+        }
+
+    @staticmethod
+    def _config_key(config: Dict[str, Any]) -> str:
+        return json.dumps(config, sort_keys=True)
+
+    def _entry(self, lang: str) -> _ModelEntry:
+        """获取（必要时创建）语言对应的条目"""
+        config = self.model_config(lang)
+        key = self._config_key(config)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = _ModelEntry(config)
+            entry.langs.add(lang)
+            return entry
+
+    def _load(self, config: Dict[str, Any]):
+        """按配置的推理后端创建OCR模型"""
+        return get_backend(config["backend"]).load(config)
+
+    def get(self, lang: str):
+        """
+        获取OCR模型（首次调用时加载）
+
+        Args:
+            lang: 语言类型
+
+        Returns:
+            PaddleOCR实例，加载失败返回None
+        """
+        entry = self._entry(lang)
+        if entry.model is not None:
+            return entry.model
+
+        with entry.load_lock:
+            if entry.model is None:
+                logger.info(f"初始化OCR模型: {entry.config}")
+                rss_before = current_rss()
+                started = time.perf_counter()
+                try:
+                    entry.model = self._load(entry.config)
+                    entry.error = None
+                    entry.load_seconds = time.perf_counter() - started
+                    entry.memory_bytes = max(0, current_rss() - rss_before)
+                    logger.info(
+                        f"OCR模型初始化成功: {entry.config}, "
+                        f"耗时{entry.load_seconds:.2f}秒, 内存{entry.memory_bytes / 1024 / 1024:.1f}MB"
+                    )
+                except Exception as e:
+                    entry.error = str(e)
+                    logger.error(f"OCR模型初始化失败: {e}")
+
+        return entry.model
+
+    def lock(self, lang: str) -> threading.Lock:
+        """语言对应模型的推理锁"""
+        return self._entry(lang).infer_lock
+
+    def mark_ready(self, lang: str):
+        """标记模型已可用（成功完成过一次推理）"""
+        self._entry(lang).ready = True
+
+    def is_ready(self, langs: List[str], warmup: bool = None) -> bool:
+        """
+        指定语言的模型是否都已就绪
+
+        Args:
+            langs: 语言列表
+            warmup: 是否要求完成预热，默认读取配置；不要求预热时模型加载完成即视为就绪
+
+        Returns:
+            是否全部就绪
+        """
+        warmup = settings.OCR_WARMUP_ENABLED if warmup is None else warmup
+        entries = [self._entry(lang) for lang in langs]
+        return all(entry.ready or (not warmup and entry.model is not None) for entry in entries)
+
+    def warmup(self, lang: str) -> bool:
+        """
+        预热模型：加载并用合成图片跑一次完整推理，
+        让推理引擎完成初始化和内存分配
+
+        Args:
+            lang: 语言类型
+
+        Returns:
+            是否预热成功
+        """
+        entry = self._entry(lang)
+        if entry.ready:
+            return True
+
+        started = time.perf_counter()
+        model = self.get(lang)
+        if model is None:
+            return False
+
+        try:
+            with entry.infer_lock:
+                model.ocr(_synthetic_image(), cls=entry.config["use_angle_cls"])
+            entry.ready = True
+            entry.warmup_seconds = time.perf_counter() - started
+            logger.info(f"OCR模型预热完成: {entry.config}, 耗时{entry.warmup_seconds:.2f}秒")
+            return True
+        except Exception as e:
+            entry.error = str(e)
+            logger.error(f"OCR模型预热失败: {e}")
+            return False
+
+    def warmup_all(self, langs: List[str] = None) -> bool:
+        """
+        预热多个语言的模型
+
+        Args:
+            langs: 语言列表，默认读取配置
+
+        Returns:
+            是否全部预热成功
+        """
+        results = [self.warmup(lang) for lang in (langs or warmup_langs())]
+        return all(results)
+
+    def preload(self, langs: List[str], warmup: bool = None) -> bool:
+        """
+        预加载模型，要求预热时同时预热（已就绪的模型直接跳过，之前失败的重新尝试）
+
+        Args:
+            langs: 语言列表
+            warmup: 是否预热，默认读取配置
+
+        Returns:
+            是否全部就绪
+        """
+        warmup = settings.OCR_WARMUP_ENABLED if warmup is None else warmup
+        for lang in langs:
+            if warmup:
+                self.warmup(lang)
+            else:
+                self.get(lang)
+        return self.is_ready(langs, warmup)
+
+    def stats(self) -> Dict[str, Any]:
+        """已加载模型与内存占用"""
+        with self._lock:
+            entries = list(self._entries.values())
+
+        models = [
+            {
+                "config": entry.config,
+                "langs": sorted(entry.langs),
+                "loaded": entry.model is not None,
+                "ready": entry.ready,
+                "load_seconds": round(entry.load_seconds, 3),
+                "warmup_seconds": round(entry.warmup_seconds, 3),
+                "memory_bytes": entry.memory_bytes,
+                "error": entry.error
+            }
+            for entry in entries
+        ]
+        return {
+            "pid": os.getpid(),
+            "models": models,
+            "models_memory_bytes": sum(m["memory_bytes"] for m in models),
+            "process_rss_bytes": current_rss()
+        }
+
+
+# 进程级单例
+ocr_registry = OCRModelRegistry()
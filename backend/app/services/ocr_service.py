@@ -1,144 +1,771 @@
 """
 OCR服务 - 基于PaddleOCR
 """
+import asyncio
+import copy
 import logging
-from typing import Dict, Any, List
-from paddleocr import PaddleOCR
+import time
+from typing import Dict, Any, List, Optional, Union
+from paddleocr.tools.infer.predict_system import sorted_boxes
+from paddleocr.tools.infer.utility import get_rotate_crop_image
+import cv2
 import numpy as np
 from PIL import Image
 
+from app.core.config import settings
+from app.core.metrics import StageTimings, metrics, request_timings
+from app.services.image_service import decode_image, image_size
+from app.services.ocr_adaptive import adaptive_scale, estimate_text_height
+from app.services.ocr_batcher import OCRBatcher
+from app.services.ocr_cache import ocr_cache
+from app.services.ocr_engine import ocr_engine
+from app.services.ocr_registry import ocr_registry, warmup_langs
+from app.services.ocr_tiling import make_tiles, merge_tile_lines, should_tile
+
 logger = logging.getLogger(__name__)
 
+# 图片路径或已解码的RGB数组
+ImageSource = Union[str, np.ndarray]
+
 
 class OCRService:
     """OCR服务"""
 
     def __init__(self):
         """初始化OCR服务"""
-        self.ocr_ch = None  # 中文OCR
-        self.ocr_en = None  # 英文OCR
-        self.ocr_ch_en = None  # 中英文OCR
-        self._ready = False
+        self.warmup_seconds: Optional[float] = None
+        self._warmup_task: Optional[asyncio.Task] = None
+        # 并发请求的动态批处理
+        self._batcher = OCRBatcher(self._run_batch)
+        self._downscaled = metrics.counter("ocr_adaptive_downscaled_images", "缩小分辨率识别的图片数")
+        self._second_pass = metrics.counter("ocr_adaptive_second_pass_lines", "回原图分辨率重新识别的文本行数")
 
     def is_ready(self) -> bool:
-        """检查OCR服务是否就绪"""
-        return self._ready
+        """
+        检查OCR服务是否就绪（需要预热的模型都已可用，未启用预热时加载完成即可）
 
-    def _init_ocr(self, lang: str):
-        """初始化指定语言的OCR模型"""
-        logger.info(f"初始化OCR模型: {lang}")
+        未就绪时在后台重试：工作进程池重新查询各进程的状态，
+        否则重新执行预热，避免启动时的一次失败导致一直不就绪。
+        """
+        if ocr_engine.running:
+            ready = ocr_engine.ready
+            if not ready:
+                ocr_engine.refresh()
+            return ready
+
+        ready = ocr_registry.is_ready(warmup_langs())
+        if not ready:
+            self.start_warmup()
+        return ready
 
+    def start_warmup(self):
+        """在后台执行预热（已有预热在进行时不重复启动，需要在事件循环中调用）"""
+        if self._warmup_task is not None and not self._warmup_task.done():
+            return
         try:
-            if lang == "ch":
-                # 中文OCR
-                ocr = PaddleOCR(
-                    use_angle_cls=True,
-                    lang="ch",
-                    use_gpu=True,
-                    show_log=False
-                )
-            elif lang == "en":
-                # 英文OCR
-                ocr = PaddleOCR(
-                    use_angle_cls=True,
-                    lang="en",
-                    use_gpu=True,
-                    show_log=False
-                )
-            else:  # ch_en
-                # 中英文OCR
-                ocr = PaddleOCR(
-                    use_angle_cls=True,
-                    lang="ch",
-                    use_gpu=True,
-                    show_log=False
-                )
+            self._warmup_task = asyncio.get_running_loop().create_task(self.warmup())
+        except RuntimeError:
+            # 不在事件循环中（同步调用），由下一次就绪检查启动
+            pass
+
+    async def warmup(self, langs: List[str] = None) -> bool:
+        """
+        启动预热：预加载配置的语言模型，启用预热时用合成图片推理一次
 
-            logger.info(f"OCR模型初始化成功: {lang}")
-            return ocr
+        工作进程池已启动时等待各工作进程完成预热（在进程初始化时进行），
+        否则在线程池中预热本进程的模型。
 
-        except Exception as e:
-            logger.error(f"OCR模型初始化失败: {e}")
-            return None
+        Args:
+            langs: 语言列表，默认为 OCR_LANG_DEFAULT + OCR_WARMUP_LANGS
+
+        Returns:
+            是否预热成功
+        """
+        started = time.perf_counter()
+        if ocr_engine.running:
+            ready = await ocr_engine.wait_ready()
+        else:
+            loop = asyncio.get_running_loop()
+            ready = await loop.run_in_executor(None, ocr_registry.preload, langs or warmup_langs())
+
+        if ready:
+            self.warmup_seconds = time.perf_counter() - started
+            logger.info(f"OCR预热完成，耗时{self.warmup_seconds:.2f}秒")
+        else:
+            logger.error("OCR预热失败，服务将在首次请求时重试加载模型")
+        return ready
+
+    def warmup_status(self) -> Dict[str, Any]:
+        """预热状态"""
+        return {
+            "langs": warmup_langs(),
+            "ready": self.is_ready(),
+            "seconds": round(self.warmup_seconds, 3) if self.warmup_seconds is not None else None
+        }
+
+    def model_config(self, lang: str) -> Dict[str, Any]:
+        """影响识别结果的模型配置（用于缓存键）"""
+        return ocr_registry.model_config(lang)
 
     def _get_ocr_model(self, lang: str):
-        """获取OCR模型（懒加载）"""
-        if lang == "ch":
-            if self.ocr_ch is None:
-                self.ocr_ch = self._init_ocr("ch")
-            return self.ocr_ch
-        elif lang == "en":
-            if self.ocr_en is None:
-                self.ocr_en = self._init_ocr("en")
-            return self.ocr_en
-        else:  # ch_en
-            if self.ocr_ch_en is None:
-                self.ocr_ch_en = self._init_ocr("ch_en")
-            return self.ocr_ch_en
-
-    async def ocr_image(self, image_path: str, lang: str = "ch") -> Dict[str, Any]:
+        """获取OCR模型（从进程内共享的注册表懒加载）"""
+        return ocr_registry.get(lang)
+
+    def _adaptive_scale(self, image: np.ndarray) -> float:
+        """第一遍识别的缩放比例（未启用自适应或无法估计文字高度时为1）"""
+        if not settings.OCR_ADAPTIVE_ENABLED:
+            return 1.0
+        height, width = image.shape[:2]
+        return adaptive_scale(
+            width, height, estimate_text_height(image),
+            settings.OCR_ADAPTIVE_TARGET_TEXT_HEIGHT, settings.OCR_ADAPTIVE_MIN_SIDE
+        )
+
+    @staticmethod
+    def _classify_recognize(ocr, crops: list, timings: List[StageTimings], prefix: str = "") -> List[tuple]:
+        """文本行裁剪图的方向分类和识别，耗时计入各相关请求"""
+        if not crops:
+            return []
+        if ocr.use_angle_cls:
+            started = time.perf_counter()
+            crops, _, _ = ocr.text_classifier(crops)
+            for timing in timings:
+                timing.add(f"{prefix}cls", (time.perf_counter() - started) * 1000)
+        started = time.perf_counter()
+        rec_res, _ = ocr.text_recognizer(crops)
+        for timing in timings:
+            timing.add(f"{prefix}rec", (time.perf_counter() - started) * 1000)
+        return rec_res
+
+    def _recognize(
+        self,
+        ocr,
+        images: List[np.ndarray],
+        timings: List[StageTimings] = None,
+        counts: List[Dict[str, int]] = None
+    ) -> List[Any]:
         """
-        OCR文字识别
+        检测和识别多张图片（调用方需持有模型推理锁）
+
+        每张图片按估计的文字高度缩小后检测并裁剪文本行，所有图片的文本行
+        合并成一批分类和识别；缩小过的图片中置信度低于阈值的文本行，
+        再从原图裁剪重新识别，取置信度较高的结果。
 
         Args:
-            image_path: 图片路径
-            lang: 语言类型 (ch/en/ch_en)
+            ocr: PaddleOCR实例
+            images: RGB图片数组列表
+            timings: 与图片一一对应的阶段计时（批量识别的分类和识别耗时计入每张图片）
+            counts: 与图片一一对应的计数，记录是否缩小识别（downscaled）和回原图重识别的行数（second_pass）；
+                识别可能在工作进程中执行，计数随结果返回，由API进程记入计数器
 
         Returns:
-            OCR识别结果
+            与输入一一对应的文本行列表，失败的图片对应一个异常对象
         """
-        try:
+        timings = timings or [StageTimings() for _ in images]
+        counts = counts if counts is not None else [{} for _ in images]
+        results: List[Any] = [None] * len(images)
+        image_boxes: Dict[int, list] = {}
+        scales: Dict[int, float] = {}
+        crops = []
+        owners = []
+
+        # 逐图检测并裁剪文本行
+        for i, image in enumerate(images):
+            try:
+                with timings[i].stage("det"):
+                    scale = self._adaptive_scale(image)
+                    det_image = image
+                    if scale < 1.0:
+                        det_image = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+                        counts[i]["downscaled"] = 1
+                    dt_boxes, _ = ocr.text_detector(det_image)
+                    boxes = sorted_boxes(dt_boxes) if dt_boxes is not None and len(dt_boxes) else []
+                    image_crops = [get_rotate_crop_image(det_image, copy.deepcopy(box)) for box in boxes]
+                # 检测框换算回原图坐标
+                image_boxes[i] = [(box / scale).astype(np.float32) for box in boxes]
+                scales[i] = scale
+                # 整张图片检测和裁剪都成功后才加入批次，失败的图片不留下文本行
+                crops.extend(image_crops)
+                owners.extend([i] * len(image_crops))
+            except Exception as e:
+                logger.error(f"OCR识别失败: {e}")
+                results[i] = Exception(f"OCR识别失败: {str(e)}")
+
+        # 所有图片的文本行合并成一批分类和识别
+        batch_timings = [timings[i] for i in image_boxes]
+        rec_res = list(self._classify_recognize(ocr, crops, batch_timings))
+
+        # 拆分结果，并记下需要在原图分辨率下重新识别的文本行
+        lines: Dict[int, list] = {i: [] for i in image_boxes}
+        box_index = {i: 0 for i in image_boxes}
+        retry = []
+        for j, owner in enumerate(owners):
+            box = image_boxes[owner][box_index[owner]]
+            box_index[owner] += 1
+            lines[owner].append(box)
+            if scales[owner] < 1.0 and rec_res[j][1] < settings.OCR_ADAPTIVE_CONFIDENCE:
+                retry.append((j, owner, box))
+
+        if retry:
+            for _, owner, _ in retry:
+                counts[owner]["second_pass"] = counts[owner].get("second_pass", 0) + 1
+            recrops = [get_rotate_crop_image(images[owner], copy.deepcopy(box)) for _, owner, box in retry]
+            retry_timings = [timings[i] for i in sorted({owner for _, owner, _ in retry})]
+            for (j, _, _), res in zip(retry, self._classify_recognize(ocr, recrops, retry_timings, "rescan_")):
+                if res[1] > rec_res[j][1]:
+                    rec_res[j] = res
+
+        # 过滤低置信度的文本行
+        offset = 0
+        for i in sorted(lines):
+            image_lines = []
+            for box in lines[i]:
+                text, score = rec_res[offset]
+                offset += 1
+                if score >= ocr.drop_score:
+                    image_lines.append((box.tolist(), text, float(score)))
+            results[i] = image_lines
+
+        return results
+
+    def ocr_lines_sync(
+        self,
+        image: np.ndarray,
+        lang: str = "ch",
+        timings: StageTimings = None,
+        counts: Dict[str, int] = None
+    ) -> List[tuple]:
+        """
+        识别已解码的图片（同步执行）
+
+        Args:
+            image: RGB图片数组
+            lang: 语言类型
+            timings: 阶段计时
+            counts: 自适应识别的计数（见 _recognize）
+
+        Returns:
+            文本行列表 [(四点坐标, 文本, 置信度)]
+        """
+        with ocr_registry.lock(lang):
             # 懒加载模型
             ocr = self._get_ocr_model(lang)
             if ocr is None:
                 raise Exception("OCR模型初始化失败")
 
+            # 检测、方向分类、识别（自适应分辨率时低置信度行回原图重识别）
+            lines = self._recognize(
+                ocr, [image], [timings or StageTimings()], [counts if counts is not None else {}]
+            )[0]
+            if isinstance(lines, Exception):
+                raise lines
+
+        ocr_registry.mark_ready(lang)
+        return lines
+
+    def ocr_tiles_sync(self, tiles: List[tuple], image_path: str, lang: str = "ch") -> List[Any]:
+        """
+        识别同一张图片的若干图块（同步执行，供工作进程或线程池调用）
+
+        图片在执行识别的进程内解码，裁出这些图块后即释放整图；
+        所有图块的文本行合并成一批分类和识别。
+
+        Args:
+            tiles: 图块列表 [(x0, y0, x1, y1)]
+            image_path: 图片路径
+            lang: 语言类型
+
+        Returns:
+            与图块一一对应的 {"lines": 文本行列表, "_counts": 自适应识别的计数}，失败的图块对应一个异常对象
+        """
+        counts: List[Dict[str, int]] = [{} for _ in tiles]
+        try:
+            image = self._load_image(image_path)
+            crops = [np.ascontiguousarray(image[y0:y1, x0:x1]) for x0, y0, x1, y1 in tiles]
+            del image
+
+            with ocr_registry.lock(lang):
+                ocr = self._get_ocr_model(lang)
+                if ocr is None:
+                    raise Exception("OCR模型初始化失败")
+                recognized = self._recognize(ocr, crops, counts=counts)
+
+        except Exception as e:
+            logger.error(f"OCR识别失败: {e}")
+            return [Exception(f"OCR识别失败: {str(e)}")] * len(tiles)
+
+        ocr_registry.mark_ready(lang)
+        return [
+            lines if isinstance(lines, Exception) else {"lines": lines, "_counts": tile_counts}
+            for lines, tile_counts in zip(recognized, counts)
+        ]
+
+    @staticmethod
+    def _load_image(image: ImageSource) -> np.ndarray:
+        """读取图片为RGB数组（已解码的RGB数组直接返回，灰度数组扩展为三通道）"""
+        if isinstance(image, np.ndarray):
+            if image.ndim == 2:
+                return cv2.cvtColor(image, cv2.COLOR_GRAY2RGB)
+            return image
+        return decode_image(image)
+
+    @classmethod
+    def empty_result(cls) -> Dict[str, Any]:
+        """没有文字的识别结果（空白页等跳过识别的图片）"""
+        return cls._build_result([])
+
+    @classmethod
+    def result_from_lines(cls, lines: List[tuple]) -> Dict[str, Any]:
+        """
+        文本行组装为识别结果（PDF文字层等不经过OCR得到的文字）
+
+        Args:
+            lines: [(四点框, 文本, 置信度)]
+
+        Returns:
+            与OCR结果格式相同的字典
+        """
+        return cls._build_result(lines)
+
+    @staticmethod
+    def _build_result(lines: List[tuple]) -> Dict[str, Any]:
+        """文本行组装为接口返回格式"""
+        texts = [text for _, text, _ in lines]
+        return {
+            "text": "\n".join(texts),
+            "texts": texts,
+            "positions": [box for box, _, _ in lines],
+            "confidences": [round(score, 4) for _, _, score in lines],
+            "count": len(texts)
+        }
+
+    def ocr_image_sync(self, image_path: str, lang: str = "ch") -> Dict[str, Any]:
+        """
+        OCR文字识别（同步执行，供工作进程或线程池调用）
+
+        Args:
+            image_path: 图片路径
+            lang: 语言类型 (ch/en/ch_en)
+
+        Returns:
+            OCR识别结果
+        """
+        try:
+            timings = StageTimings()
+            counts: Dict[str, int] = {}
+
             # 读取图片
-            image = np.array(Image.open(image_path))
+            with timings.stage("decode"):
+                image = self._load_image(image_path)
+
+            lines = self.ocr_lines_sync(image, lang, timings, counts)
+
+            with timings.stage("serialize"):
+                result = self._build_result(lines)
+            result["_timings"] = timings.as_dict()
+            result["_counts"] = counts
+            return result
+
+        except Exception as e:
+            logger.error(f"OCR识别失败: {e}")
+            raise Exception(f"OCR识别失败: {str(e)}")
+
+    def ocr_images_batch_sync(self, image_paths: List[str], lang: str = "ch") -> List[Any]:
+        """
+        批量OCR识别（同步执行）
+
+        逐图做文字检测，再把所有图片的文本行裁剪图合并成一批做方向分类和识别。
+
+        Args:
+            image_paths: 图片路径列表
+            lang: 语言类型
+
+        Returns:
+            与输入一一对应的结果列表，失败的图片对应一个异常对象
+        """
+        # 单张图片直接走完整流程
+        if len(image_paths) == 1:
+            try:
+                return [self.ocr_image_sync(image_paths[0], lang)]
+            except Exception as e:
+                return [e]
+
+        results: List[Any] = [None] * len(image_paths)
+        timings = [StageTimings() for _ in image_paths]
+        counts: List[Dict[str, int]] = [{} for _ in image_paths]
+        images = {}
+        for i, image_path in enumerate(image_paths):
+            try:
+                with timings[i].stage("decode"):
+                    images[i] = self._load_image(image_path)
+            except Exception as e:
+                logger.error(f"OCR识别失败: {e}")
+                results[i] = Exception(f"OCR识别失败: {str(e)}")
+
+        try:
+            with ocr_registry.lock(lang):
+                ocr = self._get_ocr_model(lang)
+                if ocr is None:
+                    raise Exception("OCR模型初始化失败")
+                recognized = self._recognize(
+                    ocr, list(images.values()), [timings[i] for i in images], [counts[i] for i in images]
+                )
+
+        except Exception as e:
+            logger.error(f"OCR识别失败: {e}")
+            error = Exception(f"OCR识别失败: {str(e)}")
+            return [error] * len(image_paths)
+
+        for i, lines in zip(images, recognized):
+            if isinstance(lines, Exception):
+                results[i] = lines
+                continue
+            with timings[i].stage("serialize"):
+                results[i] = self._build_result(lines)
+            results[i]["_timings"] = timings[i].as_dict()
+            results[i]["_counts"] = counts[i]
+
+        if any(isinstance(r, dict) for r in results):
+            ocr_registry.mark_ready(lang)
+        return results
+
+    @staticmethod
+    def _region_box(box: List[float], width: int, height: int, normalized: bool = False) -> tuple:
+        """
+        区域框换算为像素坐标
+
+        Args:
+            box: [x0, y0, x1, y1]
+            width: 图片宽度
+            height: 图片高度
+            normalized: box是否为相对于图片宽高的归一化坐标（0~1），否则为像素坐标
+
+        Returns:
+            裁剪到图片范围内的像素坐标
+        """
+        if len(box) != 4:
+            raise Exception(f"区域格式错误: {box}")
+        x0, y0, x1, y1 = (float(v) for v in box)
+        if normalized:
+            x0, x1 = x0 * width, x1 * width
+            y0, y1 = y0 * height, y1 * height
+        x0, x1 = sorted((int(max(0, min(width, x0))), int(max(0, min(width, x1)))))
+        y0, y1 = sorted((int(max(0, min(height, y0))), int(max(0, min(height, y1)))))
+        return x0, y0, x1, y1
+
+    def ocr_regions_sync(
+        self,
+        image_path: str,
+        regions: List[Dict[str, Any]],
+        lang: str = "ch"
+    ) -> Dict[str, Any]:
+        """
+        区域OCR（同步执行）：只识别指定区域，不做整页检测
+
+        单行区域直接把裁剪图送入识别模型；标记为多行的区域只在区域内做检测。
+        所有区域的文本行合并成一批识别。
+
+        Args:
+            image_path: 图片路径
+            regions: 区域列表 [{"name": 字段名, "box": [x0, y0, x1, y1], "normalized": bool, "multiline": bool}]
+            lang: 语言类型
 
-            # OCR识别
-            result = ocr.ocr(image, cls=True)
+        Returns:
+            各区域的识别结果
+        """
+        try:
+            timings = StageTimings()
+            with timings.stage("decode"):
+                image = self._load_image(image_path)
+            height, width = image.shape[:2]
+            boxes = [
+                self._region_box(region["box"], width, height, bool(region.get("normalized")))
+                for region in regions
+            ]
 
-            # 解析结果
-            texts = []
-            positions = []
+            crops = []
+            owners = []
+            with ocr_registry.lock(lang):
+                ocr = self._get_ocr_model(lang)
+                if ocr is None:
+                    raise Exception("OCR模型初始化失败")
 
-            if result and result[0]:
-                for line in result[0]:
-                    # 提取文本
-                    text = line[1][0]
-                    texts.append(text)
+                for i, (region, (x0, y0, x1, y1)) in enumerate(zip(regions, boxes)):
+                    crop = np.ascontiguousarray(image[y0:y1, x0:x1])
+                    if crop.size == 0:
+                        continue
+                    if region.get("multiline"):
+                        with timings.stage("det"):
+                            dt_boxes, _ = ocr.text_detector(crop)
+                        if dt_boxes is not None and len(dt_boxes):
+                            for box in sorted_boxes(dt_boxes):
+                                crops.append(get_rotate_crop_image(crop, copy.deepcopy(box)))
+                                owners.append(i)
+                    else:
+                        crops.append(crop)
+                        owners.append(i)
 
-                    # 提取位置
-                    position = line[0]
-                    positions.append(position)
+                rec_res = []
+                if crops:
+                    with timings.stage("rec"):
+                        rec_res, _ = ocr.text_recognizer(crops)
 
-            self._ready = True
+            region_lines: List[list] = [[] for _ in regions]
+            for owner, (text, score) in zip(owners, rec_res):
+                if score >= ocr.drop_score:
+                    region_lines[owner].append((text, float(score)))
 
+            results = []
+            for region, box, lines in zip(regions, boxes, region_lines):
+                results.append({
+                    "name": region.get("name", ""),
+                    "box": list(box),
+                    "text": "\n".join(text for text, _ in lines),
+                    "confidence": round(min(score for _, score in lines), 4) if lines else 0.0
+                })
+
+            ocr_registry.mark_ready(lang)
+            texts = [r["text"] for r in results if r["text"]]
             return {
+                "fields": {r["name"]: r["text"] for r in results if r["name"]},
+                "regions": results,
                 "text": "\n".join(texts),
                 "texts": texts,
-                "positions": positions,
-                "count": len(texts)
+                "count": len(texts),
+                "_timings": timings.as_dict()
             }
 
+        except Exception as e:
+            logger.error(f"区域OCR识别失败: {e}")
+            raise Exception(f"区域OCR识别失败: {str(e)}")
+
+    async def ocr_regions(
+        self,
+        image_path: str,
+        regions: List[Dict[str, Any]],
+        lang: str = "ch"
+    ) -> Dict[str, Any]:
+        """
+        区域OCR：只识别已知位置的字段（证件、表单）
+
+        Args:
+            image_path: 图片路径或已解码的RGB数组
+            regions: 区域列表，box默认为像素坐标，normalized为true时为归一化坐标
+            lang: 语言类型
+
+        Returns:
+            各区域的识别结果
+        """
+        timings = StageTimings()
+        started = time.perf_counter()
+
+        if ocr_engine.running:
+            result = await ocr_engine.ocr_regions(image_path, regions, lang)
+        else:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(None, self.ocr_regions_sync, image_path, regions, lang)
+
+        self._record_timings(timings, result.pop("_timings", {}), started, "ocr_regions_stage")
+        return result
+
+    async def _run_batch(self, image_paths: List[str], lang: str) -> List[Any]:
+        """执行一个批次：优先提交到工作进程池"""
+        if ocr_engine.running:
+            return await ocr_engine.ocr_images_batch(image_paths, lang)
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.ocr_images_batch_sync, image_paths, lang)
+
+    async def ocr_image(self, image_path: str, lang: str = "ch", content_hash: str = None) -> Dict[str, Any]:
+        """
+        OCR文字识别
+
+        先按图片内容查询结果缓存；未命中时，启用批处理的请求进入批处理调度器，
+        与并发请求合并后执行。执行时工作进程池已启动则提交到进程池，
+        否则在线程池中执行，都不会阻塞事件循环。
+
+        Args:
+            image_path: 图片路径，或已解码的RGB数组（例如分块后的图块）
+            lang: 语言类型 (ch/en/ch_en)
+            content_hash: 图片文件的SHA-256（上传时计算），提供时查询缓存不需要再读取文件；
+                未提供时图片路径按文件内容哈希，只有已解码的数组按像素哈希
+
+        Returns:
+            OCR识别结果
+        """
+        loop = asyncio.get_running_loop()
+        timings = StageTimings()
+        started = time.perf_counter()
+
+        cache_key = None
+        if settings.OCR_CACHE_ENABLED:
+            try:
+                with timings.stage("cache"):
+                    if content_hash is not None:
+                        cache_key = ocr_cache.make_file_key(content_hash, lang, self.model_config(lang))
+                    else:
+                        cache_key = await loop.run_in_executor(
+                            None, ocr_cache.make_key, image_path, lang, self.model_config(lang)
+                        )
+                    cached = await loop.run_in_executor(None, ocr_cache.get, cache_key)
+                if cached is not None:
+                    self._record_timings(timings, {}, started)
+                    return cached
+            except Exception as e:
+                logger.debug(f"OCR缓存不可用: {e}")
+                cache_key = None
+
+        execute_started = time.perf_counter()
+        result = await self._execute(image_path, lang)
+        stages = result.pop("_timings", {})
+        self._record_counts(result.pop("_counts", {}))
+        # 等待批处理窗口、进程池排队和进程间传输的时间
+        wait_ms = (time.perf_counter() - execute_started) * 1000 - sum(stages.values())
+        timings.add("queue", max(0.0, wait_ms))
+
+        if cache_key is not None:
+            await loop.run_in_executor(None, ocr_cache.set, cache_key, result)
+
+        self._record_timings(timings, stages, started)
+        return result
+
+    def _record_counts(self, counts: Dict[str, int]):
+        """工作进程随结果返回的自适应识别计数记入本进程的计数器（/metrics 在API进程中导出）"""
+        self._downscaled.inc(counts.get("downscaled", 0))
+        self._second_pass.inc(counts.get("second_pass", 0))
+
+    @staticmethod
+    def _record_timings(
+        timings: StageTimings,
+        stages: Dict[str, float],
+        started: float,
+        prefix: str = "ocr_stage"
+    ):
+        """
+        汇总一次请求的阶段耗时：记入直方图，并合并到当前请求的计时（用于Server-Timing）
+
+        Args:
+            timings: 本进程内记录的阶段耗时
+            stages: 工作进程返回的阶段耗时
+            started: 请求开始时间
+            prefix: 直方图名前缀
+        """
+        timings.update(stages)
+        timings.add("total", (time.perf_counter() - started) * 1000)
+        timings.observe(prefix)
+
+        # 请求的总耗时由路由记录
+        current = request_timings.get()
+        if current is not None:
+            current.update({name: ms for name, ms in timings.as_dict().items() if name != "total"})
+
+    async def _execute(self, image_path: str, lang: str) -> Dict[str, Any]:
+        """执行OCR（不经过缓存）"""
+        if settings.OCR_TILE_ENABLED and self._needs_tiling(image_path):
+            return await self._ocr_tiled(image_path, lang)
+
+        if settings.OCR_BATCH_ENABLED:
+            return await self._batcher.submit(image_path, lang)
+
+        if ocr_engine.running:
+            return await ocr_engine.ocr_image(image_path, lang)
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.ocr_image_sync, image_path, lang)
+
+    @staticmethod
+    def _needs_tiling(image: ImageSource) -> bool:
+        """根据图片尺寸判断是否需要分块（图片文件只读文件头，不解码像素）"""
+        try:
+            if isinstance(image, np.ndarray):
+                height, width = image.shape[:2]
+            else:
+                with Image.open(image) as opened:
+                    width, height = opened.size
+        except Exception:
+            return False
+        return should_tile(width, height, settings.OCR_TILE_THRESHOLD_PIXELS, settings.OCR_TILE_MAX_SIDE)
+
+    async def _ocr_tiled(self, image_path: str, lang: str) -> Dict[str, Any]:
+        """
+        分块OCR：把超大图片切成带重叠的图块并行识别，再合并回整页坐标
+
+        每个图块都在模型的常规输入尺寸内，小字不会因整图缩放而丢失。
+        本进程只读取文件头得到尺寸，不解码像素：图块按工作进程数分成连续的若干段，
+        各工作进程自行解码图片并只识别自己那一段，进程间不传输像素数据。
+        解码仍是整图解码（PIL不支持按区域解码），每个参与的工作进程
+        在解码和裁剪期间各持有一份整图，峰值内存仍随原图大小增长。
+
+        Args:
+            image_path: 图片路径
+            lang: 语言类型
+
+        Returns:
+            OCR识别结果
+        """
+        loop = asyncio.get_running_loop()
+        timings = StageTimings()
+        try:
+            width, height = image_size(image_path)
+            tiles = make_tiles(width, height, settings.OCR_TILE_SIZE, settings.OCR_TILE_OVERLAP)
+            logger.info(f"分块OCR: {width}x{height}, {len(tiles)}个图块")
+
+            with timings.stage("tiles"):
+                if ocr_engine.running:
+                    tile_results = await ocr_engine.ocr_tiles(image_path, tiles, lang)
+                else:
+                    tile_results = await loop.run_in_executor(None, self.ocr_tiles_sync, tiles, image_path, lang)
+            counts: Dict[str, int] = {}
+            for tile_result in tile_results:
+                if isinstance(tile_result, Exception):
+                    raise tile_result
+                for name, value in tile_result["_counts"].items():
+                    counts[name] = counts.get(name, 0) + value
+            with timings.stage("serialize"):
+                tile_lines = [tile_result["lines"] for tile_result in tile_results]
+                lines = merge_tile_lines(list(zip(tiles, tile_lines)), width, height)
+                result = self._build_result(lines)
+            result["_timings"] = timings.as_dict()
+            result["_counts"] = counts
+            return result
+
         except Exception as e:
             logger.error(f"OCR识别失败: {e}")
             raise Exception(f"OCR识别失败: {str(e)}")
 
-    async def ocr_batch(self, image_paths: List[str], lang: str = "ch") -> List[Dict[str, Any]]:
+    async def ocr_batch(
+        self,
+        image_paths: List[str],
+        lang: str = "ch",
+        content_hashes: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
         """
         批量OCR识别
 
+        各图片并发提交，启用批处理时由批处理调度器合并执行；
+        所有图片都完成后，有图片失败时抛出第一个异常。
+
         Args:
             image_paths: 图片路径列表
             lang: 语言类型
+            content_hashes: 与图片路径一一对应的文件SHA-256（上传时计算）
 
         Returns:
             OCR识别结果列表
         """
-        results = []
-        for image_path in image_paths:
-            result = await self.ocr_image(image_path, lang)
-            results.append(result)
-        return results
+        hashes = content_hashes or [None] * len(image_paths)
+        results = await asyncio.gather(
+            *[
+                self.ocr_image(image_path, lang, content_hash=content_hash)
+                for image_path, content_hash in zip(image_paths, hashes)
+            ],
+            return_exceptions=True
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                raise result
+        return list(results)
+
+
+# 进程内共享的OCR服务，各路由统一使用
+ocr_service = OCRService()
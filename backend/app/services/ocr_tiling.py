@@ -0,0 +1,143 @@
+"""
+分块OCR - 超大图片/长图的切块与结果合并
+
+PaddleOCR检测前会把图片缩放到固定边长，超大图片或长截图里的小字会因此丢失，
+整图推理的内存占用也随图片尺寸增长。分块模式把图片切成带重叠的小块分别识别，
+再把文本框换算回整页坐标，并去掉接缝处被截断或重复识别的文本行。
+"""
+from typing import List, Tuple
+
+# 文本行: (四点坐标, 文本, 置信度)
+Line = Tuple[List[List[float]], str, float]
+# 图块: (x0, y0, x1, y1)
+Tile = Tuple[int, int, int, int]
+
+# 距离内部接缝小于该像素数的文本框视为被截断
+EDGE_MARGIN = 2
+
+
+def should_tile(width: int, height: int, max_pixels: int, max_side: int) -> bool:
+    """
+    判断图片是否需要分块识别
+
+    Args:
+        width: 图片宽度
+        height: 图片高度
+        max_pixels: 像素数阈值
+        max_side: 长边阈值（长截图）
+
+    Returns:
+        是否分块
+    """
+    return width * height > max_pixels or max(width, height) > max_side
+
+
+def _axis_starts(length: int, tile: int, overlap: int) -> List[int]:
+    """单个方向上各图块的起点"""
+    if length <= tile:
+        return [0]
+    step = max(1, tile - overlap)
+    starts = list(range(0, length - tile, step))
+    starts.append(length - tile)
+    return starts
+
+
+def make_tiles(width: int, height: int, tile_size: int, overlap: int) -> List[Tile]:
+    """
+    生成带重叠的图块
+
+    Args:
+        width: 图片宽度
+        height: 图片高度
+        tile_size: 图块边长
+        overlap: 相邻图块的重叠像素数（应大于最大文字行高）
+
+    Returns:
+        图块列表，按行优先排列
+    """
+    tiles = []
+    for y in _axis_starts(height, tile_size, overlap):
+        for x in _axis_starts(width, tile_size, overlap):
+            tiles.append((x, y, min(x + tile_size, width), min(y + tile_size, height)))
+    return tiles
+
+
+def _bounds(box: List[List[float]]) -> Tuple[float, float, float, float]:
+    xs = [p[0] for p in box]
+    ys = [p[1] for p in box]
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def _area(bounds: Tuple[float, float, float, float]) -> float:
+    return max(0.0, bounds[2] - bounds[0]) * max(0.0, bounds[3] - bounds[1])
+
+
+def _overlap_ratio(a, b) -> float:
+    """交集面积占较小框面积的比例"""
+    inter = (max(a[0], b[0]), max(a[1], b[1]), min(a[2], b[2]), min(a[3], b[3]))
+    smaller = min(_area(a), _area(b))
+    return _area(inter) / smaller if smaller > 0 else 0.0
+
+
+def _touches_seam(bounds, tile: Tile, width: int, height: int) -> bool:
+    """文本框是否贴着图块的内部接缝（图片边缘不算）"""
+    x0, y0, x1, y1 = tile
+    return (
+        (x0 > 0 and bounds[0] - x0 <= EDGE_MARGIN)
+        or (y0 > 0 and bounds[1] - y0 <= EDGE_MARGIN)
+        or (x1 < width and x1 - bounds[2] <= EDGE_MARGIN)
+        or (y1 < height and y1 - bounds[3] <= EDGE_MARGIN)
+    )
+
+
+def merge_tile_lines(
+    tile_lines: List[Tuple[Tile, List[Line]]],
+    width: int,
+    height: int,
+    dedup_ratio: float = 0.5
+) -> List[Line]:
+    """
+    合并各图块的识别结果
+
+    Args:
+        tile_lines: [(图块, 图块内坐标的文本行)]
+        width: 整页宽度
+        height: 整页高度
+        dedup_ratio: 两个框交集占较小框的比例超过该值时视为同一行
+
+    Returns:
+        整页坐标的文本行，按阅读顺序排列
+    """
+    candidates = []
+    for tile, lines in tile_lines:
+        x0, y0 = tile[0], tile[1]
+        for box, text, score in lines:
+            page_box = [[float(p[0]) + x0, float(p[1]) + y0] for p in box]
+            bounds = _bounds(page_box)
+            truncated = _touches_seam(bounds, tile, width, height)
+            candidates.append((truncated, -_area(bounds), -score, page_box, text, score, bounds))
+
+    # 完整的框优先，其次面积大的、置信度高的
+    candidates.sort(key=lambda c: c[:3])
+
+    kept = []
+    for _, _, _, box, text, score, bounds in candidates:
+        if any(_overlap_ratio(bounds, other[3]) > dedup_ratio for other in kept):
+            continue
+        kept.append((box, text, score, bounds))
+
+    # 阅读顺序：同一行（纵向差距小于半个行高）内从左到右
+    kept.sort(key=lambda k: (k[3][1], k[3][0]))
+    ordered = []
+    for item in kept:
+        line_height = item[3][3] - item[3][1]
+        i = len(ordered)
+        while i > 0:
+            prev = ordered[i - 1][3]
+            if abs(prev[1] - item[3][1]) < line_height / 2 and prev[0] > item[3][0]:
+                i -= 1
+            else:
+                break
+        ordered.insert(i, item)
+
+    return [(box, text, score) for box, text, score, _ in ordered]
@@ -0,0 +1,321 @@
+"""
+PDF输入 - 把上传的PDF拆成逐页的识别输入
+
+有文字层的页面直接取嵌入的文字（与OCR结果格式相同，不需要识别）；
+其余页面在图像处理工作进程中按指定DPI渲染为图片，多页并行渲染。
+页面按页序逐页交给裁剪/增强/OCR流程，同时在处理中的页数有上限，
+处理完的页面图片随即删除，内存和临时文件占用与总页数无关。
+"""
+import asyncio
+import ctypes
+import logging
+import math
+import os
+import threading
+from collections import deque
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import pypdfium2 as pdfium
+import pypdfium2.raw as pdfium_c
+from PIL import Image
+
+from app.core.config import settings
+from app.core.errors import RequestRejectedError
+from app.core.metrics import metrics
+from app.services.file_types import SNIFF_BYTES, sniff_extension
+from app.services.image_executor import image_executor
+from app.services.temp_files import temp_files
+
+logger = logging.getLogger(__name__)
+
+# 渲染分辨率范围
+MIN_DPI = 72
+MAX_DPI = 600
+# 页面读取方式：always（总是渲染）/auto（没有文字层的页面才渲染）
+RENDER_MODES = ("always", "auto")
+
+# pdfium不是线程安全的；未启用进程池时页面读取在线程池中执行，需要串行化
+_pdfium_lock = threading.Lock()
+
+_text_pages = metrics.counter("pdf_input_text_pages", "使用嵌入文字层、跳过OCR的PDF页数")
+_rendered_pages = metrics.counter("pdf_input_rendered_pages", "渲染为图片的PDF页数")
+
+
+class PdfPageLimitError(RequestRejectedError):
+    """PDF页数超过限制"""
+
+    status_code = 413
+
+
+def text_layer_lines(textpage: "pdfium.PdfTextPage", page: "pdfium.PdfPage", width: int, height: int) -> List[tuple]:
+    """
+    读取页面的文字层
+
+    按pdfium生成的换行拆分文本行，每行的位置取行内字符框的外接矩形，
+    坐标换算到按页面旋转渲染后的像素坐标，与OCR结果的坐标一致。
+
+    Args:
+        textpage: 页面文字对象
+        page: 页面对象
+        width: 渲染图片宽度（像素）
+        height: 渲染图片高度（像素）
+
+    Returns:
+        文本行 [(四点框, 文本, 置信度)]
+    """
+    count = textpage.count_chars()
+    text = textpage.get_text_range(0, count)
+    if len(text) != count:
+        # 基本平面以外的字符在pdfium中占两个位置，逐个字符读取
+        chars = [textpage.get_text_range(i, 1) for i in range(count)]
+    else:
+        chars = list(text)
+
+    device_x, device_y = ctypes.c_int(), ctypes.c_int()
+
+    def to_device(x: float, y: float) -> Tuple[int, int]:
+        pdfium_c.FPDF_PageToDevice(page, 0, 0, width, height, 0, x, y, device_x, device_y)
+        return device_x.value, device_y.value
+
+    lines = []
+    line_chars: List[str] = []
+    xs: List[int] = []
+    ys: List[int] = []
+
+    def end_line():
+        line = "".join(line_chars).strip()
+        if line and xs:
+            x0, y0, x1, y1 = min(xs), min(ys), max(xs), max(ys)
+            lines.append(([[x0, y0], [x1, y0], [x1, y1], [x0, y1]], line, 1.0))
+        line_chars.clear()
+        xs.clear()
+        ys.clear()
+
+    for i, char in enumerate(chars):
+        if char in "\r\n":
+            end_line()
+            continue
+        line_chars.append(char)
+        if char.strip():
+            left, bottom, right, top = textpage.get_charbox(i)
+            for x, y in (to_device(left, top), to_device(right, bottom)):
+                xs.append(x)
+                ys.append(y)
+    end_line()
+    return lines
+
+
+class PdfInputService:
+    """PDF输入服务"""
+
+    @staticmethod
+    def is_pdf(path: str) -> bool:
+        """按文件头判断是否为PDF"""
+        with open(path, "rb") as f:
+            return sniff_extension(f.read(SNIFF_BYTES)) == ".pdf"
+
+    @staticmethod
+    def _page_count_sync(pdf_path: str) -> int:
+        with _pdfium_lock:
+            document = pdfium.PdfDocument(pdf_path)
+            try:
+                return len(document)
+            finally:
+                document.close()
+
+    @staticmethod
+    def _info_sync(pdf_path: str) -> Dict[str, Any]:
+        with _pdfium_lock:
+            document = pdfium.PdfDocument(pdf_path)
+            try:
+                return {
+                    "page_count": len(document),
+                    "version": document.get_version(),
+                    "metadata": document.get_metadata_dict(skip_empty=True)
+                }
+            finally:
+                document.close()
+
+    @staticmethod
+    def render_page_sync(pdf_path: str, index: int = 0, max_side: int = None) -> Image.Image:
+        """
+        渲染PDF的一页为图片（缩略图等只需要小图的场景直接按目标尺寸渲染）
+
+        Args:
+            pdf_path: PDF路径
+            index: 页码（从0开始）
+            max_side: 渲染结果的长边，None表示72DPI
+
+        Returns:
+            RGB图片
+        """
+        with _pdfium_lock:
+            document = pdfium.PdfDocument(pdf_path)
+            try:
+                page = document[index]
+                scale = max_side / max(page.get_size()) if max_side else 1.0
+                bitmap = page.render(scale=scale)
+                # 复制出位图缓冲区，关闭位图后图片仍然可用
+                image = bitmap.to_pil().convert("RGB")
+                bitmap.close()
+                page.close()
+                return image
+            finally:
+                document.close()
+
+    async def document_info(self, pdf_path: str) -> Dict[str, Any]:
+        """
+        读取PDF的页数和文档信息（不渲染页面）
+
+        Args:
+            pdf_path: PDF路径
+
+        Returns:
+            {"page_count": 页数, "version": PDF版本（如17表示1.7）, "metadata": 文档信息（标题、作者等非空字段）}
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(None, self._info_sync, pdf_path)
+        except pdfium.PdfiumError as e:
+            raise RequestRejectedError(f"无法读取PDF: {e}")
+
+    @staticmethod
+    def _load_page_sync(pdf_path: str, index: int, dpi: float, render: str, output_path: str) -> Dict[str, Any]:
+        """
+        读取PDF的一页（在图像处理工作进程中执行）
+
+        Args:
+            pdf_path: PDF路径
+            index: 页码（从0开始）
+            dpi: 渲染分辨率
+            render: 读取方式（always/auto）
+            output_path: 渲染结果的保存路径
+
+        Returns:
+            {"lines": 文字层的文本行（没有文字层时为None）, "image": 渲染结果路径（未渲染时为None）}
+        """
+        scale = dpi / 72
+        with _pdfium_lock:
+            document = pdfium.PdfDocument(pdf_path)
+            try:
+                page = document[index]
+                width, height = (math.ceil(v * scale) for v in page.get_size())
+
+                textpage = page.get_textpage()
+                lines = text_layer_lines(textpage, page, width, height)
+                textpage.close()
+                if sum(len(text.replace(" ", "")) for _, text, _ in lines) < settings.PDF_TEXT_MIN_CHARS:
+                    lines = None
+
+                image = None
+                if render == "always" or lines is None:
+                    bitmap = page.render(scale=scale)
+                    bitmap.to_pil().save(output_path, compress_level=1)
+                    bitmap.close()
+                    image = output_path
+                page.close()
+            finally:
+                document.close()
+
+        return {"lines": lines, "image": image}
+
+    async def iter_pages(self, pdf_path: str, dpi: float = None, render: str = "auto") -> AsyncIterator[Dict[str, Any]]:
+        """
+        逐页读取PDF
+
+        多页在工作进程中并行读取，按页序产出；调用方处理完一页（取下一页）时，
+        该页的渲染图片被删除。需要保留图片时，调用方把页面的image置为None，自行负责删除。
+
+        Args:
+            pdf_path: PDF路径
+            dpi: 渲染分辨率，默认使用配置
+            render: always（每页都渲染，用于需要页面图片的扫描流程）/auto（有文字层的页面不渲染）
+
+        Yields:
+            {"page": 页码（从1开始）, "source": text_layer/ocr,
+             "ocr_result": 文字层的识别结果（没有文字层时为None）, "image": 渲染的页面图片路径（未渲染时为None）}
+        """
+        # 文字层结果与OCR结果格式相同；工作进程反序列化本服务时不需要加载OCR模块
+        from app.services.ocr_service import OCRService
+
+        dpi = float(dpi or settings.PDF_INPUT_DPI)
+        if not MIN_DPI <= dpi <= MAX_DPI:
+            raise RequestRejectedError(f"PDF渲染分辨率需在{MIN_DPI}~{MAX_DPI}之间: {dpi:g}")
+        if render not in RENDER_MODES:
+            raise ValueError(f"不支持的读取方式: {render}")
+
+        loop = asyncio.get_running_loop()
+        try:
+            page_count = await loop.run_in_executor(None, self._page_count_sync, pdf_path)
+        except pdfium.PdfiumError as e:
+            raise RequestRejectedError(f"无法读取PDF: {e}")
+        if page_count > settings.PDF_INPUT_MAX_PAGES:
+            raise PdfPageLimitError(f"PDF页数超过限制（{page_count} > {settings.PDF_INPUT_MAX_PAGES}）")
+
+        window = max(2, image_executor.workers * 2)
+
+        def start(index: int) -> asyncio.Future:
+            output_path = str(temp_files.path(".png"))
+            return asyncio.ensure_future(
+                image_executor.run(self._load_page_sync, pdf_path, index, dpi, render, output_path)
+            )
+
+        pending = deque(start(index) for index in range(min(window, page_count)))
+        page = None
+        try:
+            for index in range(page_count):
+                loaded = await pending.popleft()
+                if index + window < page_count:
+                    pending.append(start(index + window))
+
+                if loaded["lines"] is not None:
+                    _text_pages.inc()
+                if loaded["image"] is not None:
+                    _rendered_pages.inc()
+                page = {
+                    "page": index + 1,
+                    "source": "ocr" if loaded["lines"] is None else "text_layer",
+                    "ocr_result": None if loaded["lines"] is None else OCRService.result_from_lines(loaded["lines"]),
+                    "image": loaded["image"],
+                }
+                yield page
+                self._remove(page["image"])
+                page = None
+        finally:
+            if page is not None:
+                self._remove(page["image"])
+            # 已提交的页面等它读完再删除渲染结果（线程或进程中执行的任务取消后仍会写出文件）
+            for loaded in await asyncio.gather(*pending, return_exceptions=True):
+                if isinstance(loaded, dict):
+                    self._remove(loaded["image"])
+
+    @staticmethod
+    def _remove(path: Optional[str]):
+        if path is None:
+            return
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+    @staticmethod
+    def combine_results(pages: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        合并各页的识别结果
+
+        Args:
+            pages: 每页的 {"page", "source", **识别结果}
+
+        Returns:
+            {"text": 全文（页之间空一行）, "count": 文本行总数, "page_count": 页数, "pages": 每页结果}
+        """
+        return {
+            "text": "\n\n".join(page["text"] for page in pages),
+            "count": sum(page["count"] for page in pages),
+            "page_count": len(pages),
+            "pages": pages,
+        }
+
+
+# 全局PDF输入服务实例
+pdf_input_service = PdfInputService()
@@ -0,0 +1,371 @@
+"""
+PDF线性化（Fast Web View）
+
+线性化文件把打开文档和显示第一页所需的对象放在文件开头，并用提示表（hint table）
+记录每页对象在文件中的位置，阅读器按需请求字节范围，不必等整个文件下载完就能显示第一页。
+
+文件布局（PDF 1.7 附录F）：
+    文件头、线性化参数字典、第一页交叉引用表、目录等打开文档所需的对象、主提示流、
+    第一页的对象、其余各页独有的对象、多页共用的对象、其它对象、主交叉引用表。
+
+输入文件按需读取，分两遍写出：第一遍只计算每个对象序列化后的长度以确定布局，
+第二遍按布局写出。内存中只保留对象之间的引用关系和长度，不保留对象内容。
+"""
+import logging
+from collections import Counter, deque
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple, Union
+
+from PyPDF2 import PdfReader
+from PyPDF2.generic import ArrayObject, DictionaryObject, IndirectObject, NullObject, StreamObject
+
+from app.services.pdf_merge import ObjectKey, object_key, pdf_object
+from app.services.pdf_writer import PDF_HEADER, object_parts
+
+logger = logging.getLogger(__name__)
+
+# 打开文档时需要的目录条目，其引用的对象放在文件开头
+OPEN_DOCUMENT_KEYS = ("/ViewerPreferences", "/PageMode", "/Threads", "/OpenAction", "/AcroForm")
+# 引用关系中不跟随的对象类型（从页面出发收集对象时，不进入其它页面和页面树）
+_STRUCTURE_TYPES = ("/Page", "/Pages", "/Catalog")
+# 读取缓存超过该对象数时清空
+_CACHE_LIMIT = 256
+
+# 线性化参数字典和第一页交叉引用表中的数值在布局确定后才知道，按固定宽度预留
+_LINEARIZED = b"<< /Linearized 1 /L %10d /H [%10d %10d] /O %10d /E %10d /N %10d /T %10d >>"
+_XREF_ENTRY = b"%010d 00000 n \n"
+
+
+def _refs(value) -> Iterator[IndirectObject]:
+    """对象中直接包含的间接引用（不包括指向上级节点的Parent）"""
+    if isinstance(value, IndirectObject):
+        yield value
+    elif isinstance(value, DictionaryObject):
+        for key, item in value.items():
+            if key != "/Parent":
+                yield from _refs(item)
+    elif isinstance(value, ArrayObject):
+        for item in value:
+            yield from _refs(item)
+
+
+class _BitWriter:
+    """提示表的按位写入（高位在前）"""
+
+    def __init__(self):
+        self.data = bytearray()
+        self._value = 0
+        self._bits = 0
+
+    def write(self, value: int, bits: int):
+        if value >= 1 << bits:
+            raise ValueError(f"{value} 超出 {bits} 位")
+        self._value = (self._value << bits) | value
+        self._bits += bits
+        while self._bits >= 8:
+            self._bits -= 8
+            self.data.append((self._value >> self._bits) & 0xFF)
+        self._value &= (1 << self._bits) - 1
+
+    def align(self):
+        """补齐到字节边界"""
+        if self._bits:
+            self.write(0, 8 - self._bits)
+
+
+def _bits(value: int) -> int:
+    """表示 0~value 需要的位数（至少1位）"""
+    return max(1, value.bit_length())
+
+
+class PdfLinearizer:
+    """PDF线性化"""
+
+    def __init__(self, reader: PdfReader):
+        self.reader = reader
+        # 对象 -> 直接引用的对象；结构对象（页面、页面树、目录）的类型
+        self.children: Dict[ObjectKey, List[ObjectKey]] = {}
+        self.types: Dict[ObjectKey, str] = {}
+        # 对象在输出中的编号和序列化后的长度
+        self.ids: Dict[ObjectKey, int] = {}
+        self.lengths: Dict[ObjectKey, int] = {}
+
+    def _get(self, key: ObjectKey):
+        cache = self.reader.resolved_objects
+        if len(cache) > _CACHE_LIMIT:
+            cache.clear()
+        obj = self.reader.get_object(IndirectObject(key[0], key[1], self.reader))
+        if isinstance(obj, StreamObject):
+            # 数据流（图片等）用完即释放，不留在读取缓存中
+            cache.pop((key[1], key[0]), None)
+        return obj
+
+    def _load_graph(self, roots: List[ObjectKey]):
+        """从根对象出发遍历，记录所有可达对象的引用关系"""
+        stack = list(roots)
+        while stack:
+            key = stack.pop()
+            if key in self.children:
+                continue
+            obj = self._get(key)
+            if obj is None or isinstance(obj, NullObject):
+                # 不存在的对象不写出，引用处写为null
+                continue
+            children = [object_key(ref) for ref in _refs(obj)]
+            self.children[key] = children
+            if isinstance(obj, DictionaryObject) and obj.get("/Type") in _STRUCTURE_TYPES:
+                self.types[key] = obj["/Type"]
+            stack.extend(child for child in children if child not in self.children)
+
+    def _closure(self, root: ObjectKey, exclude: Set[ObjectKey] = frozenset()) -> List[ObjectKey]:
+        """root及其引用的对象（广度优先顺序），不进入其它结构对象和exclude中的对象"""
+        order = [root]
+        seen = {root}
+        queue = deque([root])
+        while queue:
+            for child in self.children.get(queue.popleft(), ()):
+                if child in seen or child in exclude or child not in self.children or child in self.types:
+                    continue
+                seen.add(child)
+                order.append(child)
+                queue.append(child)
+        return order
+
+    def _object_parts(self, key: ObjectKey) -> List[bytes]:
+        value, stream = pdf_object(self._get(key), lambda ref: self.ids.get(object_key(ref)))
+        return object_parts(self.ids[key], value, stream)
+
+    def write(self, output: Union[str, Path]):
+        """写出线性化文件"""
+        reader = self.reader
+        root = object_key(reader.trailer.raw_get("/Root"))
+        info = object_key(reader.trailer.raw_get("/Info")) if "/Info" in reader.trailer else None
+        pages = [object_key(page.indirect_reference) for page in reader.pages]
+        if not pages:
+            raise Exception("PDF没有页面")
+        self._load_graph([root] + ([info] if info else []))
+
+        # 第一页：第一页及其引用的全部对象
+        first_page = self._closure(pages[0])
+        first_set = set(first_page)
+        # 其余各页：只被一页引用的对象归该页，被多页引用的对象放在共用部分
+        closures = [self._closure(page) for page in pages[1:]]
+        users = Counter(key for closure in closures for key in closure if key not in first_set)
+        page_sections = [[key for key in closure if users[key] == 1] for closure in closures]
+        shared = list(dict.fromkeys(key for closure in closures for key in closure if users[key] > 1))
+        assigned = first_set.union(*page_sections, shared)
+
+        # 打开文档所需的对象：目录及其中的视图设置、打开动作、表单等
+        open_document = [root]
+        catalog = self._get(root)
+        for name in OPEN_DOCUMENT_KEYS:
+            for ref in _refs(catalog.raw_get(name) if name in catalog else None):
+                for key in self._closure(object_key(ref), assigned.union(open_document)):
+                    if key not in open_document:
+                        open_document.append(key)
+        assigned.update(open_document)
+        # 其它对象：页面树、文档信息、书签等
+        others = [key for key in self.children if key not in assigned]
+
+        # 编号：主交叉引用表中的对象按文件顺序从1开始（各页的对象编号连续，提示表依赖这一点），
+        # 线性化参数字典、文件开头的对象、提示流和第一页的对象编号排在最后
+        main_order = [key for section in page_sections for key in section] + shared + others
+        for number, key in enumerate(main_order, 1):
+            self.ids[key] = number
+        main_size = len(main_order) + 1
+        linearized_id = main_size
+        for number, key in enumerate(open_document, linearized_id + 1):
+            self.ids[key] = number
+        hint_id = linearized_id + len(open_document) + 1
+        for number, key in enumerate(first_page, hint_id + 1):
+            self.ids[key] = number
+        total_size = hint_id + len(first_page) + 1
+
+        # 第一遍：对象长度
+        for key in open_document + first_page + main_order:
+            self.lengths[key] = sum(len(part) for part in self._object_parts(key))
+
+        # 布局（不含提示流：提示表中的位置按提示流不存在计算）
+        first_xref_offset = len(PDF_HEADER) + len(self._linearized_object(linearized_id, [0] * 7))
+        first_xref_length = len(self._first_xref(linearized_id, total_size, [0] * (total_size - linearized_id), 0, info))
+        offsets: Dict[ObjectKey, int] = {}
+        position = first_xref_offset + first_xref_length
+        for key in open_document:
+            offsets[key] = position
+            position += self.lengths[key]
+        hint_offset = position
+        for key in first_page + main_order:
+            offsets[key] = position
+            position += self.lengths[key]
+
+        hint_data, shared_table_offset = self._hint_tables(first_page, page_sections, shared, closures, main_order, offsets)
+        hint_parts = object_parts(hint_id, {"S": shared_table_offset}, hint_data)
+        hint_length = sum(len(part) for part in hint_parts)
+        for key in first_page + main_order:
+            offsets[key] += hint_length
+
+        end_of_first_page = offsets[first_page[-1]] + self.lengths[first_page[-1]]
+        main_xref_offset = position + hint_length
+        main_xref_head = b"xref\n0 %d\n" % main_size
+        main_xref = (
+            main_xref_head + b"0000000000 65535 f \n"
+            + b"".join(_XREF_ENTRY % offsets[key] for key in main_order)
+            + b"trailer\n<< /Size %d >>\nstartxref\n%d\n%%%%EOF\n" % (main_size, first_xref_offset)
+        )
+        file_length = main_xref_offset + len(main_xref)
+
+        first_entries = (
+            [len(PDF_HEADER)]
+            + [offsets[key] for key in open_document]
+            + [hint_offset]
+            + [offsets[key] for key in first_page]
+        )
+        linearized = self._linearized_object(linearized_id, [
+            file_length, hint_offset, hint_length, self.ids[first_page[0]],
+            end_of_first_page, len(pages), main_xref_offset + len(main_xref_head) - 1
+        ])
+
+        # 第二遍：写出
+        with open(output, "wb") as f:
+            f.write(PDF_HEADER)
+            f.write(linearized)
+            f.write(self._first_xref(linearized_id, total_size, first_entries, main_xref_offset, info))
+            for key in open_document:
+                self._write_object(f, key, offsets[key])
+            f.write(b"".join(hint_parts))
+            for key in first_page + main_order:
+                self._write_object(f, key, offsets[key])
+            f.write(main_xref)
+            if f.tell() != file_length:
+                raise Exception("线性化布局计算错误")
+
+        logger.debug(f"PDF线性化: {len(pages)}页，{total_size - 1}个对象，第一页结束于{end_of_first_page}字节")
+
+    def _write_object(self, f, key: ObjectKey, offset: int):
+        if f.tell() != offset:
+            raise Exception("线性化布局计算错误")
+        for part in self._object_parts(key):
+            f.write(part)
+
+    @staticmethod
+    def _linearized_object(obj_id: int, values: List[int]) -> bytes:
+        """线性化参数字典：/L /H /O /E /N /T"""
+        return b"%d 0 obj\n" % obj_id + _LINEARIZED % tuple(values) + b"\nendobj\n"
+
+    def _first_xref(
+        self,
+        first_id: int,
+        size: int,
+        entries: List[int],
+        main_xref_offset: int,
+        info: Optional[ObjectKey] = None
+    ) -> bytes:
+        """第一页交叉引用表和文件尾（Prev指向主交叉引用表）"""
+        root = object_key(self.reader.trailer.raw_get("/Root"))
+        info_entry = b" /Info %d 0 R" % self.ids[info] if info else b""
+        return (
+            b"xref\n%d %d\n" % (first_id, len(entries))
+            + b"".join(_XREF_ENTRY % offset for offset in entries)
+            + b"trailer\n<< /Size %d /Root %d 0 R%s /Prev %10d >>\nstartxref\n0\n%%%%EOF\n"
+            % (size, self.ids.get(root, 0), info_entry, main_xref_offset)
+        )
+
+    def _hint_tables(
+        self,
+        first_page: List[ObjectKey],
+        page_sections: List[List[ObjectKey]],
+        shared: List[ObjectKey],
+        closures: List[List[ObjectKey]],
+        main_order: List[ObjectKey],
+        offsets: Dict[ObjectKey, int]
+    ) -> Tuple[bytes, int]:
+        """
+        主提示流：页面偏移提示表和共用对象提示表
+
+        共用对象表中每个对象为一组：先是第一页的全部对象，再是多页共用的对象；
+        各页记录引用了表中的哪些组。
+
+        Returns:
+            (提示流数据, 共用对象提示表在数据中的偏移)
+        """
+        sections = [first_page] + page_sections
+        shared_index = {key: i for i, key in enumerate(first_page + shared)}
+        first_set = set(first_page)
+        page_shared = [[]] + [
+            [shared_index[key] for key in closure if key in first_set or key in shared_index and key not in section]
+            for closure, section in zip(closures, [set(s) for s in page_sections])
+        ]
+        counts = [len(section) for section in sections]
+        lengths = [sum(self.lengths[key] for key in section) for section in sections]
+
+        # 页面偏移提示表
+        table = _BitWriter()
+        object_bits = _bits(max(counts) - min(counts))
+        length_bits = _bits(max(lengths) - min(lengths))
+        shared_count_bits = _bits(max(len(refs) for refs in page_shared))
+        shared_id_bits = _bits(len(shared_index) - 1)
+        header = [
+            (min(counts), 32), (offsets[first_page[0]], 32), (object_bits, 16),
+            (min(lengths), 32), (length_bits, 16),
+            (0, 32), (1, 16),  # 内容流偏移（不提供，均为0）
+            (0, 32), (1, 16),  # 内容流长度（不提供，均为0）
+            (shared_count_bits, 16), (shared_id_bits, 16),
+            (1, 16), (1, 16),  # 共用对象在页面中的位置（分子/分母，不提供）
+        ]
+        for value, bits in header:
+            table.write(value, bits)
+        for values, bits in (
+            ([count - min(counts) for count in counts], object_bits),
+            ([length - min(lengths) for length in lengths], length_bits),
+            ([len(refs) for refs in page_shared], shared_count_bits),
+            ([i for refs in page_shared for i in refs], shared_id_bits),
+            ([0 for refs in page_shared for _ in refs], 1),
+            ([0] * len(sections), 1),
+            ([0] * len(sections), 1),
+        ):
+            for value in values:
+                table.write(value, bits)
+            table.align()
+        shared_table_offset = len(table.data)
+
+        # 共用对象提示表
+        group_lengths = [self.lengths[key] for key in first_page + shared]
+        group_length_bits = _bits(max(group_lengths) - min(group_lengths))
+        # 没有共用对象时指向共用部分应在的位置（编号不能为0）
+        first_shared = shared[0] if shared else main_order[0]
+        header = [
+            (self.ids[first_shared], 32),
+            (offsets[first_shared], 32),
+            (len(first_page), 32),
+            (len(group_lengths), 32),
+            (1, 16),  # 每组对象数减1所需位数（每组一个对象）
+            (min(group_lengths), 32),
+            (group_length_bits, 16),
+        ]
+        for value, bits in header:
+            table.write(value, bits)
+        for values, bits in (
+            ([length - min(group_lengths) for length in group_lengths], group_length_bits),
+            ([0] * len(group_lengths), 1),  # 不提供MD5
+            ([0] * len(group_lengths), 1),  # 每组对象数减1
+        ):
+            for value in values:
+                table.write(value, bits)
+            table.align()
+
+        return bytes(table.data), shared_table_offset
+
+
+def linearize_pdf(source: Union[str, Path], output: Union[str, Path]):
+    """
+    线性化PDF
+
+    Args:
+        source: 输入PDF路径
+        output: 输出路径（不能与输入相同）
+    """
+    with open(source, "rb") as f:
+        reader = PdfReader(f)
+        if reader.is_encrypted:
+            raise Exception("不支持加密的PDF")
+        PdfLinearizer(reader).write(output)
@@ -0,0 +1,193 @@
+"""
+PDF合并 - 流式复制页面对象
+
+输入文件逐个打开，对象按需读取（不整体载入内存），复制到流式写入器后即释放；
+数据流原样复制，不解压也不重新压缩。字体、图片等资源按内容去重，
+多个文件中相同的资源在输出中只保留一份。内存占用与输入文件的总大小无关。
+"""
+import hashlib
+import io
+import logging
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Dict, List, Optional, Tuple, Union
+
+from PyPDF2 import PdfReader
+from PyPDF2.generic import ArrayObject, DictionaryObject, IndirectObject, NullObject, StreamObject
+
+from app.services.pdf_writer import PdfStreamWriter, serialize
+
+logger = logging.getLogger(__name__)
+
+# 按内容去重的字典类型（数据流总是按内容去重）
+DEDUPE_TYPES = {"/Font", "/FontDescriptor", "/Encoding", "/ExtGState", "/Pattern", "/Shading"}
+# 复制页面时不保留的键（页面树由写入器重建；文章线程、结构树不随页面复制）
+PAGE_SKIP_KEYS = {"/Parent", "/B", "/StructParents"}
+# 不跟随引用复制的对象类型：页面之间的引用（链接、批注）只映射到同一文件中已复制的页面
+STOP_TYPES = {"/Page", "/Pages", "/Catalog"}
+
+ObjectKey = Tuple[int, int]
+
+
+def object_key(ref: IndirectObject) -> ObjectKey:
+    return ref.idnum, ref.generation
+
+
+def pdf_value(value: Any, ref_id: Callable[[IndirectObject], Optional[int]]) -> bytes:
+    """
+    PyPDF2对象序列化为PDF字节
+
+    Args:
+        value: 直接对象
+        ref_id: 间接引用 -> 输出中的对象编号，返回None时写为null
+
+    Returns:
+        序列化结果
+    """
+    if isinstance(value, IndirectObject):
+        obj_id = ref_id(value)
+        return b"null" if obj_id is None else b"%d 0 R" % obj_id
+    if isinstance(value, DictionaryObject):
+        items = b" ".join(key.renumber() + b" " + pdf_value(item, ref_id) for key, item in value.items())
+        return b"<< " + items + b" >>"
+    if isinstance(value, ArrayObject):
+        return b"[" + b" ".join(pdf_value(item, ref_id) for item in value) + b"]"
+    buffer = io.BytesIO()
+    value.write_to_stream(buffer, None)
+    return buffer.getvalue()
+
+
+def pdf_object(obj: Any, ref_id: Callable[[IndirectObject], Optional[int]]) -> Tuple[Any, Optional[bytes]]:
+    """
+    间接对象的内容，格式与写入器的write_object参数一致
+
+    Returns:
+        (值, 数据流)：数据流为文件中的原始（压缩后）数据，Length由写入器重新计算
+    """
+    if isinstance(obj, StreamObject):
+        value = {str(key)[1:]: pdf_value(item, ref_id) for key, item in obj.items() if key != "/Length"}
+        return value, obj._data
+    return pdf_value(obj, ref_id), None
+
+
+class PdfObjectCopier:
+    """把输入文件的页面及其引用的对象复制到写入器"""
+
+    def __init__(self, writer: PdfStreamWriter, dedupe: bool = True):
+        """
+        Args:
+            writer: 输出写入器
+            dedupe: 是否按内容去重数据流和字体等资源
+        """
+        self.writer = writer
+        self.dedupe = dedupe
+        self.deduplicated = 0
+        # 内容摘要 -> 输出对象编号（跨输入文件共用）
+        self._digests: Dict[bytes, int] = {}
+        # 当前输入文件：对象 -> 输出对象编号
+        self._ids: Dict[ObjectKey, int] = {}
+        # 正在复制、尚未确定编号的去重候选对象（用于处理引用环）
+        self._pending: Dict[ObjectKey, Optional[int]] = {}
+
+    def copy_pages(self, reader: PdfReader) -> int:
+        """
+        复制一个文件的所有页面
+
+        页面继承的属性（Resources、MediaBox等）写入页面本身；每复制完一页清空读取缓存，
+        已复制对象的内容随即释放。
+
+        Args:
+            reader: 输入文件
+
+        Returns:
+            复制的页数
+        """
+        self._ids = {}
+        self._pending = {}
+        pages = list(reader.pages)
+        # 先为所有页面分配编号，链接等跨页引用可以直接指向输出中的页面
+        page_ids = []
+        for page in pages:
+            page_id = self.writer.reserve()
+            self._ids[object_key(page.indirect_reference)] = page_id
+            page_ids.append(page_id)
+
+        for page, page_id in zip(pages, page_ids):
+            self.writer.append_page(page_id, {
+                str(key)[1:]: pdf_value(value, self._ref_id)
+                for key, value in page.items() if key not in PAGE_SKIP_KEYS
+            })
+            reader.resolved_objects.clear()
+        return len(pages)
+
+    def _ref_id(self, ref: IndirectObject) -> Optional[int]:
+        """间接引用对应的输出对象编号，第一次遇到时复制该对象"""
+        key = object_key(ref)
+        if key in self._ids:
+            return self._ids[key]
+        if key in self._pending:
+            # 去重候选对象被自己的子对象引用（引用环），只能按原样写出，先分配编号
+            if self._pending[key] is None:
+                self._pending[key] = self.writer.reserve()
+            return self._pending[key]
+
+        obj = ref.get_object()
+        if obj is None or isinstance(obj, NullObject):
+            return None
+        if isinstance(obj, DictionaryObject) and obj.get("/Type") in STOP_TYPES:
+            return None
+
+        candidate = self.dedupe and (
+            isinstance(obj, StreamObject)
+            or (isinstance(obj, DictionaryObject) and obj.get("/Type") in DEDUPE_TYPES)
+        )
+        if not candidate:
+            obj_id = self._ids[key] = self.writer.reserve()
+            self.writer.write_object(obj_id, *pdf_object(obj, self._ref_id))
+            return obj_id
+
+        # 子对象先复制（相同的子对象已去重为同一编号），再按内容摘要判断是否已有相同对象
+        self._pending[key] = None
+        value, stream = pdf_object(obj, self._ref_id)
+        obj_id = self._pending.pop(key)
+        if obj_id is None:
+            content = serialize(value) if stream is None else serialize(value) + b"\nstream\n" + stream
+            digest = hashlib.sha256(content).digest()
+            if digest in self._digests:
+                self.deduplicated += 1
+                self._ids[key] = self._digests[digest]
+                return self._ids[key]
+            obj_id = self._digests[digest] = self.writer.reserve()
+        self._ids[key] = obj_id
+        self.writer.write_object(obj_id, value, stream)
+        return obj_id
+
+
+def merge_pdfs(
+    pdf_paths: List[Union[str, Path]],
+    output: Union[str, Path, BinaryIO],
+    info: Optional[Dict[str, str]] = None,
+    dedupe: bool = True
+) -> Dict[str, int]:
+    """
+    流式合并多个PDF
+
+    Args:
+        pdf_paths: 输入PDF路径列表（按顺序合并）
+        output: 输出路径或可写的二进制文件对象
+        info: 文档信息（Title、Producer等）
+        dedupe: 是否按内容去重资源
+
+    Returns:
+        {"pages": 总页数, "deduplicated": 去重省掉的对象数}
+    """
+    with PdfStreamWriter(output, info=info) as writer:
+        copier = PdfObjectCopier(writer, dedupe)
+        for pdf_path in pdf_paths:
+            with open(pdf_path, "rb") as f:
+                reader = PdfReader(f)
+                if reader.is_encrypted:
+                    raise Exception(f"不支持加密的PDF: {Path(pdf_path).name}")
+                copier.copy_pages(reader)
+
+    logger.debug(f"PDF合并: {len(pdf_paths)}个文件，{writer.page_count}页，去重{copier.deduplicated}个对象")
+    return {"pages": writer.page_count, "deduplicated": copier.deduplicated}
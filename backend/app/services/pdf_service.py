@@ -1,14 +1,24 @@
 """
 PDF服务
 """
+import asyncio
 import logging
 import os
+from collections import deque
 from pathlib import Path
-from typing import List
-from PIL import Image
-from PyPDF2 import PdfWriter
+from typing import Any, Dict, List, Tuple, Union
+from PIL import Image, ImageOps
 import uuid
 
+from app.core.config import settings
+from app.core.errors import RequestRejectedError
+from app.services.enhance_engine import enhance_engine
+from app.services.image_executor import image_executor
+from app.services.image_service import decode_image, to_bilevel
+from app.services.pdf_linearize import linearize_pdf
+from app.services.pdf_merge import merge_pdfs
+from app.services.pdf_writer import PAGE_SIZES, PdfImage, PdfStreamWriter, TextLine
+
 logger = logging.getLogger(__name__)
 
 
@@ -20,82 +30,234 @@ class PDFService:
         self.output_dir = Path("static/pdfs")
         self.output_dir.mkdir(parents=True, exist_ok=True)
 
-    async def create_pdf(self, image_paths: List[str], filename: str = None) -> str:
+    async def create_pdf(
+        self,
+        image_paths: List[str],
+        filename: str = None,
+        bilevel: bool = False,
+        page_size: str = None,
+        dpi: float = None,
+        searchable: bool = False,
+        lang: str = "ch"
+    ) -> str:
         """
         创建PDF（从图片）
 
         Args:
             image_paths: 图片路径列表
             filename: 输出文件名
+            bilevel: 扫描模式：页面二值化为1位图，以CCITT G4压缩嵌入
+            page_size: 页面尺寸：auto（按图片像素和DPI）或A4/Letter等纸张，默认使用配置
+            dpi: auto模式下图片的分辨率，默认使用配置
+            searchable: 可搜索PDF：对每页做OCR，识别结果作为不可见文字层与图片对齐
+            lang: 可搜索PDF的OCR语言类型
 
         Returns:
             PDF文件路径
         """
+        if page_size and page_size != "auto" and page_size not in PAGE_SIZES:
+            raise RequestRejectedError(f"不支持的页面尺寸: {page_size}，可选: auto, {', '.join(PAGE_SIZES)}")
+
+        if searchable:
+            return await self._create_searchable_pdf(image_paths, filename, bilevel, page_size, dpi, lang)
+
+        # 图片解码和PDF编码在图像处理工作进程中执行
+        return await image_executor.run(self._create_pdf_sync, image_paths, filename, bilevel, page_size, dpi)
+
+    def _output_paths(self, filename: str = None) -> Tuple[str, Path, Path]:
+        """输出文件名、PDF路径和写入用的临时路径（写完再改名，下载方不会拿到写了一半的PDF）"""
+        if filename is None:
+            filename = f"document_{uuid.uuid4()}.pdf"
+        pdf_path = self.output_dir / filename
+        return filename, pdf_path, pdf_path.with_name(f"{pdf_path.name}.{uuid.uuid4().hex}.tmp")
+
+    @staticmethod
+    def _open_writer(tmp_path: Path, pdf_path: Path, page_size: str = None, dpi: float = None) -> PdfStreamWriter:
+        return PdfStreamWriter(
+            tmp_path,
+            page_size=page_size or settings.PDF_PAGE_SIZE,
+            dpi=dpi or settings.PDF_DPI,
+            info={"Title": pdf_path.stem, "Producer": settings.PROJECT_NAME}
+        )
+
+    @staticmethod
+    def _load_page(image_path: str, bilevel: bool = False) -> Union[Image.Image, PdfImage]:
+        """
+        读取页面图片
+
+        JPEG文件（灰度/RGB、8位、哈夫曼编码）原样嵌入，EXIF方向用页面旋转表示，不解码也不重新编码；
+        1位图（二值化保存的扫描件）和扫描模式下的页面为mode "1"，以CCITT G4压缩嵌入；
+        其它页面按EXIF方向旋正后以JPEG嵌入。
+        """
+        if bilevel:
+            gray = decode_image(image_path, mode="L")
+            return to_bilevel(enhance_engine.apply(gray, "binarized", inplace=True))
+
+        jpeg = PdfImage.from_jpeg(image_path)
+        if jpeg is not None:
+            return jpeg
+
+        with Image.open(image_path) as image:
+            image = ImageOps.exif_transpose(image)
+            if image.mode not in ("1", "L", "RGB"):
+                image = image.convert("RGB")
+            return image
+
+    def _create_pdf_sync(
+        self,
+        image_paths: List[str],
+        filename: str = None,
+        bilevel: bool = False,
+        page_size: str = None,
+        dpi: float = None
+    ) -> str:
+        """创建PDF（同步执行）：逐页解码、编码、写出，同一时间只有一页在内存中"""
         try:
-            # 生成文件名
-            if filename is None:
-                filename = f"document_{uuid.uuid4()}.pdf"
-
-            pdf_path = self.output_dir / filename
-
-            # 创建PDF
-            pdf_writer = PdfWriter()
-
-            # 添加每一页
-            for image_path in image_paths:
-                # 读取图片
-                image = Image.open(image_path)
-
-                # 转换为RGB
-                if image.mode != 'RGB':
-                    image = image.convert('RGB')
-
-                # 添加到PDF
-                image.save(
-                    str(pdf_path),
-                    "PDF",
-                    resolution=100.0,
-                    save_all=True,
-                    append=False
-                )
+            filename, pdf_path, tmp_path = self._output_paths(filename)
 
-            logger.info(f"PDF创建成功: {pdf_path}")
+            try:
+                with self._open_writer(tmp_path, pdf_path, page_size, dpi) as writer:
+                    for image_path in image_paths:
+                        writer.add_image_page(self._load_page(image_path, bilevel), settings.PDF_JPEG_QUALITY)
+                tmp_path.replace(pdf_path)
+            finally:
+                tmp_path.unlink(missing_ok=True)
+
+            logger.info(f"PDF创建成功: {pdf_path}（{len(image_paths)}页）")
             return f"/static/pdfs/{filename}"
 
         except Exception as e:
             logger.error(f"PDF创建失败: {e}")
             raise Exception(f"PDF创建失败: {str(e)}")
 
-    async def merge_pdfs(self, pdf_paths: List[str], output_filename: str) -> str:
+    @classmethod
+    def _encode_page_sync(cls, image_path: str, bilevel: bool = False) -> PdfImage:
+        """读取并编码一页（在工作进程中执行，返回压缩后的数据）"""
+        page = cls._load_page(image_path, bilevel)
+        if isinstance(page, PdfImage):
+            return page
+        return PdfImage.from_image(page, settings.PDF_JPEG_QUALITY)
+
+    @staticmethod
+    def _text_lines(ocr_result: Dict[str, Any]) -> List[TextLine]:
+        """OCR结果转为文字层：每行取检测框的外接矩形"""
+        lines = []
+        for text, box in zip(ocr_result.get("texts", []), ocr_result.get("positions", [])):
+            xs = [float(point[0]) for point in box]
+            ys = [float(point[1]) for point in box]
+            lines.append((text, (min(xs), min(ys), max(xs), max(ys))))
+        return lines
+
+    async def _create_searchable_pdf(
+        self,
+        image_paths: List[str],
+        filename: str = None,
+        bilevel: bool = False,
+        page_size: str = None,
+        dpi: float = None,
+        lang: str = "ch"
+    ) -> str:
+        """
+        创建可搜索PDF
+
+        页面编码在图像处理工作进程中执行，OCR在OCR服务中执行，两者对多页同时进行；
+        按页序等到某页的编码和OCR都完成后写出该页。同时处理的页数有上限，
+        写出一页才开始下一页，内存占用与总页数无关。单页OCR失败时该页不带文字层。
+        """
+        # 工作进程反序列化PDF服务时不需要加载OCR模型相关的模块
+        from app.services.ocr_service import ocr_service
+
+        filename, pdf_path, tmp_path = self._output_paths(filename)
+        loop = asyncio.get_running_loop()
+        window = max(2, image_executor.workers * 2)
+
+        def start(image_path: str):
+            return (
+                asyncio.ensure_future(image_executor.run(self._encode_page_sync, image_path, bilevel)),
+                asyncio.ensure_future(ocr_service.ocr_image(image_path, lang)),
+            )
+
+        pending = deque(start(path) for path in image_paths[:window])
+        upcoming = iter(image_paths[window:])
+        writer = None
+        try:
+            writer = self._open_writer(tmp_path, pdf_path, page_size, dpi)
+            for i in range(len(image_paths)):
+                page_task, ocr_task = pending.popleft()
+                next_path = next(upcoming, None)
+                if next_path is not None:
+                    pending.append(start(next_path))
+
+                page = await page_task
+                try:
+                    text = self._text_lines(await ocr_task)
+                except Exception as e:
+                    logger.warning(f"第{i+1}页OCR失败，该页不带文字层: {e}")
+                    text = None
+                await loop.run_in_executor(None, writer.add_image_page, page, settings.PDF_JPEG_QUALITY, text)
+
+            await loop.run_in_executor(None, writer.close)
+            tmp_path.replace(pdf_path)
+            logger.info(f"可搜索PDF创建成功: {pdf_path}（{len(image_paths)}页）")
+            return f"/static/pdfs/{filename}"
+
+        except RequestRejectedError:
+            raise
+        except Exception as e:
+            logger.error(f"PDF创建失败: {e}")
+            raise Exception(f"PDF创建失败: {str(e)}")
+        finally:
+            for task in (task for tasks in pending for task in tasks):
+                task.cancel()
+            await asyncio.gather(*(task for tasks in pending for task in tasks), return_exceptions=True)
+            if writer is not None:
+                writer.abort()
+            tmp_path.unlink(missing_ok=True)
+
+    async def merge_pdfs(self, pdf_paths: List[str], output_filename: str, linearize: bool = None) -> str:
         """
         合并多个PDF
 
         Args:
             pdf_paths: PDF路径列表
             output_filename: 输出文件名
+            linearize: 是否线性化（Fast Web View，网页查看时先显示第一页），默认使用配置
 
         Returns:
             合并后的PDF路径
         """
-        try:
-            output_path = self.output_dir / output_filename
-            pdf_writer = PdfWriter()
+        if linearize is None:
+            linearize = settings.PDF_MERGE_LINEARIZE
+        return await image_executor.run(self._merge_pdfs_sync, pdf_paths, output_filename, linearize)
 
-            # 读取所有PDF
-            for pdf_path in pdf_paths:
-                from PyPDF2 import PdfReader
-                reader = PdfReader(pdf_path)
+    def _merge_pdfs_sync(self, pdf_paths: List[str], output_filename: str, linearize: bool = False) -> str:
+        """
+        合并多个PDF（同步执行）
 
-                # 添加所有页面
-                for page in reader.pages:
-                    pdf_writer.add_page(page)
+        页面对象按需读取、逐页写出，相同的字体和图片只保留一份，内存占用与输入文件大小无关
+        """
+        try:
+            filename, pdf_path, tmp_path = self._output_paths(output_filename)
+            merged_path = tmp_path.with_name(f"{tmp_path.name}.merged")
 
-            # 保存
-            with open(output_path, "wb") as output_file:
-                pdf_writer.write(output_file)
+            try:
+                result = merge_pdfs(
+                    pdf_paths,
+                    merged_path if linearize else tmp_path,
+                    info={"Title": pdf_path.stem, "Producer": settings.PROJECT_NAME}
+                )
+                if linearize:
+                    linearize_pdf(merged_path, tmp_path)
+                tmp_path.replace(pdf_path)
+            finally:
+                merged_path.unlink(missing_ok=True)
+                tmp_path.unlink(missing_ok=True)
 
-            logger.info(f"PDF合并成功: {output_path}")
-            return f"/static/pdfs/{output_filename}"
+            logger.info(
+                f"PDF合并成功: {pdf_path}（{len(pdf_paths)}个文件，{result['pages']}页，"
+                f"去重{result['deduplicated']}个对象）"
+            )
+            return f"/static/pdfs/{filename}"
 
         except Exception as e:
             logger.error(f"PDF合并失败: {e}")
@@ -0,0 +1,509 @@
+"""
+流式PDF写入器 - 逐页追加，写完一页即释放该页的图片数据
+
+对象写入文件时只记录字节偏移，页面树、目录和交叉引用表在关闭时写出，
+内存占用与页数无关（只保留每页一个对象编号）。页面图片按模式选择压缩方式：
+1位图为CCITT G4，灰度和彩色为JPEG（DCTDecode）；本身就是JPEG的文件原样嵌入，不重新编码。
+页面可以附带OCR文字层（不可见文字，与图片中的文字位置对齐），生成可搜索、可复制文字的PDF。
+"""
+import io
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, List, Optional, Sequence, Tuple, Union
+
+from PIL import Image
+
+# 可以原样嵌入PDF的JPEG帧类型：基线、扩展顺序、渐进（均为哈夫曼编码，PDF 1.3起支持渐进）
+PASSTHROUGH_SOF = {0xC0, 0xC1, 0xC2}
+# 其余SOF标记（无损、算术编码等），不能直接嵌入
+_OTHER_SOF = {0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+# EXIF方向 -> 页面顺时针旋转角度（镜像方向无法用/Rotate表示，需要重新编码）
+EXIF_ROTATION = {1: 0, 3: 180, 6: 90, 8: 270}
+
+# 文件头（第二行的高位字节表示文件包含二进制数据）
+PDF_HEADER = b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n"
+
+# 常用纸张尺寸（点，1/72英寸，纵向）
+PAGE_SIZES: Dict[str, Tuple[float, float]] = {
+    "A3": (841.89, 1190.55),
+    "A4": (595.28, 841.89),
+    "A5": (419.53, 595.28),
+    "Letter": (612.0, 792.0),
+    "Legal": (612.0, 1008.0),
+}
+
+
+# 文字层字体：Adobe-GB1的非嵌入CID字体，阅读器都内置；文字不可见，字形本身不重要，
+# 只需要字符宽度让选中范围与图片中的文字对齐（CID 1-95和814-939为半角字符）
+TEXT_FONT = "STSong-Light"
+TEXT_FONT_ENCODING = "UniGB-UCS2-H"
+TEXT_FONT_WIDTHS = [1, 95, 500, 814, 939, 500]
+# 字形在字号中的下沿位置（基线以下的部分）
+TEXT_FONT_DESCENT = 0.12
+
+# 文字行：(文本, (x0, y0, x1, y1)) ，坐标为旋正后图片的像素坐标，原点在左上角
+TextLine = Tuple[str, Sequence[float]]
+
+
+class Name(str):
+    """PDF名称对象（/Name）"""
+
+
+class Ref:
+    """PDF间接引用（n 0 R）"""
+
+    def __init__(self, obj_id: int):
+        self.obj_id = obj_id
+
+
+def pdf_text(text: str) -> bytes:
+    """PDF文本字符串（UTF-16BE，十六进制）"""
+    return b"<FEFF" + text.encode("utf-16-be").hex().upper().encode() + b">"
+
+
+def serialize(value: Any) -> bytes:
+    """把Python值序列化为PDF对象"""
+    if isinstance(value, bool):
+        return b"true" if value else b"false"
+    if isinstance(value, Name):
+        return b"/" + value.encode()
+    if isinstance(value, Ref):
+        return b"%d 0 R" % value.obj_id
+    if isinstance(value, int):
+        return b"%d" % value
+    if isinstance(value, float):
+        return (b"%.4f" % value).rstrip(b"0").rstrip(b".")
+    if isinstance(value, bytes):
+        # 已经序列化好的对象（字符串、内容片段等）
+        return value
+    if isinstance(value, str):
+        return pdf_text(value)
+    if isinstance(value, (list, tuple)):
+        return b"[" + b" ".join(serialize(v) for v in value) + b"]"
+    if isinstance(value, dict):
+        items = b" ".join(b"/" + k.encode() + b" " + serialize(v) for k, v in value.items() if v is not None)
+        return b"<< " + items + b" >>"
+    raise TypeError(f"不支持的PDF对象类型: {type(value)}")
+
+
+class PdfImage:
+    """已编码的页面图片（PDF图像XObject）"""
+
+    def __init__(self, width: int, height: int, data: bytes, params: Dict[str, Any], rotate: int = 0):
+        """
+        Args:
+            width: 像素宽度
+            height: 像素高度
+            data: 压缩后的图像数据
+            params: 图像字典中的其余条目（ColorSpace、BitsPerComponent、Filter等）
+            rotate: 页面显示时的顺时针旋转角度（原样嵌入带EXIF方向的JPEG时使用）
+        """
+        self.width = width
+        self.height = height
+        self.data = data
+        self.params = params
+        self.rotate = rotate
+
+    @classmethod
+    def from_jpeg(cls, path: Union[str, Path]) -> Optional["PdfImage"]:
+        """
+        原样嵌入JPEG文件（DCTDecode），不解码也不重新编码
+
+        Args:
+            path: 图片路径
+
+        Returns:
+            PdfImage；不是可直接嵌入的JPEG（CMYK、12位、算术编码、镜像方向等）时返回None
+        """
+        with open(path, "rb") as f:
+            data = f.read()
+        info = jpeg_info(data)
+        if info is None or info["sof"] not in PASSTHROUGH_SOF or info["precision"] != 8:
+            return None
+        if info["components"] not in (1, 3):
+            return None
+
+        with Image.open(io.BytesIO(data)) as image:
+            orientation = image.getexif().get(0x0112, 1)
+        if orientation not in EXIF_ROTATION:
+            return None
+
+        params = {
+            "ColorSpace": Name("DeviceGray" if info["components"] == 1 else "DeviceRGB"),
+            "BitsPerComponent": 8,
+            "Filter": Name("DCTDecode"),
+        }
+        if info["components"] == 3 and info["adobe_transform"] == 0:
+            # Adobe标记声明未做YCbCr变换（RGB直接编码）
+            params["DecodeParms"] = {"ColorTransform": 0}
+        return cls(info["width"], info["height"], data, params, rotate=EXIF_ROTATION[orientation])
+
+    @classmethod
+    def from_image(cls, image: Image.Image, jpeg_quality: int = 85) -> "PdfImage":
+        """
+        编码PIL图片
+
+        Args:
+            image: 1位图（mode "1"）、灰度图（L）或彩色图（RGB），其它模式转为RGB
+            jpeg_quality: 灰度和彩色页面的JPEG质量
+
+        Returns:
+            PdfImage
+        """
+        width, height = image.size
+        if image.mode == "1":
+            return cls(width, height, encode_g4(image), {
+                "ColorSpace": Name("DeviceGray"),
+                "BitsPerComponent": 1,
+                "Filter": Name("CCITTFaxDecode"),
+                "DecodeParms": {"K": -1, "BlackIs1": True, "Columns": width, "Rows": height},
+            })
+
+        if image.mode not in ("L", "RGB"):
+            image = image.convert("RGB")
+        buffer = io.BytesIO()
+        image.save(buffer, "JPEG", quality=jpeg_quality)
+        return cls(width, height, buffer.getvalue(), {
+            "ColorSpace": Name("DeviceGray" if image.mode == "L" else "DeviceRGB"),
+            "BitsPerComponent": 8,
+            "Filter": Name("DCTDecode"),
+        })
+
+
+def jpeg_info(data: bytes) -> Optional[Dict[str, int]]:
+    """
+    解析JPEG头部，直到帧头（SOF）为止
+
+    Args:
+        data: JPEG文件内容
+
+    Returns:
+        {"sof": 帧类型, "precision": 位深, "width", "height", "components", "adobe_transform"}；
+        不是JPEG或头部损坏时返回None
+    """
+    if not data.startswith(b"\xff\xd8"):
+        return None
+    adobe_transform = None
+    pos = 2
+    while pos + 4 <= len(data):
+        if data[pos] != 0xFF:
+            return None
+        marker = data[pos + 1]
+        if marker == 0xFF:
+            # 填充字节
+            pos += 1
+            continue
+        length = int.from_bytes(data[pos + 2:pos + 4], "big")
+        segment = data[pos + 4:pos + 2 + length]
+        if marker == 0xEE and segment.startswith(b"Adobe") and len(segment) >= 12:
+            adobe_transform = segment[11]
+        elif marker in PASSTHROUGH_SOF or marker in _OTHER_SOF:
+            if len(segment) < 6:
+                return None
+            return {
+                "sof": marker,
+                "precision": segment[0],
+                "height": int.from_bytes(segment[1:3], "big"),
+                "width": int.from_bytes(segment[3:5], "big"),
+                "components": segment[5],
+                "adobe_transform": adobe_transform,
+            }
+        elif marker == 0xDA:
+            # 扫描数据之前没有帧头
+            return None
+        pos += 2 + length
+    return None
+
+
+def encode_g4(image: Image.Image) -> bytes:
+    """
+    1位图编码为CCITT G4数据
+
+    借助libtiff编码为单条带的G4 TIFF，再按StripOffsets取出压缩数据。
+    """
+    width, height = image.size
+    buffer = io.BytesIO()
+    image.save(buffer, "TIFF", compression="group4", strip_size=(width + 7) // 8 * height)
+    with Image.open(buffer) as tiff:
+        offset = tiff.tag_v2[273][0]
+        length = tiff.tag_v2[279][0]
+    return buffer.getvalue()[offset:offset + length]
+
+
+def object_parts(obj_id: int, value: Any, stream: bytes = None) -> List[bytes]:
+    """
+    间接对象的字节片段（数据流单独成片，写出时不需要拼接）
+
+    Args:
+        obj_id: 对象编号
+        value: 对象内容（有stream时为流字典）
+        stream: 流数据
+
+    Returns:
+        依次写出即为完整对象的字节片段
+    """
+    if stream is None:
+        return [b"%d 0 obj\n" % obj_id, serialize(value), b"\nendobj\n"]
+    return [
+        b"%d 0 obj\n" % obj_id,
+        serialize({**value, "Length": len(stream)}),
+        b"\nstream\n",
+        stream,
+        b"\nendstream\nendobj\n",
+    ]
+
+
+def text_layer(lines: Sequence[TextLine], image: PdfImage, placement: Tuple[float, float, float, float]) -> bytes:
+    """
+    生成不可见文字层的页面内容（文字渲染模式3）
+
+    先用一个变换把旋正后图片的像素坐标（y轴向下）映射到页面上图片所在的区域，
+    每行文字再按文字框缩放：字号等于框高，水平方向拉伸到框宽。
+
+    Args:
+        lines: 文字行
+        image: 页面图片（用到尺寸和旋转角度）
+        placement: 图片在页面上的 (宽, 高, x, y)，单位为点
+
+    Returns:
+        内容流片段
+    """
+    w, h, x, y = placement
+    kx, ky = w / image.width, h / image.height
+    # 旋正后的像素坐标 -> 页面坐标（页面显示时再按/Rotate旋转）
+    matrix = {
+        0: (kx, 0, 0, -ky, x, y + h),
+        90: (0, ky, kx, 0, x, y),
+        180: (-kx, 0, 0, ky, x + w, y),
+        270: (0, -ky, -kx, 0, x + w, y + h),
+    }[image.rotate % 360]
+
+    parts = [b"q %s cm BT 3 Tr /F1 1 Tf\n" % b" ".join(serialize(float(v)) for v in matrix)]
+    for line, box in lines:
+        # 字体编码为UCS-2，基本平面以外的字符无法表示
+        line = "".join(ch for ch in line if ord(ch) <= 0xFFFF)
+        x0, y0, x1, y1 = (float(v) for v in box)
+        size = y1 - y0
+        if not line.strip() or size <= 0 or x1 <= x0:
+            continue
+        advance = sum(0.5 if ord(ch) < 0x80 else 1.0 for ch in line)
+        parts.append(b"%s 0 0 %s %s %s Tm <%s> Tj\n" % (
+            serialize((x1 - x0) / advance),
+            serialize(-size),
+            serialize(x0),
+            serialize(y1 - size * TEXT_FONT_DESCENT),
+            line.encode("utf-16-be").hex().upper().encode()
+        ))
+    parts.append(b"ET Q\n")
+    return b"".join(parts)
+
+
+class PdfStreamWriter:
+    """流式PDF写入器"""
+
+    # 目录和页面树的对象编号固定，页面对象可以在写出页面树之前引用它
+    CATALOG_ID = 1
+    PAGES_ID = 2
+
+    def __init__(
+        self,
+        output: Union[str, Path, BinaryIO],
+        page_size: str = "auto",
+        dpi: float = 150.0,
+        info: Optional[Dict[str, str]] = None
+    ):
+        """
+        Args:
+            output: 输出路径或可写的二进制文件对象
+            page_size: auto（按图片像素和DPI确定页面大小）或 PAGE_SIZES 中的纸张（图片等比缩放居中）
+            dpi: auto模式下图片的分辨率
+            info: 文档信息（Title、Author等）
+        """
+        if page_size != "auto" and page_size not in PAGE_SIZES:
+            raise Exception(f"不支持的页面尺寸: {page_size}")
+        self.page_size = page_size
+        self.dpi = dpi
+        self.info = info or {}
+
+        self._own_file = not hasattr(output, "write")
+        self._fp: BinaryIO = open(output, "wb") if self._own_file else output
+        self._offsets: Dict[int, int] = {}
+        self._next_id = self.PAGES_ID + 1
+        self._pages: List[int] = []
+        self._font_id: Optional[int] = None
+        self._closed = False
+
+        self._fp.write(PDF_HEADER)
+
+    @property
+    def page_count(self) -> int:
+        return len(self._pages)
+
+    def reserve(self) -> int:
+        """分配一个对象编号"""
+        obj_id = self._next_id
+        self._next_id += 1
+        return obj_id
+
+    def write_object(self, obj_id: int, value: Any, stream: bytes = None):
+        """
+        写出一个间接对象
+
+        Args:
+            obj_id: 对象编号
+            value: 对象内容（有stream时为流字典）
+            stream: 流数据
+        """
+        self._offsets[obj_id] = self._fp.tell()
+        for part in object_parts(obj_id, value, stream):
+            self._fp.write(part)
+
+    def _layout(self, width: int, height: int) -> Tuple[float, float, Tuple[float, float, float, float]]:
+        """页面大小和图片位置：(页宽, 页高, (图宽, 图高, x, y))，单位为点"""
+        if self.page_size == "auto":
+            w, h = width * 72.0 / self.dpi, height * 72.0 / self.dpi
+            return w, h, (w, h, 0.0, 0.0)
+
+        page_w, page_h = PAGE_SIZES[self.page_size]
+        if width > height:
+            page_w, page_h = page_h, page_w
+        scale = min(page_w / width, page_h / height)
+        w, h = width * scale, height * scale
+        return page_w, page_h, (w, h, (page_w - w) / 2, (page_h - h) / 2)
+
+    def _text_font(self) -> int:
+        """文字层字体的对象编号，第一次使用时写出，所有页面共用"""
+        if self._font_id is None:
+            self._font_id, cid_font_id, descriptor_id = self.reserve(), self.reserve(), self.reserve()
+            self.write_object(descriptor_id, {
+                "Type": Name("FontDescriptor"),
+                "FontName": Name(TEXT_FONT),
+                "Flags": 6,
+                "FontBBox": [-25, -254, 1000, 880],
+                "ItalicAngle": 0,
+                "Ascent": 880,
+                "Descent": -120,
+                "CapHeight": 880,
+                "StemV": 93,
+            })
+            self.write_object(cid_font_id, {
+                "Type": Name("Font"),
+                "Subtype": Name("CIDFontType0"),
+                "BaseFont": Name(TEXT_FONT),
+                "CIDSystemInfo": {"Registry": b"(Adobe)", "Ordering": b"(GB1)", "Supplement": 2},
+                "FontDescriptor": Ref(descriptor_id),
+                "DW": 1000,
+                "W": TEXT_FONT_WIDTHS,
+            })
+            self.write_object(self._font_id, {
+                "Type": Name("Font"),
+                "Subtype": Name("Type0"),
+                "BaseFont": Name(TEXT_FONT),
+                "Encoding": Name(TEXT_FONT_ENCODING),
+                "DescendantFonts": [Ref(cid_font_id)],
+            })
+        return self._font_id
+
+    def add_image_page(
+        self,
+        image: Union[Image.Image, PdfImage],
+        jpeg_quality: int = 85,
+        text: Optional[Sequence[TextLine]] = None
+    ) -> int:
+        """
+        追加一页，页面内容为一张铺满（或等比居中）的图片
+
+        Args:
+            image: PIL图片或已编码的PdfImage
+            jpeg_quality: PIL图片编码为JPEG时的质量
+            text: OCR文字层，坐标为旋正后图片的像素坐标（带旋转的JPEG按显示方向）
+
+        Returns:
+            页码（从0开始）
+        """
+        if not isinstance(image, PdfImage):
+            image = PdfImage.from_image(image, jpeg_quality)
+
+        page_w, page_h, (w, h, x, y) = self._layout(image.width, image.height)
+
+        image_id = self.reserve()
+        self.write_object(image_id, {
+            "Type": Name("XObject"),
+            "Subtype": Name("Image"),
+            "Width": image.width,
+            "Height": image.height,
+            **image.params
+        }, image.data)
+
+        contents_id = self.reserve()
+        content = b"q %s 0 0 %s %s %s cm /Im0 Do Q\n" % tuple(serialize(float(v)) for v in (w, h, x, y))
+        resources = {"XObject": {"Im0": Ref(image_id)}}
+        if text:
+            content += text_layer(text, image, (w, h, x, y))
+            resources["Font"] = {"F1": Ref(self._text_font())}
+        self.write_object(contents_id, {}, content)
+
+        return self.append_page(self.reserve(), {
+            "MediaBox": [0, 0, float(page_w), float(page_h)],
+            "Resources": resources,
+            "Contents": Ref(contents_id),
+            "Rotate": image.rotate or None,
+        })
+
+    def append_page(self, page_id: int, page: Dict[str, Any]) -> int:
+        """
+        写出页面对象并追加到页面树
+
+        Args:
+            page_id: 页面的对象编号（预先分配，其它对象可以先引用它）
+            page: 页面字典（MediaBox、Resources、Contents等，不含Parent）
+
+        Returns:
+            页码（从0开始）
+        """
+        self.write_object(page_id, {"Type": Name("Page"), "Parent": Ref(self.PAGES_ID), **page})
+        self._pages.append(page_id)
+        return len(self._pages) - 1
+
+    def close(self):
+        """写出页面树、目录、文档信息和交叉引用表"""
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self.write_object(self.PAGES_ID, {
+                "Type": Name("Pages"),
+                "Kids": [Ref(page_id) for page_id in self._pages],
+                "Count": len(self._pages),
+            })
+            self.write_object(self.CATALOG_ID, {"Type": Name("Catalog"), "Pages": Ref(self.PAGES_ID)})
+
+            info_id = None
+            if self.info:
+                info_id = self.reserve()
+                self.write_object(info_id, dict(self.info))
+
+            xref_offset = self._fp.tell()
+            self._fp.write(b"xref\n0 %d\n0000000000 65535 f \n" % self._next_id)
+            for obj_id in range(1, self._next_id):
+                self._fp.write(b"%010d 00000 n \n" % self._offsets[obj_id])
+            trailer = {"Size": self._next_id, "Root": Ref(self.CATALOG_ID), "Info": Ref(info_id) if info_id else None}
+            self._fp.write(b"trailer\n" + serialize(trailer) + b"\nstartxref\n%d\n%%%%EOF\n" % xref_offset)
+            self._fp.flush()
+        finally:
+            if self._own_file:
+                self._fp.close()
+
+    def abort(self):
+        """放弃写入（出错时），关闭文件但不写出结尾"""
+        self._closed = True
+        if self._own_file:
+            self._fp.close()
+
+    def __enter__(self) -> "PdfStreamWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
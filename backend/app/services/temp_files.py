@@ -0,0 +1,217 @@
+"""
+临时文件管理 - 上传文件和中间结果的生命周期
+
+请求内创建的临时文件登记到请求作用域，作用域结束时（包括异常退出）统一删除；
+返回给客户端的结果文件从作用域中移出，由后台清理任务按保留时间和目录总大小回收。
+配置 TEMP_RAM_DIR 后临时文件放在内存文件系统（如 /dev/shm），不占用磁盘I/O。
+"""
+import asyncio
+import logging
+import os
+import shutil
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set, Union
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+_removed = metrics.counter("temp_files_removed", "请求结束时删除的临时文件数")
+_swept = metrics.counter("temp_files_swept", "后台清理删除的临时文件数")
+
+
+class TempScope:
+    """请求作用域：登记的临时文件在作用域结束时删除"""
+
+    def __init__(self, manager: "TempFileManager"):
+        self.manager = manager
+        self.paths: List[str] = []
+
+    def track(self, path: Union[str, Path]) -> str:
+        """登记临时文件，返回原路径"""
+        path = str(path)
+        self.paths.append(path)
+        self.manager.active.add(path)
+        return path
+
+    def path(self, suffix: str = "") -> str:
+        """生成一个登记在作用域内的临时文件路径"""
+        return self.track(self.manager.path(suffix))
+
+    def release(self, path: Union[str, Path]) -> str:
+        """把文件移出作用域（作为结果返回的文件），交给后台清理回收"""
+        path = str(path)
+        if path in self.paths:
+            self.paths.remove(path)
+            self.manager.active.discard(path)
+        return path
+
+    def close(self):
+        """删除作用域内的所有临时文件"""
+        for path in self.paths:
+            self.manager.active.discard(path)
+            try:
+                os.unlink(path)
+                _removed.inc()
+            except FileNotFoundError:
+                # 处理流程中已经删除（例如增强、裁剪后删除原图）
+                pass
+            except OSError as e:
+                logger.warning(f"临时文件删除失败: {path}: {e}")
+        self.paths = []
+
+
+class TempFileManager:
+    """临时文件管理器"""
+
+    def __init__(
+        self,
+        root: Union[str, Path] = None,
+        max_age: int = None,
+        max_size_mb: int = None
+    ):
+        """
+        初始化临时文件管理器
+
+        Args:
+            root: 临时目录，默认使用 TEMP_RAM_DIR（可用时）或磁盘上的 temp 目录
+            max_age: 临时文件最长保留时间（秒）
+            max_size_mb: 临时目录最大占用（MB），0表示不限制
+        """
+        self.root = Path(root) if root else self._default_root()
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_age = max_age if max_age is not None else settings.TEMP_MAX_AGE
+        self.max_size = (max_size_mb if max_size_mb is not None else settings.TEMP_MAX_SIZE_MB) * 1024 * 1024
+        # 进行中的请求登记的文件，后台清理不会删除
+        self.active: Set[str] = set()
+        self._sweeper: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def _default_root() -> Path:
+        if settings.TEMP_RAM_DIR:
+            ram_dir = Path(settings.TEMP_RAM_DIR)
+            if ram_dir.parent.is_dir():
+                return ram_dir
+            logger.warning(f"内存临时目录不可用，使用磁盘临时目录: {ram_dir}")
+        return Path("temp")
+
+    def path(self, suffix: str = "") -> Path:
+        """生成一个唯一的临时文件路径（不创建文件）"""
+        return self.root / f"{uuid.uuid4()}{suffix}"
+
+    @contextmanager
+    def scope(self) -> Iterator[TempScope]:
+        """
+        请求作用域
+
+        路由中通过 Depends(temp_scope) 获取，也可以直接使用:
+            with temp_files.scope() as scope:
+                path = scope.track(await image_service.save_upload_file(file))
+        """
+        scope = TempScope(self)
+        try:
+            yield scope
+        finally:
+            scope.close()
+
+    def persist(self, path: Union[str, Path], target_dir: Union[str, Path]) -> str:
+        """
+        把临时文件移到持久目录（作为文档保存），后台清理不会再删除
+
+        Args:
+            path: 临时文件路径
+            target_dir: 目标目录
+
+        Returns:
+            新路径
+        """
+        target_dir = Path(target_dir)
+        target_dir.mkdir(parents=True, exist_ok=True)
+        target = target_dir / Path(path).name
+        # 内存文件系统与目标目录不在同一设备时rename会失败，shutil.move会回退为复制
+        shutil.move(str(path), target)
+        return str(target)
+
+    def sweep(self, now: float = None) -> int:
+        """
+        清理过期的临时文件，并在目录超过大小上限时从最旧的文件开始删除
+
+        Returns:
+            删除的文件数
+        """
+        now = now or time.time()
+        files = []
+        total = 0
+        with os.scandir(self.root) as entries:
+            for entry in entries:
+                if not entry.is_file(follow_symlinks=False) or entry.name.startswith("."):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+
+        removed = 0
+        for mtime, size, path in sorted(files):
+            expired = self.max_age and now - mtime > self.max_age
+            oversize = self.max_size and total > self.max_size
+            if not (expired or oversize):
+                break
+            if path in self.active:
+                continue
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+
+        if removed:
+            _swept.inc(removed)
+            logger.info(f"临时文件清理完成: 删除{removed}个文件，剩余{total // 1024}KB")
+        return removed
+
+    async def _sweep_loop(self, interval: float):
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                await loop.run_in_executor(None, self.sweep)
+            except Exception as e:
+                logger.error(f"临时文件清理失败: {e}")
+            await asyncio.sleep(interval)
+
+    def start_sweeper(self, interval: float = None):
+        """启动后台清理任务（需要在事件循环中调用）"""
+        if self._sweeper is None:
+            self._sweeper = asyncio.create_task(self._sweep_loop(interval or settings.TEMP_SWEEP_INTERVAL))
+
+    def stop_sweeper(self):
+        """停止后台清理任务"""
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            self._sweeper = None
+
+    def stats(self) -> Dict[str, Any]:
+        """临时目录状态"""
+        return {
+            "root": str(self.root),
+            "active": len(self.active),
+            "max_age": self.max_age,
+            "max_size_mb": self.max_size // (1024 * 1024)
+        }
+
+
+# 进程级单例
+temp_files = TempFileManager()
+
+
+def temp_scope() -> Iterator[TempScope]:
+    """路由依赖：请求结束后（包括出错时）删除本次请求登记的临时文件"""
+    with temp_files.scope() as scope:
+        yield scope
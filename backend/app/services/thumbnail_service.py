@@ -0,0 +1,147 @@
+"""
+缩略图服务 - 文档缩略图的生成与缓存
+
+文档保存时按配置的尺寸生成缩略图（WebP/JPEG），列表页只加载缩略图；
+旧文档没有缩略图时在第一次请求时补生成。缩略图按文档ID和尺寸命名，
+内容不会变化，可以让客户端长期缓存。
+"""
+import logging
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+import pypdfium2 as pdfium
+from PIL import Image, UnidentifiedImageError
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.services.image_executor import image_executor
+from app.services.image_service import UnsupportedFileTypeError, decode_image
+from app.services.pdf_input import pdf_input_service
+
+logger = logging.getLogger(__name__)
+
+# 格式 -> (Pillow格式名, 扩展名, 媒体类型)
+FORMATS = {
+    "webp": ("WEBP", "webp", "image/webp"),
+    "jpeg": ("JPEG", "jpg", "image/jpeg"),
+}
+
+# 计数器放在模块级：服务对象会被pickle到图像处理工作进程，不能持有锁
+_generated = metrics.counter("thumbnails_generated", "生成的缩略图数")
+_backfilled = metrics.counter("thumbnails_backfilled", "请求时补生成缩略图的文档数")
+
+
+class ThumbnailService:
+    """缩略图服务"""
+
+    def __init__(self, thumbnail_dir: Path = None, sizes: List[int] = None, fmt: str = None):
+        """
+        初始化缩略图服务
+
+        Args:
+            thumbnail_dir: 缩略图目录
+            sizes: 缩略图长边尺寸列表，第一个为默认尺寸
+            fmt: 缩略图格式（webp/jpeg）
+        """
+        self.thumbnail_dir = Path(thumbnail_dir or settings.THUMBNAIL_DIR)
+        self.sizes = list(sizes or settings.THUMBNAIL_SIZES)
+        fmt = fmt or settings.THUMBNAIL_FORMAT
+        if fmt not in FORMATS:
+            raise Exception(f"不支持的缩略图格式: {fmt}")
+        self.format, self.extension, self.media_type = FORMATS[fmt]
+
+    @property
+    def default_size(self) -> int:
+        return self.sizes[0]
+
+    def path_for(self, document_id: str, size: int = None) -> Path:
+        """缩略图路径"""
+        return self.thumbnail_dir / f"{document_id}_{size or self.default_size}.{self.extension}"
+
+    @staticmethod
+    def url_for(document_id: str) -> str:
+        """缩略图接口地址（默认尺寸）"""
+        return f"/api/v1/documents/{document_id}/thumbnail"
+
+    def generate_sync(self, source: Union[str, np.ndarray], document_id: str) -> Dict[int, str]:
+        """
+        生成所有尺寸的缩略图（同步执行）
+
+        图片只解码一次，且只解码到最大缩略图尺寸（JPEG在DCT域缩小），
+        较小的尺寸从较大的缩略图继续缩小。PDF文档按最大缩略图尺寸渲染第一页。
+
+        Args:
+            source: 原图或PDF路径，或已解码的图片数组
+            document_id: 文档ID
+
+        Returns:
+            尺寸 -> 缩略图路径
+        """
+        try:
+            largest = max(self.sizes)
+            if isinstance(source, np.ndarray):
+                image = Image.fromarray(source)
+                image.thumbnail((largest, largest), Image.Resampling.LANCZOS)
+            elif pdf_input_service.is_pdf(source):
+                image = pdf_input_service.render_page_sync(source, 0, largest)
+            else:
+                image = Image.fromarray(decode_image(source, largest, resample=Image.Resampling.LANCZOS))
+            if image.mode not in ("RGB", "L"):
+                image = image.convert("RGB")
+
+            self.thumbnail_dir.mkdir(parents=True, exist_ok=True)
+            paths = {}
+            for size in sorted(self.sizes, reverse=True):
+                image.thumbnail((size, size), Image.Resampling.LANCZOS)
+                path = self.path_for(document_id, size)
+                # 先写临时文件再改名，并发请求不会读到写了一半的缩略图
+                tmp_path = path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+                image.save(tmp_path, self.format, quality=settings.THUMBNAIL_QUALITY)
+                tmp_path.replace(path)
+                paths[size] = str(path)
+            return paths
+
+        except (UnidentifiedImageError, pdfium.PdfiumError) as e:
+            logger.warning(f"无法从文档生成缩略图: {e}")
+            raise UnsupportedFileTypeError(f"不支持生成缩略图的文档: {str(e)}")
+        except Exception as e:
+            logger.error(f"缩略图生成失败: {e}")
+            raise Exception(f"缩略图生成失败: {str(e)}")
+
+    async def generate(self, source: Union[str, np.ndarray], document_id: str) -> Dict[int, str]:
+        """生成所有尺寸的缩略图（在图像处理工作进程中执行）"""
+        paths = await image_executor.run(self.generate_sync, source, document_id)
+        _generated.inc(len(paths))
+        return paths
+
+    async def get_or_create(self, document_id: str, source_path: str, size: int = None) -> Optional[str]:
+        """
+        获取缩略图，不存在时从原图补生成
+
+        Args:
+            document_id: 文档ID
+            source_path: 原图路径
+            size: 缩略图尺寸，默认尺寸为第一个配置值
+
+        Returns:
+            缩略图路径，原图也不存在时返回None
+        """
+        path = self.path_for(document_id, size)
+        if path.exists():
+            return str(path)
+        if not source_path or not Path(source_path).exists():
+            return None
+        paths = await self.generate(source_path, document_id)
+        _backfilled.inc()
+        return paths[size or self.default_size]
+
+    def delete(self, document_id: str):
+        """删除文档的所有缩略图"""
+        for size in self.sizes:
+            self.path_for(document_id, size).unlink(missing_ok=True)
+
+
+# 进程级单例
+thumbnail_service = ThumbnailService()
@@ -0,0 +1,93 @@
+"""
+文档边界检测基准测试
+
+比较在原图上检测与在缩略图上检测（IMAGE_CROP_PROXY_SIDE）的耗时和角点精度。
+不指定图片时生成带已知角点的合成照片（1200万和4800万像素）。
+
+用法:
+    python benchmarks/auto_crop.py
+    python benchmarks/auto_crop.py photos/*.jpg --proxy-sides 0 600 800 1200
+"""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services.image_service import ImageService  # noqa: E402
+
+
+def synthetic_photo(width: int, height: int):
+    """深色背景上一张略微倾斜的白纸，返回 (灰度图, 真实角点)"""
+    image = np.full((height, width), 60, dtype=np.uint8)
+    noise = np.random.default_rng(0).integers(0, 20, size=(height, width), dtype=np.uint8)
+    image += noise
+    corners = np.array([
+        [width * 0.12, height * 0.08],
+        [width * 0.90, height * 0.11],
+        [width * 0.86, height * 0.93],
+        [width * 0.09, height * 0.89],
+    ], dtype=np.float32)
+    cv2.fillConvexPoly(image, corners.astype(np.int32), 235)
+    return image, corners
+
+
+def corner_error(found: np.ndarray, truth: np.ndarray) -> float:
+    """检测角点与真实角点的平均距离（像素）"""
+    service = ImageService()
+    return float(np.mean(np.linalg.norm(service._order_points(found) - service._order_points(truth), axis=1)))
+
+
+def run(service: ImageService, gray: np.ndarray, proxy_side: int, runs: int):
+    timings = []
+    quad = None
+    for _ in range(runs):
+        started = time.perf_counter()
+        quad = service.find_document_quad(gray, proxy_side)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings), quad
+
+
+def main():
+    parser = argparse.ArgumentParser(description="文档边界检测基准测试")
+    parser.add_argument("images", nargs="*", help="测试图片（默认生成合成照片）")
+    parser.add_argument("--proxy-sides", nargs="+", type=int, default=[0, 800], help="缩略图长边，0表示原图")
+    parser.add_argument("--runs", type=int, default=5, help="重复次数")
+    args = parser.parse_args()
+
+    service = ImageService()
+    cases = []
+    if args.images:
+        for path in args.images:
+            cases.append((Path(path).name, cv2.imread(path, cv2.IMREAD_GRAYSCALE), None))
+    else:
+        for width, height in ((4000, 3000), (8000, 6000)):
+            gray, truth = synthetic_photo(width, height)
+            cases.append((f"synthetic {width}x{height}", gray, truth))
+
+    print(f"{'图片':<26}{'缩略图长边':>10}{'耗时(ms)':>12}{'角点误差(px)':>14}")
+    for name, gray, truth in cases:
+        reference = None
+        for proxy_side in args.proxy_sides:
+            ms, quad = run(service, gray, proxy_side, args.runs)
+            if quad is None:
+                error = "未检测到"
+            elif truth is not None:
+                error = f"{corner_error(quad, truth):.2f}"
+            elif reference is not None:
+                # 真实图片以原图检测结果为基准
+                error = f"{corner_error(quad, reference):.2f}"
+            else:
+                error = "-"
+            if proxy_side == 0 and quad is not None:
+                reference = quad
+            print(f"{name:<26}{proxy_side or '原图':>10}{ms:>12.1f}{error:>14}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+图像增强基准测试
+
+比较原PIL链式增强（Contrast、Sharpness、MedianFilter）与增强引擎各预设的耗时和峰值内存。
+峰值内存在独立子进程中按最大常驻内存（ru_maxrss）减去图片载入后的基线计算。
+不指定图片时生成合成扫描件（1200万和4800万像素）。
+
+用法:
+    python benchmarks/enhance.py
+    python benchmarks/enhance.py scans/*.jpg --methods pil document grayscale
+"""
+import argparse
+import multiprocessing
+import resource
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image, ImageEnhance, ImageFilter
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services.enhance_engine import PRESETS, enhance_engine  # noqa: E402
+
+
+def synthetic_scan(width: int, height: int) -> np.ndarray:
+    """浅色纸张上的深色文字条纹加噪声"""
+    rng = np.random.default_rng(0)
+    image = np.full((height, width, 3), 215, dtype=np.uint8)
+    for y in range(0, height, 48):
+        image[y + 12:y + 30, width // 10:width - width // 10] = 40
+    image += rng.integers(0, 25, size=image.shape, dtype=np.uint8)
+    return image
+
+
+def pil_enhance(image: np.ndarray) -> np.ndarray:
+    """原PIL流程"""
+    pil = Image.fromarray(image)
+    pil = ImageEnhance.Contrast(pil).enhance(1.5)
+    pil = ImageEnhance.Sharpness(pil).enhance(1.5)
+    return np.asarray(pil.filter(ImageFilter.MedianFilter(size=3)))
+
+
+def _measure(method: str, image: np.ndarray, runs: int, queue):
+    """子进程中执行：返回 (中位耗时ms, 峰值内存增量MB)"""
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    timings = []
+    for _ in range(runs):
+        source = image.copy()
+        started = time.perf_counter()
+        if method == "pil":
+            pil_enhance(source)
+        else:
+            enhance_engine.apply(source, method, inplace=True)
+        timings.append((time.perf_counter() - started) * 1000)
+        del source
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    queue.put((statistics.median(timings), (peak - baseline) / 1024))
+
+
+def measure(method: str, image: np.ndarray, runs: int):
+    context = multiprocessing.get_context("fork")
+    queue = context.Queue()
+    process = context.Process(target=_measure, args=(method, image, runs, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="图像增强基准测试")
+    parser.add_argument("images", nargs="*", help="测试图片（默认生成合成扫描件）")
+    parser.add_argument("--methods", nargs="+", default=["pil"] + list(PRESETS), help="pil或增强预设名称")
+    parser.add_argument("--runs", type=int, default=3, help="重复次数")
+    args = parser.parse_args()
+
+    cases = []
+    if args.images:
+        for path in args.images:
+            cases.append((Path(path).name, np.array(Image.open(path).convert("RGB"))))
+    else:
+        for width, height in ((4000, 3000), (8000, 6000)):
+            cases.append((f"synthetic {width}x{height}", synthetic_scan(width, height)))
+
+    print(f"{'图片':<26}{'方法':>12}{'耗时(ms)':>12}{'峰值内存(MB)':>14}")
+    for name, image in cases:
+        for method in args.methods:
+            ms, peak_mb = measure(method, image, args.runs)
+            print(f"{name:<26}{method:>12}{ms:>12.1f}{peak_mb:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+OCR推理后端基准测试
+
+在同一批图片上比较各推理后端的加载时间、单图耗时和识别结果一致性。
+
+用法:
+    python benchmarks/ocr_backends.py images/*.jpg --backends paddle onnx onnx:int8
+"""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.core.config import settings  # noqa: E402
+from app.services.ocr_backends import get_backend  # noqa: E402
+
+
+def run_backend(spec: str, images: list, lang: str, runs: int) -> dict:
+    """
+    测试一个后端
+
+    Args:
+        spec: 后端名称，可带精度后缀（例如 onnx:int8）
+        images: 图片数组列表
+        lang: 模型语言
+        runs: 每张图片的重复次数
+
+    Returns:
+        测试结果
+    """
+    name, _, precision = spec.partition(":")
+    settings.OCR_PRECISION = precision or "fp32"
+    backend = get_backend(name)
+
+    started = time.perf_counter()
+    model = backend.load({"lang": lang, "use_angle_cls": True})
+    load_seconds = time.perf_counter() - started
+
+    # 预热一次，不计入耗时
+    model.ocr(images[0], cls=True)
+
+    timings = []
+    texts = []
+    for image in images:
+        for _ in range(runs):
+            started = time.perf_counter()
+            result = model.ocr(image, cls=True)
+            timings.append((time.perf_counter() - started) * 1000)
+        texts.append([line[1][0] for line in (result[0] or [])])
+
+    timings.sort()
+    return {
+        "spec": spec,
+        "load_seconds": load_seconds,
+        "mean_ms": statistics.mean(timings),
+        "p50_ms": timings[len(timings) // 2],
+        "p95_ms": timings[min(len(timings) - 1, int(len(timings) * 0.95))],
+        "texts": texts
+    }
+
+
+def agreement(reference: list, texts: list) -> float:
+    """与基准后端识别出相同文本行的比例"""
+    total = sum(len(lines) for lines in reference)
+    if total == 0:
+        return 1.0
+    same = sum(len(set(a) & set(b)) for a, b in zip(reference, texts))
+    return same / total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OCR推理后端基准测试")
+    parser.add_argument("images", nargs="+", help="测试图片")
+    parser.add_argument("--backends", nargs="+", default=["paddle", "onnx"], help="后端列表，可带精度后缀")
+    parser.add_argument("--lang", default="ch", help="模型语言")
+    parser.add_argument("--runs", type=int, default=3, help="每张图片重复次数")
+    parser.add_argument("--threads", type=int, default=settings.OCR_WORKER_THREADS, help="推理线程数")
+    args = parser.parse_args()
+
+    settings.OCR_WORKER_THREADS = args.threads
+    images = [np.array(Image.open(path).convert("RGB")) for path in args.images]
+
+    results = []
+    for spec in args.backends:
+        try:
+            results.append(run_backend(spec, images, args.lang, args.runs))
+        except Exception as e:
+            print(f"{spec}: 测试失败: {e}")
+
+    if not results:
+        return
+
+    reference = results[0]["texts"]
+    print(f"{'后端':<14}{'加载(s)':>10}{'平均(ms)':>12}{'P50(ms)':>12}{'P95(ms)':>12}{'一致率':>10}")
+    for r in results:
+        print(
+            f"{r['spec']:<14}{r['load_seconds']:>10.2f}{r['mean_ms']:>12.1f}"
+            f"{r['p50_ms']:>12.1f}{r['p95_ms']:>12.1f}{agreement(reference, r['texts']):>10.1%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
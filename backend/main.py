@@ -1,20 +1,32 @@
 """
 智扫通后端服务 - FastAPI应用（完整版）
 """
-from fastapi import FastAPI, File, UploadFile, Form
+from fastapi import FastAPI, Depends, File, UploadFile, Form, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
+import json
 import logging
 import os
+import time
+from contextlib import aclosing
 from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
 
 from app.core.config import settings
+from app.core.errors import RequestRejectedError
+from app.core.metrics import StageTimings, metrics, request_timings
 from app.database import init_db
 from app.api import documents, id_card, auth, batch, advanced
-from app.services.ocr_service import OCRService
+from app.services.ocr_service import ocr_service
+from app.services.ocr_engine import ocr_engine
+from app.services.ocr_cache import ocr_cache
+from app.services.ocr_registry import ocr_registry, warmup_langs
+from app.services.pdf_input import pdf_input_service
 from app.services.pdf_service import PDFService
+from app.services.image_executor import image_executor
 from app.services.image_service import ImageService
+from app.services.temp_files import TempScope, temp_files, temp_scope
 
 # 配置日志
 logging.basicConfig(
@@ -40,7 +52,6 @@ app.add_middleware(
 )
 
 # 初始化服务
-ocr_service = OCRService()
 pdf_service = PDFService()
 image_service = ImageService()
 
@@ -52,7 +63,6 @@ app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
 os.makedirs("static", exist_ok=True)
 os.makedirs("static/pdfs", exist_ok=True)
 os.makedirs("uploads", exist_ok=True)
-os.makedirs("temp", exist_ok=True)
 
 # 注册路由
 app.include_router(documents.router, prefix="/api/v1", tags=["文档"])
@@ -67,9 +77,34 @@ async def startup_event():
     """启动事件"""
     logger.info("智扫通API启动中...")
     init_db()
+    temp_files.start_sweeper()
+    if settings.IMAGE_USE_PROCESS_POOL:
+        image_executor.start()
+    if settings.OCR_USE_WORKER_POOL:
+        ocr_engine.start(warmup_langs())
+    # 后台加载（启用预热时同时预热）模型，期间 /health/ready 返回503，负载均衡不会转发流量
+    ocr_service.start_warmup()
     logger.info("智扫通API启动完成")
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """关闭事件"""
+    ocr_engine.shutdown()
+    image_executor.shutdown()
+    temp_files.stop_sweeper()
+
+
+@app.exception_handler(RequestRejectedError)
+async def request_rejected_handler(request, exc: RequestRejectedError):
+    """请求被拒绝：上传不合法（413/415）、图像处理队列已满（503）等"""
+    return JSONResponse(
+        status_code=exc.status_code,
+        headers=exc.headers,
+        content={"success": False, "message": str(exc)}
+    )
+
+
 @app.get("/")
 async def root():
     """根路径"""
@@ -85,40 +120,157 @@ async def health_check():
     """健康检查"""
     return {
         "status": "healthy",
-        "ocr_ready": ocr_service.is_ready()
+        "ocr_ready": ocr_service.is_ready(),
+        "ocr_warmup": ocr_service.warmup_status(),
+        "ocr_engine": ocr_engine.stats(),
+        "image_executor": image_executor.stats(),
+        "temp_files": temp_files.stats(),
+        "ocr_models": ocr_registry.stats(),
+        "ocr_cache": ocr_cache.stats()
     }
 
 
+@app.get("/health/ready")
+async def readiness_check():
+    """就绪探针：OCR模型预热完成前返回503"""
+    if not ocr_service.is_ready():
+        return JSONResponse(
+            status_code=503,
+            content={"ready": False, "ocr_warmup": ocr_service.warmup_status()}
+        )
+    return {"ready": True, "ocr_warmup": ocr_service.warmup_status()}
+
+
+@app.get("/metrics")
+async def get_metrics():
+    """运行指标"""
+    return metrics.snapshot()
+
+
+def set_server_timing(response: Response, timings: StageTimings, started: float):
+    """记录请求总耗时，并按配置输出Server-Timing响应头"""
+    timings.add("total", (time.perf_counter() - started) * 1000)
+    if settings.OCR_SERVER_TIMING:
+        response.headers["Server-Timing"] = timings.server_timing()
+
+
+async def ocr_pdf(pdf_path: str, lang: str, dpi: Optional[float] = None) -> Dict[str, Any]:
+    """
+    PDF逐页识别：有文字层的页面直接使用文字层，其余页面渲染后OCR
+
+    Args:
+        pdf_path: PDF路径
+        lang: 语言类型
+        dpi: 渲染分辨率，默认使用配置
+
+    Returns:
+        合并后的识别结果（含每页结果）
+    """
+    pages = []
+    async with aclosing(pdf_input_service.iter_pages(pdf_path, dpi)) as page_iter:
+        async for page in page_iter:
+            result = page["ocr_result"]
+            if result is None:
+                result = await ocr_service.ocr_image(page["image"], lang)
+            pages.append({"page": page["page"], "source": page["source"], **result})
+    return pdf_input_service.combine_results(pages)
+
+
+async def scan_image(
+    image_path: str,
+    operations: List[str],
+    enhance_preset: Optional[str],
+    mode: str,
+    timings: StageTimings,
+    ocr_result: Optional[Dict[str, Any]] = None,
+    content_hash: Optional[str] = None
+) -> Tuple[Dict[str, Any], str]:
+    """
+    扫描一张图片：质量检查、裁剪/增强、OCR
+
+    Args:
+        image_path: 图片路径
+        operations: 图像处理操作（crop/enhance）
+        enhance_preset: 增强预设
+        mode: 质量检查模式
+        timings: 请求的分阶段耗时
+        ocr_result: 已有的识别结果（PDF文字层），提供时不做质量检查和OCR
+        content_hash: 图片文件的SHA-256（上传时计算）
+
+    Returns:
+        (扫描结果, 处理结果路径)
+    """
+    # 质量检查（在原图上做，增强前的清晰度才能反映是否拍糊）
+    quality = None
+    if mode != "off" and ocr_result is None:
+        with timings.stage("quality"):
+            quality = await image_service.analyze_quality(image_path)
+    skipped = image_service.quality_skip_reason(quality, mode)
+
+    # 图像处理（解码一次，在内存中处理，只保存最终结果）
+    with timings.stage("preprocess"):
+        processed_path, processed_hash = await image_service.process_document_image(
+            image_path, operations, enhance_preset=enhance_preset, content_hash=content_hash
+        )
+
+    # OCR识别（跳过的图片返回空结果；按结果文件的哈希查询缓存）
+    if ocr_result is None:
+        if skipped is None:
+            ocr_result = await ocr_service.ocr_image(processed_path, "ch", content_hash=processed_hash)
+        else:
+            ocr_result = ocr_service.empty_result()
+
+    return {
+        "image_url": processed_path.replace("static", "/static"),
+        "ocr_result": ocr_result,
+        "quality": quality,
+        "ocr_skipped": skipped
+    }, processed_path
+
+
 @app.post("/api/v1/ocr")
 async def ocr_image(
+    response: Response,
     file: UploadFile = File(...),
-    lang: str = Form("ch")  # ch: 中文, en: 英文, ch_en: 中英文
+    lang: str = Form("ch"),  # ch: 中文, en: 英文, ch_en: 中英文
+    dpi: Optional[float] = Form(None),  # PDF页面的渲染分辨率
+    temp: TempScope = Depends(temp_scope)
 ):
     """
     OCR文字识别
 
     Args:
-        file: 图片文件
+        file: 图片或PDF文件（PDF有文字层的页面直接取文字，其余页面渲染后识别）
         lang: 语言类型
+        dpi: PDF页面的渲染分辨率，默认使用配置
 
     Returns:
         OCR识别结果
     """
+    timings = StageTimings()
+    request_timings.set(timings)
+    started = time.perf_counter()
+
     try:
         # 保存临时文件
-        temp_path = await image_service.save_upload_file(file)
-
-        # OCR识别
-        result = await ocr_service.ocr_image(temp_path, lang)
+        with timings.stage("upload"):
+            upload = await image_service.save_upload(file)
+            temp_path = temp.track(upload["path"])
 
-        # 删除临时文件
-        os.unlink(temp_path)
+        if upload["extension"] == ".pdf":
+            result = await ocr_pdf(temp_path, lang, dpi)
+        else:
+            # OCR识别（上传时算好的内容哈希直接用于查询结果缓存）
+            result = await ocr_service.ocr_image(temp_path, lang, content_hash=upload["sha256"])
 
+        set_server_timing(response, timings, started)
         return {
             "success": True,
             "data": result
         }
 
+    except RequestRejectedError:
+        raise
     except Exception as e:
         logger.error(f"OCR识别失败: {e}")
         return JSONResponse(
@@ -130,48 +282,130 @@ async def ocr_image(
         )
 
 
-@app.post("/api/v1/scan")
-async def scan_document(
+@app.post("/api/v1/ocr/regions")
+async def ocr_regions(
     file: UploadFile = File(...),
-    enhance: bool = Form(True),  # 是否增强图像
-    auto_crop: bool = Form(True)  # 是否自动裁剪
+    regions: str = Form(...),  # JSON: [{"name": "...", "box": [x0, y0, x1, y1], "normalized": false, "multiline": false}]
+    lang: str = Form("ch"),
+    temp: TempScope = Depends(temp_scope)
 ):
     """
-    文档扫描（拍照扫描）
+    区域OCR识别：只识别指定区域，适用于字段位置已知的表单和证件
 
     Args:
         file: 图片文件
-        enhance: 是否增强图像
-        auto_crop: 是否自动裁剪
+        regions: 区域列表（JSON），box默认为像素坐标，normalized为true时为0~1的归一化坐标
+        lang: 语言类型
 
     Returns:
-        扫描结果（图像+OCR）
+        各区域的识别结果
     """
+    try:
+        region_list = json.loads(regions)
+        if not isinstance(region_list, list) or not all(
+            isinstance(r, dict) and isinstance(r.get("box"), list) for r in region_list
+        ):
+            raise ValueError("regions必须是包含box的对象列表")
+    except ValueError as e:
+        return JSONResponse(
+            status_code=400,
+            content={
+                "success": False,
+                "message": f"区域参数错误: {str(e)}"
+            }
+        )
+
     try:
         # 保存临时文件
-        temp_path = await image_service.save_upload_file(file)
+        temp_path = temp.track(await image_service.save_upload_file(file))
+
+        # 区域识别
+        result = await ocr_service.ocr_regions(temp_path, region_list, lang)
 
-        # 图像处理
-        processed_path = await image_service.process_document(
-            temp_path,
-            enhance=enhance,
-            auto_crop=auto_crop
+        return {
+            "success": True,
+            "data": result
+        }
+
+    except RequestRejectedError:
+        raise
+    except Exception as e:
+        logger.error(f"区域OCR识别失败: {e}")
+        return JSONResponse(
+            status_code=500,
+            content={
+                "success": False,
+                "message": f"区域OCR识别失败: {str(e)}"
+            }
         )
 
-        # OCR识别
-        ocr_result = await ocr_service.ocr_image(processed_path, "ch")
 
-        # 删除临时文件
-        os.unlink(temp_path)
+@app.post("/api/v1/scan")
+async def scan_document(
+    response: Response,
+    file: UploadFile = File(...),
+    enhance: bool = Form(True),  # 是否增强图像
+    auto_crop: bool = Form(True),  # 是否自动裁剪
+    enhance_preset: Optional[str] = Form(None),  # 增强预设
+    quality_gate: Optional[str] = Form(None),  # 质量检查模式
+    dpi: Optional[float] = Form(None),  # PDF页面的渲染分辨率
+    temp: TempScope = Depends(temp_scope)
+):
+    """
+    文档扫描（拍照扫描）
+
+    Args:
+        file: 图片或PDF文件（PDF逐页扫描，有文字层的页面不做OCR）
+        enhance: 是否增强图像
+        auto_crop: 是否自动裁剪
+        enhance_preset: 增强预设（document/photo/grayscale/binarized），默认使用配置
+        quality_gate: 质量检查模式（off/flag/drop），空白页不做OCR，drop模式下模糊图片也不做OCR
+        dpi: PDF页面的渲染分辨率，默认使用配置
+
+    Returns:
+        扫描结果（图像+OCR），PDF为每页的扫描结果
+    """
+    timings = StageTimings()
+    request_timings.set(timings)
+    started = time.perf_counter()
 
+    try:
+        # 保存临时文件
+        with timings.stage("upload"):
+            upload = await image_service.save_upload(file)
+            temp_path = temp.track(upload["path"])
+
+        mode = image_service.quality_mode(quality_gate)
+        operations = (["crop"] if auto_crop else []) + (["enhance"] if enhance else [])
+
+        if pdf_input_service.is_pdf(temp_path):
+            # PDF逐页渲染后扫描，有文字层的页面直接使用文字层
+            pages = []
+            async with aclosing(pdf_input_service.iter_pages(temp_path, dpi, render="always")) as page_iter:
+                async for page in page_iter:
+                    data, processed_path = await scan_image(
+                        page["image"], operations, enhance_preset, mode, timings, page["ocr_result"]
+                    )
+                    if processed_path == page["image"]:
+                        # 没有处理操作时结果就是渲染图片，不随下一页删除，留给后台清理回收
+                        page["image"] = None
+                    pages.append({"page": page["page"], "source": page["source"], **data})
+            data = {"page_count": len(pages), "pages": pages}
+        else:
+            data, processed_path = await scan_image(
+                temp_path, operations, enhance_preset, mode, timings, content_hash=upload["sha256"]
+            )
+            # 处理结果返回给客户端，留给后台清理回收
+            temp.release(processed_path)
+
+        set_server_timing(response, timings, started)
         return {
             "success": True,
-            "data": {
-                "image_url": processed_path.replace("static", "/static"),
-                "ocr_result": ocr_result
-            }
+            "data": data
         }
 
+    except RequestRejectedError:
+        raise
     except Exception as e:
         logger.error(f"文档扫描失败: {e}")
         return JSONResponse(
@@ -186,7 +420,13 @@ async def scan_document(
 @app.post("/api/v1/pdf/export")
 async def export_pdf(
     images: list[UploadFile] = File(...),
-    filename: str = Form("document.pdf")
+    filename: str = Form("document.pdf"),
+    bilevel: bool = Form(False),  # 扫描模式
+    page_size: Optional[str] = Form(None),  # auto/A4/Letter等
+    dpi: Optional[float] = Form(None),
+    searchable: bool = Form(False),  # 可搜索PDF（附带OCR文字层）
+    lang: str = Form("ch"),
+    temp: TempScope = Depends(temp_scope)
 ):
     """
     导出PDF
@@ -194,6 +434,11 @@ async def export_pdf(
     Args:
         images: 图片文件列表
         filename: 输出文件名
+        bilevel: 扫描模式：页面二值化为黑白1位图，以CCITT G4压缩嵌入，文字稿体积小一个数量级
+        page_size: 页面尺寸，auto表示按图片像素和DPI确定，默认使用配置
+        dpi: auto模式下图片的分辨率，默认使用配置
+        searchable: 可搜索PDF：每页OCR识别的文字作为不可见文字层与图片对齐，可以搜索和复制
+        lang: 可搜索PDF的OCR语言类型
 
     Returns:
         PDF文件
@@ -202,15 +447,14 @@ async def export_pdf(
         # 保存所有图片
         image_paths = []
         for image in images:
-            temp_path = await image_service.save_upload_file(image)
+            temp_path = temp.track(await image_service.save_upload_file(image))
             image_paths.append(temp_path)
 
         # 生成PDF
-        pdf_path = await pdf_service.create_pdf(image_paths, filename)
-
-        # 删除临时图片
-        for path in image_paths:
-            os.unlink(path)
+        pdf_path = await pdf_service.create_pdf(
+            image_paths, filename, bilevel=bilevel, page_size=page_size, dpi=dpi,
+            searchable=searchable, lang=lang
+        )
 
         return {
             "success": True,
@@ -219,6 +463,8 @@ async def export_pdf(
             }
         }
 
+    except RequestRejectedError:
+        raise
     except Exception as e:
         logger.error(f"PDF导出失败: {e}")
         return JSONResponse(
@@ -233,7 +479,10 @@ async def export_pdf(
 @app.post("/api/v1/document/process")
 async def process_document(
     file: UploadFile = File(...),
-    operations: str = Form("enhance,crop,ocr")  # 处理操作
+    operations: str = Form("enhance,crop,ocr"),  # 处理操作
+    enhance_preset: Optional[str] = Form(None),  # 增强预设
+    dpi: Optional[float] = Form(None),  # PDF页面的渲染分辨率
+    temp: TempScope = Depends(temp_scope)
 ):
     """
     完整文档处理流程
@@ -241,6 +490,8 @@ async def process_document(
     Args:
         file: 文档文件（图片/PDF）
         operations: 处理操作（逗号分隔）
+        enhance_preset: 增强预设（document/photo/grayscale/binarized），默认使用配置
+        dpi: PDF页面的渲染分辨率，默认使用配置
 
     Returns:
         处理结果
@@ -250,33 +501,56 @@ async def process_document(
         ops = [op.strip() for op in operations.split(",")]
 
         # 保存临时文件
-        temp_path = await image_service.save_upload_file(file)
+        upload = await image_service.save_upload(file)
+        temp_path = temp.track(upload["path"])
 
         result = {}
 
-        # 图像增强
+        # 图像增强、自动裁剪：按请求顺序在内存中处理，不写中间文件
+        image_ops = [op for op in ops if op in ("enhance", "crop")]
         if "enhance" in ops:
-            temp_path = await image_service.enhance_image(temp_path)
             result["enhanced"] = True
-
-        # 自动裁剪
         if "crop" in ops:
-            temp_path = await image_service.auto_crop(temp_path)
             result["cropped"] = True
 
-        # OCR识别
-        if "ocr" in ops:
-            ocr_result = await ocr_service.ocr_image(temp_path, "ch")
-            result["ocr"] = ocr_result
-
-        # 删除临时文件
-        os.unlink(temp_path)
+        if pdf_input_service.is_pdf(temp_path):
+            if "ocr" in ops:
+                # PDF逐页识别：有文字层的页面直接使用文字层，不渲染也不处理
+                pages = []
+                async with aclosing(pdf_input_service.iter_pages(temp_path, dpi)) as page_iter:
+                    async for page in page_iter:
+                        ocr_result = page["ocr_result"]
+                        if ocr_result is None:
+                            processed_path, processed_hash = await image_service.process_document_image(
+                                page["image"], image_ops, enhance_preset=enhance_preset
+                            )
+                            if processed_path != page["image"]:
+                                temp.track(processed_path)
+                            ocr_result = await ocr_service.ocr_image(
+                                processed_path, "ch", content_hash=processed_hash
+                            )
+                        pages.append({"page": page["page"], "source": page["source"], **ocr_result})
+                result["ocr"] = pdf_input_service.combine_results(pages)
+            else:
+                # 页面图片只用于识别：不识别时不渲染，只返回页数和文档信息
+                result.update(await pdf_input_service.document_info(temp_path))
+        else:
+            processed_path, processed_hash = await image_service.process_document_image(
+                temp_path, image_ops, enhance_preset=enhance_preset, content_hash=upload["sha256"]
+            )
+            if processed_path != temp_path:
+                temp.track(processed_path)
+            # OCR识别
+            if "ocr" in ops:
+                result["ocr"] = await ocr_service.ocr_image(processed_path, "ch", content_hash=processed_hash)
 
         return {
             "success": True,
             "data": result
         }
 
+    except RequestRejectedError:
+        raise
     except Exception as e:
         logger.error(f"文档处理失败: {e}")
         return JSONResponse(
@@ -74,6 +74,34 @@ def test_scan_endpoint(client, test_image_file):
     # assert response.status_code in [200, 500]
 
 
+def test_ocr_server_timing(client, test_image_file):
+    """测试OCR端点返回各阶段耗时的Server-Timing响应头"""
+    from unittest.mock import patch
+    from app.core.config import settings
+    from app.services.ocr_service import ocr_service
+
+    async def mock_execute(image_path, lang):
+        return {
+            "text": "测试", "texts": ["测试"], "positions": [], "confidences": [0.99], "count": 1,
+            "_timings": {"decode": 1.0, "det": 5.0, "cls": 1.0, "rec": 3.0, "serialize": 0.1}
+        }
+
+    with patch.object(settings, "OCR_SERVER_TIMING", True), \
+            patch.object(settings, "OCR_CACHE_ENABLED", False), \
+            patch.object(ocr_service, "_execute", mock_execute):
+        response = client.post(
+            "/api/v1/ocr",
+            files={"file": ("test.jpg", test_image_file.file, "image/jpeg")},
+            data={"lang": "ch"}
+        )
+
+    assert response.status_code == 200
+    assert "_timings" not in response.json()["data"]
+    server_timing = response.headers["server-timing"]
+    for stage in ("upload", "queue", "decode", "det", "cls", "rec", "total"):
+        assert f"{stage};dur=" in server_timing
+
+
 def test_pdf_export_endpoint(client, test_image_file):
     """测试PDF导出端点"""
     response = client.post(
@@ -96,6 +124,17 @@ def test_document_process_endpoint(client, test_image_file):
     # assert response.status_code in [200, 500]
 
 
+def test_upload_type_rejected(client):
+    """测试按文件头校验上传类型，不支持的文件返回415"""
+    response = client.post(
+        "/api/v1/ocr",
+        files={"file": ("test.jpg", io.BytesIO(b"not an image"), "image/jpeg")},
+        data={"lang": "ch"}
+    )
+    assert response.status_code == 415
+    assert response.json()["success"] is False
+
+
 def test_404_handling(client):
     """测试404处理"""
     response = client.get("/api/v1/nonexistent")
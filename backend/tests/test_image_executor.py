@@ -0,0 +1,91 @@
+"""
+单元测试 - 图像处理执行器
+"""
+import pytest
+import asyncio
+import io
+import operator
+import os
+import threading
+from unittest.mock import patch
+from PIL import Image
+from fastapi.testclient import TestClient
+
+from app.services.image_executor import ImageExecutor, ImageQueueFullError
+from app.services.image_service import ImageService
+
+
+@pytest.mark.asyncio
+async def test_queue_full_rejected():
+    """测试队列已满时立即拒绝，而不是继续排队"""
+    executor = ImageExecutor(workers=1, max_queue=1)
+    release = threading.Event()
+
+    running = asyncio.ensure_future(executor.run(release.wait, 5))
+    await asyncio.sleep(0.05)
+    assert executor.pending == 1
+
+    with pytest.raises(ImageQueueFullError):
+        await executor.run(sum, [1, 2])
+
+    release.set()
+    assert await running is True
+    assert executor.pending == 0
+    assert await executor.run(sum, [1, 2]) == 3
+
+
+@pytest.mark.asyncio
+async def test_process_pool(tmp_path):
+    """测试服务方法在工作进程中执行"""
+    image_path = tmp_path / "large.jpg"
+    Image.new('RGB', (800, 600), color='white').save(image_path)
+
+    executor = ImageExecutor(workers=1, threads=1)
+    executor.start()
+    try:
+        service = ImageService()
+        result_path = await executor.run(service._resize_image_sync, str(image_path), max_size=200)
+    finally:
+        executor.shutdown()
+
+    assert Image.open(result_path).size == (200, 150)
+
+
+@pytest.mark.asyncio
+async def test_worker_crash_recovery():
+    """测试工作进程崩溃后本次任务返回错误，进程池重建，之后的任务正常执行"""
+    executor = ImageExecutor(workers=1, threads=1)
+    executor.start()
+    try:
+        old_pid = await executor.run(os.getpid)
+
+        with pytest.raises(Exception, match="图像处理工作进程异常退出"):
+            await executor.run(os._exit, 1)
+
+        assert executor.restarts == 1 and executor.running
+        assert await executor.run(operator.add, 1, 2) == 3
+        assert await executor.run(os.getpid) != old_pid
+        assert executor.pending == 0
+    finally:
+        executor.shutdown()
+
+
+def test_queue_full_returns_503():
+    """测试队列已满时接口返回503"""
+    from main import app, image_service
+
+    client = TestClient(app)
+    image = io.BytesIO()
+    Image.new('RGB', (100, 100), color='blue').save(image, format='JPEG')
+    image.seek(0)
+
+    with patch.object(image_service, "process_document_image", side_effect=ImageQueueFullError("图像处理队列已满")):
+        response = client.post("/api/v1/scan", files={"file": ("test.jpg", image, "image/jpeg")})
+
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+    assert response.json()["success"] is False
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
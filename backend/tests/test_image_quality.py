@@ -0,0 +1,125 @@
+"""
+单元测试 - 图片质量检查
+"""
+import pytest
+import numpy as np
+from unittest.mock import AsyncMock, patch
+from PIL import Image, ImageDraw, ImageFilter
+
+from app.services.batch_service import BatchService
+from app.services.image_service import measure_quality
+
+
+def make_page(text: bool = True, blur: float = 0, size=(1000, 1400)) -> Image.Image:
+    """生成带文字行的灰度页面（带噪声和左右光照不均）"""
+    page = Image.new("L", size, 230)
+    if text:
+        draw = ImageDraw.Draw(page)
+        for y in range(100, size[1] - 100, 40):
+            draw.text((80, y), "The quick brown fox jumps over the lazy dog 0123456789", fill=30)
+    if blur:
+        page = page.filter(ImageFilter.GaussianBlur(blur))
+    rng = np.random.default_rng(0)
+    shading = np.linspace(0, -50, size[0])[None, :]
+    array = np.asarray(page) + rng.normal(0, 4, page.size[::-1]) + shading
+    return Image.fromarray(np.clip(array, 0, 255).astype(np.uint8))
+
+
+def test_measure_quality():
+    """测试空白页、清晰页、模糊页的判定"""
+    sharp = measure_quality(np.asarray(make_page()))
+    assert not sharp["blank"] and not sharp["blurry"]
+    assert sharp["exposure"] == "ok"
+
+    blank = measure_quality(np.asarray(make_page(text=False)))
+    assert blank["blank"] and not blank["blurry"]
+
+    blurry = measure_quality(np.asarray(make_page(blur=4)))
+    assert not blurry["blank"] and blurry["blurry"]
+    assert blurry["sharpness"] < sharp["sharpness"]
+
+    dark = measure_quality(np.full((100, 100), 20, dtype=np.uint8))
+    assert dark["exposure"] == "under"
+
+
+@pytest.mark.asyncio
+async def test_batch_ocr_skips_pages(tmp_path):
+    """测试批量识别：空白页不识别，drop模式下模糊页也不识别"""
+    paths = []
+    for name, page in [("sharp", make_page()), ("blank", make_page(text=False)), ("blurry", make_page(blur=4))]:
+        path = tmp_path / f"{name}.png"
+        page.save(path)
+        paths.append(str(path))
+
+    service = BatchService()
+    with patch.object(service.ocr_service, "ocr_image", new=AsyncMock(return_value={"text": "ok"})) as mock_ocr:
+        results = await service.batch_ocr(paths, quality_gate="flag")
+        assert mock_ocr.await_count == 2
+        assert [r["skipped"] for r in results] == [None, "blank", None]
+        assert results[2]["quality"]["blurry"]
+
+        mock_ocr.reset_mock()
+        results = await service.batch_ocr(paths, quality_gate="drop")
+        assert mock_ocr.await_count == 1
+        assert [r["skipped"] for r in results] == [None, "blank", "blurry"]
+        assert results[1]["result"] is None
+
+        # 上传时算好的内容哈希随图片一起传给OCR，用于查询缓存
+        mock_ocr.reset_mock()
+        await service.batch_ocr(paths, quality_gate="drop", content_hashes=["a", "b", "c"])
+        assert mock_ocr.await_args.kwargs["content_hash"] == "a"
+
+
+def test_scan_skips_blank_page():
+    """测试扫描接口：空白页不做OCR，返回空结果和质量指标"""
+    import io
+    from fastapi.testclient import TestClient
+    from main import app, ocr_service
+
+    image = io.BytesIO()
+    make_page(text=False).save(image, format="JPEG")
+    image.seek(0)
+
+    with patch.object(ocr_service, "ocr_image", new=AsyncMock()) as mock_ocr:
+        response = TestClient(app).post(
+            "/api/v1/scan",
+            files={"file": ("blank.jpg", image, "image/jpeg")},
+            data={"quality_gate": "flag"}
+        )
+
+    assert response.status_code == 200
+    data = response.json()["data"]
+    mock_ocr.assert_not_awaited()
+    assert data["ocr_skipped"] == "blank"
+    assert data["quality"]["blank"]
+    assert data["ocr_result"]["count"] == 0
+
+
+def test_scan_passes_processed_file_to_ocr():
+    """测试扫描接口把处理结果的文件路径和内容哈希交给OCR，不传递像素数组"""
+    import hashlib
+    import io
+    from pathlib import Path
+    from fastapi.testclient import TestClient
+    from main import app, ocr_service
+
+    image = io.BytesIO()
+    make_page().save(image, format="JPEG")
+    image.seek(0)
+
+    with patch.object(ocr_service, "ocr_image", new=AsyncMock(return_value=ocr_service.empty_result())) as mock_ocr:
+        response = TestClient(app).post(
+            "/api/v1/scan",
+            files={"file": ("page.jpg", image, "image/jpeg")},
+            data={"quality_gate": "off"}
+        )
+
+    assert response.status_code == 200
+    processed_path, lang = mock_ocr.await_args.args
+    assert isinstance(processed_path, str)
+    content_hash = mock_ocr.await_args.kwargs["content_hash"]
+    assert content_hash == hashlib.sha256(Path(processed_path).read_bytes()).hexdigest()
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
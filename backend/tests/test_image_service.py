@@ -1,6 +1,7 @@
 """
 单元测试 - 图像处理服务
 """
+import hashlib
 import pytest
 import asyncio
 from unittest.mock import Mock, patch, MagicMock
@@ -33,17 +34,42 @@ async def test_save_upload_file(image_service, tmp_path):
     from fastapi import UploadFile
     import io
 
-    # 创建模拟文件
-    file_content = b"test file content"
-    file = UploadFile(filename="test.jpg", file=io.BytesIO(file_content))
+    # 创建模拟文件（PNG内容、.jpg文件名，按文件头识别类型）
+    content = io.BytesIO()
+    Image.new('RGB', (10, 10), color='red').save(content, format='PNG')
+    file = UploadFile(filename="test.jpg", file=io.BytesIO(content.getvalue()))
 
     # 保存文件
-    result_path = await image_service.save_upload_file(file)
+    result = await image_service.save_upload(file)
 
     # 验证文件已保存
-    assert Path(result_path).exists()
-    assert result_path.endswith(".jpg")
-    assert Path(result_path).parent == image_service.temp_dir
+    assert Path(result["path"]).exists()
+    assert result["path"].endswith(".png")
+    assert Path(result["path"]).parent == image_service.temp_dir
+    assert result["size"] == len(content.getvalue())
+    assert result["sha256"] == hashlib.sha256(content.getvalue()).hexdigest()
+    Path(result["path"]).unlink()
+
+
+@pytest.mark.asyncio
+async def test_save_upload_file_rejected(image_service):
+    """测试文件类型和大小校验：拒绝时不留下写了一半的文件"""
+    from fastapi import UploadFile
+    from app.core.config import settings
+    from app.services.image_service import UnsupportedFileTypeError, UploadTooLargeError, UPLOAD_CHUNK_SIZE
+    import io
+
+    file = UploadFile(filename="test.jpg", file=io.BytesIO(b"test file content"))
+    with pytest.raises(UnsupportedFileTypeError):
+        await image_service.save_upload_file(file)
+
+    before = set(image_service.temp_dir.iterdir())
+    large = b"\xff\xd8\xff" + b"\0" * (UPLOAD_CHUNK_SIZE * 2)
+    file = UploadFile(filename="large.jpg", file=io.BytesIO(large))
+    with patch.object(settings, "MAX_UPLOAD_SIZE", UPLOAD_CHUNK_SIZE + 1):
+        with pytest.raises(UploadTooLargeError):
+            await image_service.save_upload_file(file)
+    assert set(image_service.temp_dir.iterdir()) == before
 
 
 @pytest.mark.asyncio
@@ -83,6 +109,56 @@ async def test_auto_crop(image_service, test_image_path):
         assert result_path is not None
 
 
+def test_find_document_quad_on_proxy(image_service):
+    """测试在缩略图上检测文档边界，角点换算回原图后与原图检测结果一致"""
+    import cv2
+    gray = np.full((1800, 2400), 60, dtype=np.uint8)
+    corners = np.array([[300, 150], [2150, 200], [2050, 1650], [250, 1600]], dtype=np.int32)
+    cv2.fillConvexPoly(gray, corners, 235)
+
+    full = image_service.find_document_quad(gray, proxy_side=0)
+    proxy = image_service.find_document_quad(gray, proxy_side=600)
+
+    assert full is not None and proxy is not None
+    error = np.linalg.norm(image_service._order_points(full) - image_service._order_points(proxy), axis=1)
+    assert error.max() < 2.0
+
+
+@pytest.mark.parametrize("preset", ["grayscale", "binarized"])
+def test_enhance_then_crop_single_channel(image_service, preset):
+    """测试先增强再裁剪：灰度、二值化预设输出的二维数组也能检测边界并矫正"""
+    import cv2
+    image = np.full((900, 1200, 3), 60, dtype=np.uint8)
+    corners = np.array([[150, 80], [1080, 100], [1020, 820], [120, 800]], dtype=np.int32)
+    cv2.fillConvexPoly(image, corners, (235, 235, 235))
+
+    with patch("app.services.image_service.logger") as mock_logger:
+        result = image_service.run_pipeline(image, ["enhance", "crop"], preset)
+
+    mock_logger.error.assert_not_called()
+    assert result.ndim == 2
+    assert result.shape[0] < 800 and result.shape[1] < 1000
+
+
+def test_decode_image_reduced(tmp_path):
+    """测试按目标尺寸解码：JPEG在DCT域缩放，其它格式解码后缩放"""
+    from PIL import JpegImagePlugin
+    from app.services.image_service import decode_image
+    jpeg_path = tmp_path / "large.jpg"
+    png_path = tmp_path / "large.png"
+    Image.new('RGB', (1600, 1200), color='blue').save(jpeg_path)
+    Image.new('RGB', (1600, 1200), color='blue').save(png_path)
+
+    draft = JpegImagePlugin.JpegImageFile.draft
+    with patch.object(JpegImagePlugin.JpegImageFile, 'draft', autospec=True, side_effect=draft) as mock_draft:
+        proxy = decode_image(str(jpeg_path), 400, mode="L")
+    assert mock_draft.called
+    assert proxy.shape == (300, 400)
+
+    assert decode_image(str(png_path), 400).shape == (300, 400, 3)
+    assert decode_image(str(jpeg_path)).shape == (1200, 1600, 3)
+
+
 @pytest.mark.asyncio
 async def test_resize_image(image_service, test_image_path):
     """测试调整图片大小"""
@@ -111,6 +187,33 @@ async def test_process_document(image_service, test_image_path):
         # 在实际测试中应该有真实的文件操作
 
 
+@pytest.mark.asyncio
+async def test_process_document_image_in_memory(image_service, test_image_path):
+    """测试融合处理流程：只解码一次、不写中间文件、只保存最终结果，返回结果路径和内容哈希"""
+    with patch.object(Image, 'open', wraps=Image.open) as mock_open, \
+         patch('cv2.imwrite') as mock_imwrite:
+        result_path, content_hash = await image_service.process_document_image(
+            test_image_path, ["crop", "enhance"]
+        )
+
+    assert mock_open.call_count == 1
+    mock_imwrite.assert_not_called()
+    # 返回保存的最终结果（交给OCR按路径读取），哈希与文件内容一致，原图保留给调用方处理
+    assert Path(result_path).exists()
+    assert Image.open(result_path).size == (100, 100)
+    assert content_hash == hashlib.sha256(Path(result_path).read_bytes()).hexdigest()
+    assert Path(test_image_path).exists()
+    Path(result_path).unlink()
+
+    # 没有操作时不解码，返回原图路径和上传时计算的哈希
+    with patch.object(Image, 'open', wraps=Image.open) as mock_open:
+        result_path, content_hash = await image_service.process_document_image(
+            test_image_path, [], content_hash="ab" * 32
+        )
+    mock_open.assert_not_called()
+    assert (result_path, content_hash) == (test_image_path, "ab" * 32)
+
+
 @pytest.mark.asyncio
 async def test_error_handling(image_service):
     """测试错误处理"""
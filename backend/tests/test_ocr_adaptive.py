@@ -0,0 +1,102 @@
+"""
+单元测试 - 自适应分辨率OCR
+"""
+import pytest
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+from app.services.ocr_adaptive import adaptive_scale, estimate_text_height
+from app.services.ocr_service import OCRService
+
+
+@pytest.fixture
+def text_image():
+    """大字号文本图片（模拟手机拍摄的文档）"""
+    img = Image.new('RGB', (4000, 3000), color='white')
+    draw = ImageDraw.Draw(img)
+    font = ImageFont.load_default(size=80)
+    for row in range(20):
+        draw.text((100, 100 + row * 130), "Hello scanning world 12345 abcdef", fill='black', font=font)
+    return np.array(img)
+
+
+def test_estimate_text_height(text_image):
+    """测试文字高度估计"""
+    height = estimate_text_height(text_image)
+    assert height is not None
+    assert 30 < height < 90
+
+    # 空白图片无法估计
+    assert estimate_text_height(np.full((500, 500, 3), 255, dtype=np.uint8)) is None
+
+
+def test_adaptive_scale():
+    """测试缩放比例计算"""
+    # 文字高度48，目标24，缩小一半
+    assert adaptive_scale(4000, 3000, 48, 24, 640) == pytest.approx(0.5)
+    # 不低于长边下限
+    assert adaptive_scale(4000, 3000, 200, 24, 640) == pytest.approx(0.16)
+    # 文字本来就小或无法估计时不缩放
+    assert adaptive_scale(4000, 3000, 20, 24, 640) == 1.0
+    assert adaptive_scale(4000, 3000, None, 24, 640) == 1.0
+
+
+def test_low_confidence_second_pass(text_image):
+    """测试缩小识别后，低置信度的文本行回原图重新识别"""
+    class MockOCR:
+        use_angle_cls = False
+        drop_score = 0.5
+
+        def __init__(self):
+            self.det_shapes = []
+
+        def text_detector(self, img):
+            self.det_shapes.append(img.shape)
+            box = [[10, 10], [200, 10], [200, 40], [10, 40]]
+            return np.array([box], dtype=np.float32), 0
+
+        def text_recognizer(self, crops):
+            # 裁剪图越高置信度越高
+            return [("文本", 0.6 if c.shape[0] < 50 else 0.95) for c in crops], 0
+
+    service = OCRService()
+    ocr = MockOCR()
+    counts = [{}]
+    lines = service._recognize(ocr, [text_image], counts=counts)[0]
+
+    # 检测在缩小的图片上进行
+    assert ocr.det_shapes[0][0] < text_image.shape[0]
+    # 置信度取原图重识别的结果，坐标换算回原图
+    box, text, score = lines[0]
+    assert score == pytest.approx(0.95)
+    assert box[2][1] > 40
+    # 计数随结果返回，不在识别进程内累加计数器
+    assert counts == [{"downscaled": 1, "second_pass": 1}]
+
+
+@pytest.mark.asyncio
+async def test_counts_recorded_in_parent(tmp_path):
+    """测试工作进程返回的计数在API进程中记入计数器，且不出现在结果和缓存中"""
+    from unittest.mock import patch
+    from app.core.config import settings
+
+    service = OCRService()
+
+    async def mock_execute(image_path, lang):
+        return {
+            "text": "", "texts": [], "positions": [], "confidences": [], "count": 0,
+            "_timings": {"det": 1.0}, "_counts": {"downscaled": 1, "second_pass": 3}
+        }
+
+    downscaled = service._downscaled.value
+    second_pass = service._second_pass.value
+    with patch.object(settings, "OCR_CACHE_ENABLED", False), \
+            patch.object(service, "_execute", mock_execute):
+        result = await service.ocr_image(str(tmp_path / "test.jpg"))
+
+    assert "_counts" not in result
+    assert service._downscaled.value == downscaled + 1
+    assert service._second_pass.value == second_pass + 3
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
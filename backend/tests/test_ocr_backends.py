@@ -0,0 +1,93 @@
+"""
+单元测试 - OCR推理后端
+"""
+import pytest
+from unittest.mock import MagicMock, patch
+from app.core.config import settings
+from app.services.ocr_backends import OCRBackend, OnnxBackend, PaddleBackend, get_backend
+from app.services.ocr_registry import OCRModelRegistry
+
+
+def test_get_backend():
+    """测试按名称选择后端"""
+    assert isinstance(get_backend("paddle"), PaddleBackend)
+    assert isinstance(get_backend("onnx"), OnnxBackend)
+    with pytest.raises(Exception, match="不支持的OCR推理后端"):
+        get_backend("tensorrt")
+
+
+def test_model_config_includes_backend():
+    """测试后端和精度计入模型配置（不同后端的结果不共用缓存）"""
+    with patch.object(settings, "OCR_BACKEND", "paddle"):
+        paddle_config = OCRModelRegistry.model_config("ch")
+    with patch.object(settings, "OCR_BACKEND", "onnx"), patch.object(settings, "OCR_PRECISION", "int8"):
+        onnx_config = OCRModelRegistry.model_config("ch")
+
+    assert paddle_config["backend"] == "paddle"
+    assert onnx_config["backend"] == "onnx"
+    assert onnx_config["precision"] == "int8"
+    assert paddle_config != onnx_config
+
+
+def test_onnx_model_path(tmp_path):
+    """测试int8模型优先，缺失时回退到fp32模型"""
+    model_dir = tmp_path / "ch"
+    model_dir.mkdir()
+    (model_dir / "det.onnx").touch()
+    (model_dir / "rec.onnx").touch()
+    (model_dir / "rec_int8.onnx").touch()
+
+    backend = OnnxBackend()
+    with patch.object(settings, "OCR_ONNX_MODEL_DIR", tmp_path), patch.object(settings, "OCR_PRECISION", "int8"):
+        assert backend.model_path("ch", "rec").name == "rec_int8.onnx"
+        assert backend.model_path("ch", "det").name == "det.onnx"
+        with pytest.raises(Exception, match="未找到ONNX模型"):
+            backend.model_path("ch", "cls")
+
+
+def test_backend_is_abstract():
+    """测试推理后端基类不能直接实例化，子类必须实现load"""
+    with pytest.raises(TypeError):
+        OCRBackend()
+
+    class IncompleteBackend(OCRBackend):
+        name = "incomplete"
+
+    with pytest.raises(TypeError):
+        IncompleteBackend()
+
+
+def test_onnx_load_creates_each_session_once(tmp_path):
+    """测试ONNX后端每个模型只创建一次推理会话（使用限制线程数的会话，不先创建默认会话再替换）"""
+    pytest.importorskip("onnxruntime")
+    pytest.importorskip("paddleocr")
+    import tools.infer.utility as paddle_utility
+
+    model_dir = tmp_path / "ch"
+    model_dir.mkdir()
+    for stage in ("det", "rec", "cls"):
+        (model_dir / f"{stage}.onnx").touch()
+
+    def session(path):
+        """动态输入尺寸的推理会话"""
+        mock = MagicMock(path=path)
+        mock.get_inputs.return_value = [MagicMock(shape=["batch", 3, "height", "width"])]
+        return mock
+
+    backend = OnnxBackend()
+    original = paddle_utility.create_predictor
+    with patch.object(settings, "OCR_ONNX_MODEL_DIR", tmp_path), \
+            patch.object(settings, "OCR_PRECISION", "fp32"), \
+            patch.object(backend, "_session", side_effect=session) as mock_session:
+        model = backend.load({"lang": "ch", "use_angle_cls": True})
+
+    assert sorted(call.args[0].name for call in mock_session.call_args_list) == ["cls.onnx", "det.onnx", "rec.onnx"]
+    assert model.text_detector.predictor.path.name == "det.onnx"
+    assert model.text_recognizer.predictor.path.name == "rec.onnx"
+    assert model.text_classifier.predictor.path.name == "cls.onnx"
+    # 构造完成后恢复PaddleOCR的预测器工厂函数
+    assert paddle_utility.create_predictor is original
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
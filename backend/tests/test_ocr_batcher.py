@@ -0,0 +1,159 @@
+"""
+单元测试 - OCR动态批处理调度器
+"""
+import pytest
+import asyncio
+from unittest.mock import patch
+import numpy as np
+from app.services.ocr_batcher import OCRBatcher
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_are_batched():
+    """测试并发请求被合并为一批，且各自拿到自己的结果"""
+    batches = []
+
+    async def runner(image_paths, lang):
+        batches.append(list(image_paths))
+        return [{"text": path} for path in image_paths]
+
+    batcher = OCRBatcher(runner, max_batch_size=8, max_wait_ms=20)
+    results = await asyncio.gather(*[
+        batcher.submit(f"test{i}.jpg", "ch") for i in range(3)
+    ])
+
+    assert len(batches) == 1
+    assert [r["text"] for r in results] == ["test0.jpg", "test1.jpg", "test2.jpg"]
+
+
+@pytest.mark.asyncio
+async def test_batch_flushes_at_max_size():
+    """测试达到最大批大小时立即执行"""
+    batches = []
+
+    async def runner(image_paths, lang):
+        batches.append(len(image_paths))
+        return [{"text": path} for path in image_paths]
+
+    batcher = OCRBatcher(runner, max_batch_size=2, max_wait_ms=1000)
+    await asyncio.wait_for(
+        asyncio.gather(*[batcher.submit(f"test{i}.jpg", "ch") for i in range(4)]),
+        timeout=0.5
+    )
+
+    assert batches == [2, 2]
+
+
+@pytest.mark.asyncio
+async def test_batch_error_isolation():
+    """测试单张图片失败不影响同批的其它请求"""
+    async def runner(image_paths, lang):
+        return [
+            Exception("OCR识别失败: bad image") if path == "bad.jpg" else {"text": path}
+            for path in image_paths
+        ]
+
+    batcher = OCRBatcher(runner, max_batch_size=8, max_wait_ms=10)
+    good, bad = await asyncio.gather(
+        batcher.submit("good.jpg", "ch"),
+        batcher.submit("bad.jpg", "ch"),
+        return_exceptions=True
+    )
+
+    assert good["text"] == "good.jpg"
+    assert isinstance(bad, Exception)
+    assert str(bad) == "OCR识别失败: bad image"
+
+
+@pytest.mark.asyncio
+async def test_batch_task_failure_logged():
+    """测试批次任务持有强引用直到完成，意外失败时记录日志"""
+    async def runner(image_paths, lang):
+        return None
+
+    batcher = OCRBatcher(runner, max_batch_size=8, max_wait_ms=1000)
+    future = asyncio.get_running_loop().create_future()
+    batcher._pending["ch"] = [("test.jpg", future, 0.0)]
+
+    with patch("app.services.ocr_batcher.logger") as mock_logger:
+        batcher._flush("ch")
+        assert len(batcher._tasks) == 1
+        task = next(iter(batcher._tasks))
+        await asyncio.wait([task])
+        await asyncio.sleep(0)
+
+    assert not batcher._tasks
+    mock_logger.error.assert_called_once()
+    future.cancel()
+
+
+@pytest.mark.asyncio
+async def test_ocr_batch_requests_are_merged():
+    """测试批量OCR并发提交，由批处理调度器合并成一批；有图片失败时其它图片仍执行完"""
+    from app.core.config import settings
+    from app.services.ocr_service import OCRService
+
+    batches = []
+
+    async def runner(image_paths, lang):
+        batches.append(list(image_paths))
+        return [
+            Exception("OCR识别失败: bad image") if path == "bad.jpg" else {"text": path}
+            for path in image_paths
+        ]
+
+    service = OCRService()
+    service._batcher = OCRBatcher(runner, max_batch_size=8, max_wait_ms=20)
+    with patch.object(settings, "OCR_BATCH_ENABLED", True), \
+            patch.object(settings, "OCR_CACHE_ENABLED", False):
+        results = await service.ocr_batch(["test0.jpg", "test1.jpg", "test2.jpg"], "ch")
+        assert batches == [["test0.jpg", "test1.jpg", "test2.jpg"]]
+        assert [r["text"] for r in results] == ["test0.jpg", "test1.jpg", "test2.jpg"]
+
+        with pytest.raises(Exception, match="bad image"):
+            await service.ocr_batch(["bad.jpg", "test3.jpg"], "ch")
+        assert batches[-1] == ["bad.jpg", "test3.jpg"]
+
+
+def test_recognize_partial_detection_failure():
+    """测试批量识别中一张图片裁剪到一半失败，只有这张图片失败，不留下多余的文本行"""
+    from app.core.config import settings
+    from app.services import ocr_service as ocr_module
+    from app.services.ocr_service import OCRService
+
+    class MockOCR:
+        use_angle_cls = False
+        drop_score = 0.5
+
+        def text_detector(self, img):
+            boxes = [
+                [[10, y], [200, y], [200, y + 30], [10, y + 30]] for y in (10, 50)
+            ]
+            return np.array(boxes, dtype=np.float32), 0
+
+        def text_recognizer(self, crops):
+            return [("文本", 0.9) for _ in crops], 0
+
+    good = np.full((300, 300, 3), 255, dtype=np.uint8)
+    bad = np.full((300, 400, 3), 255, dtype=np.uint8)
+    crop = ocr_module.get_rotate_crop_image
+    calls = []
+
+    def failing_crop(img, points):
+        # 第二张图片的第二个文本行裁剪失败
+        if img.shape == bad.shape:
+            calls.append(1)
+            if len(calls) == 2:
+                raise ValueError("crop failed")
+        return crop(img, points)
+
+    with patch.object(settings, "OCR_ADAPTIVE_ENABLED", False), \
+            patch.object(ocr_module, "get_rotate_crop_image", side_effect=failing_crop):
+        results = OCRService()._recognize(MockOCR(), [good, bad, good])
+
+    assert isinstance(results[1], Exception)
+    assert len(results[0]) == 2 and len(results[2]) == 2
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,105 @@
+"""
+单元测试 - OCR结果缓存
+"""
+import hashlib
+import shutil
+import pytest
+import numpy as np
+from PIL import Image
+from app.services.ocr_cache import OCRCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    """OCR缓存fixture"""
+    return OCRCache(memory_items=2, disk_dir=tmp_path / "cache", disk_max_bytes=1024 * 1024)
+
+
+@pytest.fixture
+def test_image_path(tmp_path):
+    """创建测试图片"""
+    img = Image.new('RGB', (100, 100), color='white')
+    image_path = tmp_path / "test.png"
+    img.save(image_path)
+    return str(image_path)
+
+
+def test_make_key(test_image_path, tmp_path):
+    """测试缓存键由图片内容、语言和模型配置决定"""
+    config = {"lang": "ch", "use_angle_cls": True}
+    key = OCRCache.make_key(test_image_path, "ch", config)
+
+    # 图片路径按文件内容哈希计算，与上传时算好的哈希得到相同的键
+    content_hash = hashlib.sha256(open(test_image_path, "rb").read()).hexdigest()
+    assert OCRCache.file_hash(test_image_path) == content_hash
+    assert OCRCache.make_file_key(content_hash, "ch", config) == key
+
+    # 相同内容不同文件名得到相同的键
+    other_path = tmp_path / "copy.png"
+    shutil.copy(test_image_path, other_path)
+    assert OCRCache.make_key(str(other_path), "ch", config) == key
+
+    # 语言或模型配置不同则键不同
+    assert OCRCache.make_key(test_image_path, "en", config) != key
+    assert OCRCache.make_key(test_image_path, "ch", {"lang": "en"}) != key
+    assert OCRCache.make_file_key(content_hash, "en", config) != key
+
+
+def test_make_key_array(test_image_path):
+    """测试没有对应文件的已解码数组按像素计算缓存键，不与文件键冲突"""
+    config = {"lang": "ch"}
+    pixels = np.array(Image.open(test_image_path).convert("RGB"))
+    key = OCRCache.make_key(pixels, "ch", config)
+
+    assert OCRCache.make_key(pixels.copy(), "ch", config) == key
+    assert OCRCache.make_key(pixels[:50], "ch", config) != key
+    assert OCRCache.make_key(pixels, "en", config) != key
+    assert OCRCache.make_key(test_image_path, "ch", config) != key
+
+
+def test_memory_lru_eviction(cache):
+    """测试内存层LRU淘汰"""
+    cache.set("a" * 64, {"text": "a"})
+    cache.set("b" * 64, {"text": "b"})
+    cache.get("a" * 64)  # a 变为最近使用
+    cache.set("c" * 64, {"text": "c"})
+
+    assert "a" * 64 in cache._memory
+    assert "b" * 64 not in cache._memory
+    assert "c" * 64 in cache._memory
+
+
+def test_disk_tier_hit(cache, tmp_path):
+    """测试内存层未命中时从磁盘层读取"""
+    key = "d" * 64
+    cache.set(key, {"text": "磁盘"})
+    cache._memory.clear()
+
+    disk_hits = cache.disk_hits.value
+    assert cache.get(key) == {"text": "磁盘"}
+    assert cache.disk_hits.value == disk_hits + 1
+
+    # 新实例也能读到磁盘层
+    other = OCRCache(memory_items=2, disk_dir=tmp_path / "cache", disk_max_bytes=1024 * 1024)
+    assert other.get(key) == {"text": "磁盘"}
+
+
+def test_disk_size_eviction(tmp_path):
+    """测试磁盘层按大小淘汰"""
+    cache = OCRCache(memory_items=0, disk_dir=tmp_path / "cache", disk_max_bytes=2048)
+    for i in range(10):
+        cache.set(f"{i:064d}", {"text": "x" * 400})
+
+    assert cache.stats()["disk_bytes"] <= 2048
+    assert cache.get(f"{9:064d}") is not None
+
+
+def test_miss(cache):
+    """测试未命中"""
+    misses = cache.misses.value
+    assert cache.get("e" * 64) is None
+    assert cache.misses.value == misses + 1
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
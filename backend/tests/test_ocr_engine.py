@@ -0,0 +1,179 @@
+"""
+单元测试 - OCR执行引擎（工作进程池）
+"""
+import os
+import operator
+import threading
+import time
+import pytest
+from concurrent.futures import Future
+from unittest.mock import patch
+
+from app.core.config import settings
+from app.services.ocr_engine import OCREngine
+
+
+def chunk_pids(items, delay):
+    """返回执行该段输入的进程号（工作进程中执行）"""
+    time.sleep(delay)
+    return [os.getpid()] * len(items)
+
+
+@pytest.fixture
+async def engine():
+    """两个工作进程的引擎（不预加载模型）"""
+    engine = OCREngine(workers=2, threads=1)
+    engine.start([])
+    yield engine
+    engine.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_start_dispatch_shutdown(engine):
+    """测试启动后所有工作进程登记就绪，任务在工作进程中执行，关闭后不再接受任务"""
+    assert await engine.wait_ready()
+    stats = engine.stats()
+    assert stats["running"] and stats["started_workers"] == 2
+
+    pid = await engine.submit(os.getpid)
+    assert pid != os.getpid()
+    assert pid in {worker["pid"] for worker in stats["worker_models"]}
+
+    engine.shutdown()
+    assert not engine.running and not engine.ready
+    with pytest.raises(RuntimeError):
+        await engine.submit(os.getpid)
+
+
+@pytest.mark.asyncio
+async def test_worker_crash_recovery(engine):
+    """测试工作进程崩溃后本次任务返回错误，进程池重建，之后的任务正常执行"""
+    assert await engine.wait_ready()
+    old_pids = {worker["pid"] for worker in engine.stats()["worker_models"]}
+
+    with pytest.raises(Exception, match="OCR工作进程异常退出"):
+        await engine.submit(os._exit, 1)
+
+    assert engine.restarts == 1
+    assert await engine.wait_ready()
+    assert await engine.submit(operator.add, 1, 2) == 3
+    assert await engine.submit(os.getpid) not in old_pids
+
+
+@pytest.mark.asyncio
+async def test_batch_spreads_across_workers(engine):
+    """测试一批输入按工作进程数拆分，并行在多个工作进程中执行"""
+    assert await engine.wait_ready()
+
+    pids = await engine.map_chunks(chunk_pids, list(range(8)), 0.3)
+
+    assert len(pids) == 8
+    assert len(set(pids)) == 2
+    assert pids[:4] == [pids[0]] * 4 and pids[4:] == [pids[4]] * 4
+
+
+@pytest.mark.asyncio
+async def test_ocr_batch_split():
+    """测试OCR批次按进程数拆成连续的段，结果按原顺序合并，失败的段只影响该段的图片"""
+    engine = OCREngine(workers=3, threads=1)
+    chunks = []
+
+    async def submit(fn, image_paths, lang):
+        chunks.append(image_paths)
+        if "bad.jpg" in image_paths:
+            raise Exception("OCR工作进程异常退出")
+        return [{"text": path} for path in image_paths]
+
+    paths = [f"{i}.jpg" for i in range(5)] + ["bad.jpg", "6.jpg", "7.jpg"]
+    with patch.object(engine, "submit", side_effect=submit):
+        results = await engine.ocr_images_batch(paths, "ch")
+
+    assert [len(chunk) for chunk in chunks] == [3, 3, 2]
+    assert [r["text"] for r in results[:3]] == ["0.jpg", "1.jpg", "2.jpg"]
+    assert all(isinstance(r, Exception) for r in results[3:6])
+    assert [r["text"] for r in results[6:]] == ["6.jpg", "7.jpg"]
+
+
+@pytest.mark.asyncio
+async def test_thread_fallback(tmp_path):
+    """测试未启用工作进程池时OCR在本进程的线程池中执行，不阻塞事件循环"""
+    from app.services.ocr_engine import ocr_engine
+    from app.services.ocr_service import ocr_service
+
+    assert not ocr_engine.running
+    threads = []
+
+    def ocr_image_sync(image_path, lang="ch"):
+        threads.append(threading.current_thread())
+        return ocr_service.empty_result()
+
+    with patch.object(settings, "OCR_BATCH_ENABLED", False), \
+            patch.object(settings, "OCR_TILE_ENABLED", False), \
+            patch.object(ocr_service, "ocr_image_sync", side_effect=ocr_image_sync):
+        result = await ocr_service._execute(str(tmp_path / "page.jpg"), "ch")
+
+    assert result["count"] == 0
+    assert threads and threads[0] is not threading.main_thread()
+
+
+def worker_stats(pid, loaded=True, ready=False):
+    """工作进程上报的模型注册表状态"""
+    return {"pid": pid, "models": [{"loaded": loaded, "ready": ready}]}
+
+
+def start_fake_engine(warmup):
+    """启动两个工作进程的引擎，进程池替换为记录状态查询任务的假对象"""
+    engine = OCREngine(workers=2, threads=1)
+    pings = []
+
+    def submit(fn, *args):
+        pings.append((Future(), args))
+        return pings[-1][0]
+
+    with patch.object(settings, "OCR_WARMUP_ENABLED", warmup), \
+            patch("app.services.ocr_engine.ProcessPoolExecutor") as pool:
+        pool.return_value.submit.side_effect = submit
+        engine.start(["ch"])
+    return engine, pings
+
+
+def test_ready_without_warmup():
+    """测试未启用预热时，各工作进程的模型加载完成即视为就绪"""
+    engine, pings = start_fake_engine(warmup=False)
+    assert [args for _, args in pings] == [(["ch"], False)] * 2
+
+    pings[0][0].set_result(worker_stats(101))
+    assert not engine.ready
+    pings[1][0].set_result(worker_stats(102))
+    assert engine.ready and not engine.starting
+
+    # 模型加载失败的进程不就绪
+    engine._worker_models[102] = worker_stats(102, loaded=False)
+    assert not engine.ready
+
+
+def test_ready_after_failed_warmup():
+    """测试启动时预热失败的进程在就绪检查时重新查询状态，重试成功后就绪"""
+    from app.services.ocr_service import ocr_service
+
+    engine, pings = start_fake_engine(warmup=True)
+    pings[0][0].set_result(worker_stats(101, ready=True))
+    pings[1][0].set_result(worker_stats(102, ready=False))
+    assert not engine.ready and not engine.starting
+
+    with patch("app.services.ocr_service.ocr_engine", engine):
+        assert ocr_service.is_ready() is False
+        assert len(pings) == 4 and engine.starting
+        # 查询进行中时不重复提交
+        assert ocr_service.is_ready() is False
+        assert len(pings) == 4
+        assert pings[2][1] == (["ch"], True)
+
+        pings[2][0].set_result(worker_stats(102, ready=True))
+        pings[3][0].set_result(worker_stats(101, ready=True))
+        assert ocr_service.is_ready() is True
+    assert engine.warmup_seconds is not None
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,90 @@
+"""
+单元测试 - 区域OCR与证件模板
+"""
+import pytest
+import numpy as np
+from PIL import Image
+from app.services.card_templates import extract_template_info, parse_mrz
+from app.services.ocr_service import OCRService
+
+
+@pytest.fixture
+def card_image(tmp_path):
+    """创建测试证件图片"""
+    img = Image.new('RGB', (856, 540), color='white')
+    image_path = tmp_path / "card.png"
+    img.save(image_path)
+    return str(image_path)
+
+
+def test_region_box():
+    """测试像素坐标与归一化坐标的换算"""
+    assert OCRService._region_box([0.1, 0.2, 0.5, 0.6], 1000, 500, normalized=True) == (100, 100, 500, 300)
+    assert OCRService._region_box([10, 20, 300, 400], 1000, 500) == (10, 20, 300, 400)
+    # 坐标都不大于1的像素框（原点处1像素）不会被当作归一化坐标
+    assert OCRService._region_box([0, 0, 1, 1], 1000, 500) == (0, 0, 1, 1)
+    assert OCRService._region_box([0, 0, 1, 1], 1000, 500, normalized=True) == (0, 0, 1000, 500)
+    # 超出图片范围的部分被裁掉
+    assert OCRService._region_box([900, 400, 1200, 600], 1000, 500) == (900, 400, 1000, 500)
+
+
+def test_ocr_regions_skips_detection(card_image):
+    """测试单行区域直接识别，多行区域只在区域内检测"""
+    class MockOCR:
+        drop_score = 0.5
+
+        def __init__(self):
+            self.detected = []
+            self.recognized = 0
+
+        def text_detector(self, img):
+            self.detected.append(img.shape)
+            boxes = [[[0, 0], [50, 0], [50, 20], [0, 20]], [[0, 30], [50, 30], [50, 50], [0, 50]]]
+            return np.array(boxes, dtype=np.float32), 0
+
+        def text_recognizer(self, crops):
+            self.recognized += 1
+            return [(f"行{i}", 0.9) for i in range(len(crops))], 0
+
+    mock = MockOCR()
+    service = OCRService()
+    service._get_ocr_model = lambda lang: mock
+
+    result = service.ocr_regions_sync(card_image, [
+        {"name": "name", "box": [0.1, 0.1, 0.5, 0.2], "normalized": True},
+        {"name": "address", "box": [0.1, 0.5, 0.6, 0.8], "normalized": True, "multiline": True},
+    ], "ch")
+
+    # 只对多行区域做检测，检测输入是区域裁剪图而不是整张证件
+    assert mock.detected == [(162, 428, 3)]
+    # 所有区域的文本行合并成一次识别
+    assert mock.recognized == 1
+    assert result["fields"] == {"name": "行0", "address": "行1\n行2"}
+    assert result["regions"][0]["box"] == [85, 54, 428, 108]
+
+
+def test_extract_id_card_info():
+    """测试身份证模板字段校验"""
+    info = extract_template_info("id_card", {
+        "name": "张三",
+        "address": "北京市东城区\n某某街道1号",
+        "id_number": "11010119900101123x"
+    })
+    assert info == {"name": "张三", "id_number": "11010119900101123X", "address": "北京市东城区某某街道1号"}
+
+    # 证件号不完整时校验失败，调用方回退到整页识别
+    assert extract_template_info("id_card", {"name": "张三", "id_number": "1101011990"}) is None
+
+
+def test_parse_mrz():
+    """测试护照机读区解析"""
+    mrz = (
+        "P<CHNZHANG<<SAN<<<<<<<<<<<<<<<<<<<<<<<<<<<<<\n"
+        "E123456780CHN9001017M3001014<<<<<<<<<<<<<<02"
+    )
+    assert parse_mrz(mrz) == {"name": "ZHANG SAN", "id_number": "E12345678", "expiry_date": "2030-01-01"}
+    assert parse_mrz("not a passport") is None
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
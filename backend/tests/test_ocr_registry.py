@@ -0,0 +1,121 @@
+"""
+单元测试 - OCR模型注册表
+"""
+import pytest
+from unittest.mock import AsyncMock, Mock, patch
+from app.services.ocr_registry import OCRModelRegistry
+
+
+@pytest.fixture
+def registry():
+    """模型注册表fixture"""
+    return OCRModelRegistry()
+
+
+def test_models_deduplicated_by_config(registry):
+    """测试 ch 与 ch_en 共用同一个模型，只加载一次"""
+    with patch.object(registry, '_load', side_effect=lambda config: object()) as mock_load:
+        model_ch = registry.get("ch")
+        model_ch_en = registry.get("ch_en")
+        model_en = registry.get("en")
+
+    assert model_ch is model_ch_en
+    assert model_ch is not model_en
+    assert mock_load.call_count == 2
+    assert registry.lock("ch") is registry.lock("ch_en")
+
+
+def test_stats(registry):
+    """测试注册表统计"""
+    with patch.object(registry, '_load', side_effect=lambda config: object()):
+        registry.get("ch")
+        registry.get("ch_en")
+
+    stats = registry.stats()
+    assert len(stats["models"]) == 1
+    assert stats["models"][0]["loaded"] is True
+    assert stats["models"][0]["langs"] == ["ch", "ch_en"]
+    assert stats["process_rss_bytes"] > 0
+
+
+def test_load_failure(registry):
+    """测试模型加载失败"""
+    with patch.object(registry, '_load', side_effect=Exception("download failed")):
+        assert registry.get("en") is None
+
+    stats = registry.stats()
+    assert stats["models"][0]["loaded"] is False
+    assert stats["models"][0]["error"] == "download failed"
+
+
+def test_warmup_marks_ready(registry):
+    """测试预热会用合成图片推理一次，并记录就绪状态"""
+    model = Mock()
+    model.ocr = Mock(return_value=[None])
+
+    with patch.object(registry, '_load', return_value=model):
+        assert registry.is_ready(["ch"]) is False
+        assert registry.warmup_all(["ch", "ch_en"]) is True
+
+    # ch 与 ch_en 共用模型，只推理一次
+    assert model.ocr.call_count == 1
+    assert registry.is_ready(["ch", "ch_en"]) is True
+    assert registry.stats()["models"][0]["ready"] is True
+
+
+def test_warmup_failure(registry):
+    """测试预热推理失败时不标记就绪"""
+    model = Mock()
+    model.ocr = Mock(side_effect=Exception("inference failed"))
+
+    with patch.object(registry, '_load', return_value=model):
+        assert registry.warmup("en") is False
+
+    assert registry.is_ready(["en"]) is False
+
+
+def test_preload_without_warmup(registry):
+    """测试未启用预热时只加载模型不推理，加载完成即视为就绪"""
+    model = Mock()
+
+    with patch.object(registry, '_load', return_value=model):
+        assert registry.is_ready(["ch"], warmup=False) is False
+        assert registry.preload(["ch"], warmup=False) is True
+
+    model.ocr.assert_not_called()
+    assert registry.is_ready(["ch"], warmup=False) is True
+    # 要求预热时仍需推理过一次
+    assert registry.is_ready(["ch"], warmup=True) is False
+
+
+def test_preload_retries_failed_warmup(registry):
+    """测试预热失败后再次预加载会重试，成功后就绪"""
+    model = Mock()
+    model.ocr = Mock(side_effect=[Exception("inference failed"), [None]])
+
+    with patch.object(registry, '_load', return_value=model):
+        assert registry.preload(["ch"], warmup=True) is False
+        assert registry.preload(["ch"], warmup=True) is True
+        # 已就绪的模型不再重复预热
+        assert registry.preload(["ch"], warmup=True) is True
+
+    assert model.ocr.call_count == 2
+    assert registry.stats()["models"][0]["ready"] is True
+
+
+@pytest.mark.asyncio
+async def test_service_retries_warmup_when_not_ready():
+    """测试未启用工作进程池时，就绪检查发现未就绪会在后台重新预热（进行中时不重复启动）"""
+    from app.services.ocr_service import ocr_service
+
+    with patch("app.services.ocr_service.ocr_registry.is_ready", return_value=False), \
+            patch.object(ocr_service, "warmup", new=AsyncMock(return_value=True)) as mock_warmup:
+        assert ocr_service.is_ready() is False
+        assert ocr_service.is_ready() is False
+        await ocr_service._warmup_task
+
+    assert mock_warmup.await_count == 1
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
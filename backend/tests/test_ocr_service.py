@@ -18,9 +18,9 @@ async def test_ocr_service_initialization(ocr_service):
     """测试OCR服务初始化"""
     # 测试服务是否可以正常实例化
     assert ocr_service is not None
-    assert hasattr(ocr_service, 'ocr_ch')
-    assert hasattr(ocr_service, 'ocr_en')
-    assert hasattr(ocr_service, 'ocr_ch_en')
+    # 模型由进程内共享的注册表管理，ch 与 ch_en 共用同一份配置
+    assert ocr_service.model_config("ch") == ocr_service.model_config("ch_en")
+    assert ocr_service.model_config("ch") != ocr_service.model_config("en")
 
 
 @pytest.mark.asyncio
@@ -0,0 +1,102 @@
+"""
+单元测试 - 分块OCR的切块与合并
+"""
+import pytest
+from app.services.ocr_tiling import make_tiles, merge_tile_lines, should_tile
+
+
+def _box(x0, y0, x1, y1):
+    return [[x0, y0], [x1, y0], [x1, y1], [x0, y1]]
+
+
+def test_should_tile():
+    """测试按像素数和长边判断是否分块"""
+    assert not should_tile(1000, 1000, 8_000_000, 4096)
+    assert should_tile(4000, 3000, 8_000_000, 4096)
+    # 长截图像素数不大但长边超限
+    assert should_tile(1080, 12000, 20_000_000, 4096)
+
+
+def test_make_tiles_cover_image():
+    """测试图块覆盖整张图片且相邻图块有重叠"""
+    tiles = make_tiles(1000, 3000, tile_size=1000, overlap=100)
+
+    assert tiles[0] == (0, 0, 1000, 1000)
+    assert tiles[-1][3] == 3000
+    for prev, cur in zip(tiles, tiles[1:]):
+        assert cur[1] < prev[3]
+        assert prev[3] - cur[1] >= 100
+
+
+def test_make_tiles_small_image():
+    """测试小图只有一个图块"""
+    assert make_tiles(500, 400, tile_size=1000, overlap=100) == [(0, 0, 500, 400)]
+
+
+def test_merge_dedup_across_seam():
+    """测试重叠区内的同一行只保留一次，且被接缝截断的框让位于完整的框"""
+    tiles = [(0, 0, 1000, 1000), (0, 900, 1000, 2000)]
+    tile_lines = [
+        # 上图块：第一行完整，第二行被下边缘截断
+        (tiles[0], [(_box(10, 10, 300, 40), "第一行", 0.99),
+                    (_box(10, 960, 300, 999), "第二", 0.8)]),
+        # 下图块：第二行完整（图块内坐标）
+        (tiles[1], [(_box(10, 60, 300, 100), "第二行", 0.95)]),
+    ]
+
+    lines = merge_tile_lines(tile_lines, 1000, 2000)
+
+    assert [text for _, text, _ in lines] == ["第一行", "第二行"]
+    # 坐标换算回整页
+    assert lines[1][0][0] == [10.0, 960.0]
+
+
+def test_merge_reading_order():
+    """测试同一行的文本框按从左到右排序"""
+    tiles = [(0, 0, 1000, 1000), (900, 0, 1900, 1000)]
+    tile_lines = [
+        (tiles[1], [(_box(200, 12, 400, 40), "右", 0.9)]),
+        (tiles[0], [(_box(10, 10, 300, 40), "左", 0.9)]),
+    ]
+
+    lines = merge_tile_lines(tile_lines, 1900, 1000)
+
+    assert [text for _, text, _ in lines] == ["左", "右"]
+
+
+@pytest.mark.asyncio
+async def test_tiled_ocr_sends_tile_coordinates(tmp_path):
+    """测试分块OCR在本进程只读文件头，把图片路径和图块坐标交给工作进程，按EXIF方向计算图块"""
+    from unittest.mock import AsyncMock, patch
+    from PIL import Image
+    from app.core.config import settings
+    from app.services.ocr_engine import ocr_engine
+    from app.services.ocr_service import OCRService
+
+    image_path = tmp_path / "rotated.jpg"
+    exif = Image.Exif()
+    exif[0x0112] = 6
+    Image.new('RGB', (3000, 1000), color='white').save(image_path, exif=exif)
+
+    async def ocr_tiles(path, tiles, lang):
+        return [{"lines": [(_box(10, 10, 300, 40), f"{x0},{y0}", 0.9)], "_counts": {"downscaled": 1}}
+                for x0, y0, _, _ in tiles]
+
+    service = OCRService()
+    with patch.object(settings, "OCR_TILE_SIZE", 1600), \
+            patch.object(settings, "OCR_TILE_OVERLAP", 100), \
+            patch.object(OCRService, "_load_image", side_effect=AssertionError("decoded in API process")), \
+            patch.object(type(ocr_engine), "running", new=True), \
+            patch.object(ocr_engine, "ocr_tiles", AsyncMock(side_effect=ocr_tiles)) as mock_tiles:
+        result = await service._ocr_tiled(str(image_path), "ch")
+
+    path, tiles, lang = mock_tiles.call_args.args
+    assert path == str(image_path)
+    # EXIF方向6旋转90度后为1000x3000
+    assert tiles == make_tiles(1000, 3000, 1600, 100)
+    assert result["texts"] == ["0,0", "0,1400"]
+    assert result["_counts"] == {"downscaled": 2}
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,119 @@
+"""
+单元测试 - PDF输入
+"""
+import io
+import pytest
+from contextlib import aclosing
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
+from PIL import Image
+
+from app.core.errors import RequestRejectedError
+from app.services.pdf_input import pdf_input_service
+from app.services.pdf_writer import PdfStreamWriter
+
+TEXT = "The quick brown fox 你好"
+
+
+@pytest.fixture
+def mixed_pdf(tmp_path):
+    """两页PDF：第一页带文字层，第二页只有图片（72DPI，页面点坐标等于像素坐标）"""
+    path = tmp_path / "mixed.pdf"
+    page = Image.new("RGB", (600, 800), "white")
+    with PdfStreamWriter(path, dpi=72) as writer:
+        writer.add_image_page(page, text=[(TEXT, (100, 200, 500, 240))])
+        writer.add_image_page(page)
+    return str(path)
+
+
+async def read_pages(pdf_path, render="auto"):
+    pages = []
+    async with aclosing(pdf_input_service.iter_pages(pdf_path, 72, render)) as page_iter:
+        async for page in page_iter:
+            image = page["image"]
+            pages.append({**page, "image_size": Image.open(image).size if image else None})
+    return pages
+
+
+@pytest.mark.asyncio
+async def test_iter_pages(mixed_pdf):
+    """测试有文字层的页面直接取文字（坐标与渲染图片一致），其余页面渲染为图片，读完后删除"""
+    pages = await read_pages(mixed_pdf)
+
+    assert [page["source"] for page in pages] == ["text_layer", "ocr"]
+    text_page, image_page = pages
+    assert text_page["image"] is None
+    assert text_page["ocr_result"]["texts"] == [TEXT]
+    (x0, y0), _, (x1, y1), _ = text_page["ocr_result"]["positions"][0]
+    assert abs(x0 - 100) <= 3 and abs(x1 - 500) <= 3
+    assert 195 <= y0 and y1 <= 245
+
+    assert image_page["ocr_result"] is None
+    assert image_page["image_size"] == (600, 800)
+    assert not Path(image_page["image"]).exists()
+
+
+@pytest.mark.asyncio
+async def test_iter_pages_render_always(mixed_pdf):
+    """测试always模式下有文字层的页面也渲染，提前结束时预读的页面图片同样删除"""
+    images = []
+    async with aclosing(pdf_input_service.iter_pages(mixed_pdf, 72, "always")) as page_iter:
+        async for page in page_iter:
+            assert page["image"] is not None
+            images.append(page["image"])
+            break
+
+    assert images and not Path(images[0]).exists()
+
+
+@pytest.mark.asyncio
+async def test_iter_pages_rejects_dpi(mixed_pdf):
+    """测试超出范围的渲染分辨率返回请求错误"""
+    with pytest.raises(RequestRejectedError):
+        async for _ in pdf_input_service.iter_pages(mixed_pdf, 2000):
+            pass
+
+
+def test_ocr_pdf_upload(mixed_pdf):
+    """测试OCR接口上传PDF：只对没有文字层的页面做OCR，返回每页结果"""
+    from fastapi.testclient import TestClient
+    from main import app, ocr_service
+
+    ocr_result = ocr_service.result_from_lines([([[0, 0], [10, 0], [10, 10], [0, 10]], "scanned", 0.9)])
+    with patch.object(ocr_service, "ocr_image", new=AsyncMock(return_value=ocr_result)) as mock_ocr:
+        response = TestClient(app).post(
+            "/api/v1/ocr",
+            files={"file": ("mixed.pdf", io.BytesIO(Path(mixed_pdf).read_bytes()), "application/pdf")},
+            data={"dpi": "72"}
+        )
+
+    assert response.status_code == 200
+    data = response.json()["data"]
+    mock_ocr.assert_awaited_once()
+    assert data["page_count"] == 2
+    assert [page["source"] for page in data["pages"]] == ["text_layer", "ocr"]
+    assert data["text"] == f"{TEXT}\n\nscanned"
+
+
+def test_document_process_pdf_without_ocr(mixed_pdf):
+    """测试文档处理接口：operations不含ocr时PDF页面不渲染，只返回页数和文档信息"""
+    from fastapi.testclient import TestClient
+    from main import app
+
+    with patch.object(pdf_input_service, "_load_page_sync") as mock_load:
+        response = TestClient(app).post(
+            "/api/v1/document/process",
+            files={"file": ("mixed.pdf", io.BytesIO(Path(mixed_pdf).read_bytes()), "application/pdf")},
+            data={"operations": "enhance,crop"}
+        )
+
+    assert response.status_code == 200
+    data = response.json()["data"]
+    mock_load.assert_not_called()
+    assert data["page_count"] == 2
+    assert "ocr" not in data
+    assert isinstance(data["metadata"], dict)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,133 @@
+"""
+单元测试 - PDF合并与线性化
+"""
+import ctypes
+import re
+import pytest
+from PIL import Image
+from PyPDF2 import PdfReader, PdfWriter
+from PyPDF2.generic import ArrayObject, DictionaryObject, NameObject, NumberObject
+
+from app.services.pdf_merge import merge_pdfs
+from app.services.pdf_service import PDFService
+from app.services.pdf_writer import PdfStreamWriter
+
+
+def make_pdf(path, sizes, text=None):
+    """每个尺寸一页，页面为同一张图片（带同一字体的文字层）"""
+    image = Image.radial_gradient("L").convert("RGB")
+    with PdfStreamWriter(path, dpi=72) as writer:
+        for size in sizes:
+            writer.add_image_page(image.resize(size), text=[(text, (10, 10, 200, 40))] if text else None)
+    return str(path)
+
+
+@pytest.fixture
+def scans(tmp_path):
+    """三个扫描件PDF：第一个和第三个内容相同"""
+    return [
+        make_pdf(tmp_path / "a.pdf", [(400, 300), (300, 400)], "hello"),
+        make_pdf(tmp_path / "b.pdf", [(200, 200)], "world"),
+        make_pdf(tmp_path / "c.pdf", [(400, 300), (300, 400)], "hello"),
+    ]
+
+
+def page_sizes(reader):
+    return [[int(v) for v in page.mediabox[2:]] for page in reader.pages]
+
+
+def test_merge_dedupe(scans, tmp_path):
+    """测试合并：页面按顺序复制，相同的图片、字体和内容流只写一份"""
+    output = tmp_path / "merged.pdf"
+    result = merge_pdfs(scans, output)
+
+    reader = PdfReader(str(output))
+    assert result["pages"] == 5
+    assert page_sizes(reader) == [[400, 300], [300, 400], [200, 200], [400, 300], [300, 400]]
+    assert result["deduplicated"] > 0
+    fonts = {page["/Resources"].raw_get("/Font").get_object().raw_get("/F1").idnum for page in reader.pages}
+    assert len(fonts) == 1
+    # 第三个文件与第一个相同，不增加输出大小
+    assert output.stat().st_size < sum(map(lambda p: tmp_path.joinpath(p).stat().st_size, scans[:2])) * 1.05
+
+
+def test_merge_links(tmp_path):
+    """测试文件内页面之间的链接指向输出中对应的页面"""
+    writer = PdfWriter()
+    for _ in range(2):
+        writer.add_blank_page(100, 100)
+    writer.pages[0][NameObject("/Annots")] = ArrayObject([DictionaryObject({
+        NameObject("/Type"): NameObject("/Annot"),
+        NameObject("/Subtype"): NameObject("/Link"),
+        NameObject("/Rect"): ArrayObject([NumberObject(0), NumberObject(0), NumberObject(50), NumberObject(50)]),
+        NameObject("/Dest"): ArrayObject([writer.pages[1].indirect_reference, NameObject("/Fit")]),
+    })])
+    with open(tmp_path / "links.pdf", "wb") as f:
+        writer.write(f)
+    paths = [make_pdf(tmp_path / "first.pdf", [(100, 100)]), str(tmp_path / "links.pdf")]
+
+    merge_pdfs(paths, tmp_path / "merged.pdf")
+
+    reader = PdfReader(str(tmp_path / "merged.pdf"))
+    link = reader.pages[1]["/Annots"][0].get_object()
+    assert link["/Dest"][0].idnum == reader.pages[2].indirect_reference.idnum
+
+
+def first_page_available(pdfium_c, data: bytes, size: int) -> bool:
+    """只下载了前size字节时，第一页是否可以显示"""
+    fields = lambda struct, name: dict(struct._fields_)[name]
+    buffer = ctypes.create_string_buffer(data, len(data))
+
+    @fields(pdfium_c.FX_FILEAVAIL, "IsDataAvail")
+    def is_data_avail(_, offset, length):
+        return int(offset + length <= size)
+
+    @fields(pdfium_c.FX_DOWNLOADHINTS, "AddSegment")
+    def add_segment(_, offset, length):
+        pass
+
+    @fields(pdfium_c.FPDF_FILEACCESS, "m_GetBlock")
+    def get_block(_, position, out, length):
+        ctypes.memmove(out, ctypes.addressof(buffer) + position, length)
+        return 1
+
+    file_avail = pdfium_c.FX_FILEAVAIL(version=1, IsDataAvail=is_data_avail)
+    hints = pdfium_c.FX_DOWNLOADHINTS(version=1, AddSegment=add_segment)
+    access = pdfium_c.FPDF_FILEACCESS(m_FileLen=len(data), m_GetBlock=get_block)
+    avail = pdfium_c.FPDFAvail_Create(file_avail, access)
+    try:
+        assert pdfium_c.FPDFAvail_IsLinearized(avail) == pdfium_c.PDF_LINEARIZED
+        if pdfium_c.FPDFAvail_IsDocAvail(avail, hints) != pdfium_c.PDF_DATA_AVAIL:
+            return False
+        document = pdfium_c.FPDFAvail_GetDocument(avail, None)
+        available = pdfium_c.FPDFAvail_IsPageAvail(avail, 0, hints) == pdfium_c.PDF_DATA_AVAIL
+        pdfium_c.FPDF_CloseDocument(document)
+        return available
+    finally:
+        pdfium_c.FPDFAvail_Destroy(avail)
+
+
+def test_merge_linearized(scans, tmp_path):
+    """测试线性化合并：第一页的对象在文件开头，只下载这部分即可显示第一页"""
+    pdfium = pytest.importorskip("pypdfium2")
+    import pypdfium2.raw as pdfium_c
+    service = PDFService()
+    service.output_dir = tmp_path
+
+    service._merge_pdfs_sync(scans, "linear.pdf", linearize=True)
+
+    data = (tmp_path / "linear.pdf").read_bytes()
+    assert b"/Linearized 1" in data[:1024]
+    reader = PdfReader(str(tmp_path / "linear.pdf"))
+    assert page_sizes(reader) == [[400, 300], [300, 400], [200, 200], [400, 300], [300, 400]]
+    assert reader.metadata.title == "linear"
+    assert len(pdfium.PdfDocument(data)) == 5
+
+    first_page_end = int(re.search(rb"/E +(\d+)", data[:1024]).group(1))
+    assert first_page_end < len(data)
+    assert first_page_available(pdfium_c, data, first_page_end + 1024)
+    assert not list(tmp_path.glob("*.tmp*"))
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
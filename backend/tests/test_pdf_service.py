@@ -0,0 +1,162 @@
+"""
+单元测试 - PDF服务
+"""
+import pytest
+from pathlib import Path
+from PIL import Image, ImageDraw
+from PyPDF2 import PdfReader
+
+from app.services.image_service import ImageService
+from app.services.pdf_service import PDFService
+
+
+@pytest.fixture
+def pdf_service(tmp_path):
+    """PDF服务fixture（输出到临时目录）"""
+    service = PDFService()
+    service.output_dir = tmp_path
+    return service
+
+
+@pytest.fixture
+def text_page(tmp_path):
+    """带文字行的页面照片"""
+    page = Image.new("RGB", (1240, 1754), (235, 232, 225))
+    draw = ImageDraw.Draw(page)
+    for y in range(100, 1650, 40):
+        draw.text((80, y), "The quick brown fox jumps over the lazy dog 0123456789", fill=(30, 30, 30))
+    path = tmp_path / "page.jpg"
+    page.save(path, quality=95)
+    return str(path)
+
+
+def page_images(pdf_path):
+    """PDF每页的图片对象"""
+    reader = PdfReader(str(pdf_path))
+    images = []
+    for page in reader.pages:
+        xobjects = page["/Resources"]["/XObject"]
+        images.extend(xobjects[name].get_object() for name in xobjects)
+    return images
+
+
+def test_create_pdf_all_pages(pdf_service, text_page, tmp_path):
+    """测试多页PDF：每张图片一页，页面大小按像素和DPI计算"""
+    gray_page = tmp_path / "gray.png"
+    Image.new("L", (600, 300), 128).save(gray_page)
+
+    pdf_service._create_pdf_sync([text_page, str(gray_page), text_page], "multi.pdf", dpi=72)
+
+    reader = PdfReader(str(tmp_path / "multi.pdf"))
+    assert len(reader.pages) == 3
+    assert [float(v) for v in reader.pages[1].mediabox[2:]] == [600, 300]
+    assert page_images(tmp_path / "multi.pdf")[1]["/ColorSpace"] == "/DeviceGray"
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_create_pdf_page_size(pdf_service, text_page, tmp_path):
+    """测试固定纸张尺寸：图片等比缩放居中，横向图片使用横向页面"""
+    wide_page = tmp_path / "wide.jpg"
+    Image.new("RGB", (2000, 1000), "white").save(wide_page)
+
+    pdf_service._create_pdf_sync([text_page, str(wide_page)], "a4.pdf", page_size="A4")
+
+    reader = PdfReader(str(tmp_path / "a4.pdf"))
+    assert [round(float(v)) for v in reader.pages[0].mediabox[2:]] == [595, 842]
+    assert [round(float(v)) for v in reader.pages[1].mediabox[2:]] == [842, 595]
+
+
+@pytest.mark.asyncio
+async def test_create_pdf_invalid_page_size(pdf_service, text_page):
+    """测试不支持的页面尺寸返回请求错误"""
+    from app.core.errors import RequestRejectedError
+    with pytest.raises(RequestRejectedError):
+        await pdf_service.create_pdf([text_page], "bad.pdf", page_size="B9")
+
+
+def test_jpeg_passthrough(pdf_service, tmp_path):
+    """测试JPEG原样嵌入：数据与文件一致，EXIF方向转为页面旋转；CMYK、镜像方向、PNG重新编码"""
+    image = Image.new("RGB", (400, 200), "white")
+    exif = Image.Exif()
+    exif[0x0112] = 6
+    image.save(tmp_path / "rotated.jpg", exif=exif)
+    image.convert("CMYK").save(tmp_path / "cmyk.jpg")
+    exif[0x0112] = 2
+    image.save(tmp_path / "mirrored.jpg", exif=exif)
+    image.save(tmp_path / "page.png")
+    pages = ["rotated.jpg", "cmyk.jpg", "mirrored.jpg", "page.png"]
+
+    pdf_service._create_pdf_sync([str(tmp_path / name) for name in pages], "jpeg.pdf")
+
+    reader = PdfReader(str(tmp_path / "jpeg.pdf"))
+    images = page_images(tmp_path / "jpeg.pdf")
+    assert images[0].get_data() == (tmp_path / "rotated.jpg").read_bytes()
+    assert reader.pages[0]["/Rotate"] == 90
+    for i in (1, 2, 3):
+        assert "/Rotate" not in reader.pages[i]
+        assert images[i]["/ColorSpace"] == "/DeviceRGB"
+        assert images[i].get_data() != (tmp_path / pages[i]).read_bytes()
+    # 镜像方向在重新编码时旋正（水平翻转不改变尺寸）
+    assert (images[2]["/Width"], images[2]["/Height"]) == (400, 200)
+
+
+def test_bilevel_pdf(pdf_service, text_page, tmp_path):
+    """测试扫描模式：页面以1位CCITT G4嵌入，体积远小于彩色JPEG"""
+    pdf_service._create_pdf_sync([text_page], "color.pdf")
+    pdf_service._create_pdf_sync([text_page], "bilevel.pdf", bilevel=True)
+
+    image = page_images(tmp_path / "bilevel.pdf")[0]
+    assert image["/BitsPerComponent"] == 1
+    assert "/CCITTFaxDecode" in image["/Filter"]
+    assert (tmp_path / "bilevel.pdf").stat().st_size * 5 < (tmp_path / "color.pdf").stat().st_size
+
+
+def test_bilevel_saved_as_1bit(text_page):
+    """测试二值化增强结果按1位PNG保存，1位图片导出PDF时不再转为彩色"""
+    service = ImageService()
+    path = service._enhance_image_sync(service.save_array(service.load_image(text_page)), "binarized")
+
+    assert path.endswith(".png")
+    assert Image.open(path).mode == "1"
+    assert PDFService._load_page(path).mode == "1"
+    Path(path).unlink()
+
+
+@pytest.mark.asyncio
+async def test_searchable_pdf(pdf_service, tmp_path):
+    """测试可搜索PDF：OCR文字作为不可见文字层，位置与图片对齐（包括带EXIF旋转的JPEG页）"""
+    pdfium = pytest.importorskip("pypdfium2")
+    from unittest.mock import AsyncMock, patch
+
+    Image.new("RGB", (800, 600), "white").save(tmp_path / "page.png")
+    exif = Image.Exif()
+    exif[0x0112] = 6
+    Image.new("RGB", (800, 600), "white").save(tmp_path / "rotated.jpg", exif=exif)
+    ocr_result = {
+        "texts": ["Hello 世界"],
+        "positions": [[[100, 100], [400, 100], [400, 140], [100, 140]]],
+    }
+
+    with patch("app.services.ocr_service.ocr_service.ocr_image", new=AsyncMock(return_value=ocr_result)):
+        await pdf_service.create_pdf(
+            [str(tmp_path / "page.png"), str(tmp_path / "rotated.jpg")], "searchable.pdf", dpi=72, searchable=True
+        )
+
+    document = pdfium.PdfDocument(str(tmp_path / "searchable.pdf"))
+    for page in document:
+        text_page = page.get_textpage()
+        assert text_page.get_text_range() == "Hello 世界"
+        assert text_page.count_rects() > 0
+        left, bottom, right, top = text_page.get_rect(0)
+        if page.get_rotation() == 0:
+            # 像素坐标y轴向下：页面高600点，文字框y为100-140
+            assert 95 < left and right < 405 and 455 < bottom and top < 505
+        else:
+            # 显示时顺时针旋转90度：旋正后的x对应未旋转页面的y
+            assert page.get_rotation() == 90
+            assert 95 < bottom and top < 405 and 95 < left and right < 145
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,76 @@
+"""
+单元测试 - 临时文件管理
+"""
+import io
+import os
+import time
+import pytest
+from unittest.mock import patch
+from PIL import Image
+from fastapi.testclient import TestClient
+
+from app.services.temp_files import TempFileManager
+
+
+@pytest.fixture
+def manager(tmp_path):
+    """临时文件管理器fixture"""
+    return TempFileManager(tmp_path / "temp", max_age=60, max_size_mb=0)
+
+
+def test_scope_cleanup_on_error(manager):
+    """测试作用域异常退出时也删除登记的文件，移出作用域的文件保留"""
+    with pytest.raises(RuntimeError):
+        with manager.scope() as scope:
+            upload = scope.path(".jpg")
+            result = scope.path(".jpg")
+            for path in (upload, result):
+                open(path, "wb").close()
+            scope.release(result)
+            # 已被处理流程删除的文件不影响清理
+            missing = scope.track(manager.path(".jpg"))
+            raise RuntimeError("处理失败")
+
+    assert not os.path.exists(upload)
+    assert not os.path.exists(missing)
+    assert os.path.exists(result)
+    assert not manager.active
+
+
+def test_sweep_age_and_size(manager):
+    """测试后台清理：删除过期文件，超过大小上限时从最旧的文件开始删除，跳过进行中的请求"""
+    now = time.time()
+    paths = []
+    for i, age in enumerate([7200, 30, 20, 10]):
+        path = manager.path(".bin")
+        path.write_bytes(b"\0" * 1024 * 1024)
+        os.utime(path, (now - age, now - age))
+        paths.append(path)
+
+    assert manager.sweep(now) == 1
+    assert not paths[0].exists()
+
+    manager.max_size = 1024 * 1024
+    manager.active.add(str(paths[1]))
+    assert manager.sweep(now) == 2
+    assert [p.exists() for p in paths[1:]] == [True, False, False]
+
+
+def test_route_removes_upload_on_failure():
+    """测试接口出错时上传文件也被删除"""
+    from main import app, image_service, ocr_service
+
+    image = io.BytesIO()
+    Image.new('RGB', (100, 100), color='blue').save(image, format='JPEG')
+    image.seek(0)
+
+    before = set(image_service.temp_dir.iterdir())
+    with patch.object(ocr_service, "ocr_image", side_effect=Exception("识别失败")):
+        response = TestClient(app).post("/api/v1/ocr", files={"file": ("test.jpg", image, "image/jpeg")})
+
+    assert response.status_code == 500
+    assert set(image_service.temp_dir.iterdir()) == before
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
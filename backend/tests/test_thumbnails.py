@@ -0,0 +1,135 @@
+"""
+单元测试 - 文档缩略图
+"""
+import pytest
+import numpy as np
+from PIL import Image
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from unittest.mock import patch
+
+from app.database import get_db
+from app.models import Base, Document
+from app.services.thumbnail_service import ThumbnailService
+from main import app
+
+
+@pytest.fixture
+def service(tmp_path):
+    """缩略图服务fixture"""
+    return ThumbnailService(tmp_path / "thumbnails", sizes=[128, 512], fmt="webp")
+
+
+def test_generate_sizes(service):
+    """测试一次生成所有尺寸，保持宽高比"""
+    image = np.zeros((1200, 1600, 3), dtype=np.uint8)
+    paths = service.generate_sync(image, "doc1")
+
+    assert set(paths) == {128, 512}
+    assert Image.open(paths[128]).size == (128, 96)
+    assert Image.open(paths[512]).size == (512, 384)
+    assert Image.open(paths[512]).format == "WEBP"
+
+
+def test_thumbnail_endpoint_backfill(service, tmp_path):
+    """测试旧文档在第一次请求时补生成缩略图，响应带长期缓存头"""
+    source = tmp_path / "scan.jpg"
+    Image.new("RGB", (1000, 800), color="white").save(source)
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    db = Session()
+    db.add(Document(id="doc1", user_id="default", name="scan", type="scan", file_path=str(source)))
+    db.commit()
+
+    app.dependency_overrides[get_db] = lambda: Session()
+    try:
+        with patch("app.api.documents.thumbnail_service", service):
+            client = TestClient(app)
+            response = client.get("/api/v1/documents/doc1/thumbnail")
+            assert response.status_code == 200
+            assert response.headers["content-type"] == "image/webp"
+            assert "immutable" in response.headers["cache-control"]
+            assert service.path_for("doc1", 128).exists()
+
+            # 条件请求直接返回304
+            response = client.get(
+                "/api/v1/documents/doc1/thumbnail",
+                headers={"If-None-Match": response.headers["etag"]}
+            )
+            assert response.status_code == 304
+
+            response = client.get("/api/v1/documents/doc1/thumbnail?size=999")
+            assert response.status_code == 400
+    finally:
+        app.dependency_overrides.pop(get_db, None)
+
+    db.expire_all()
+    assert db.get(Document, "doc1").thumbnail_path == str(service.path_for("doc1"))
+
+
+@pytest.fixture
+def documents_db():
+    """内存数据库，替换接口的数据库依赖"""
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    app.dependency_overrides[get_db] = lambda: Session()
+    yield Session()
+    app.dependency_overrides.pop(get_db, None)
+
+
+def test_thumbnail_etag_checks_owner(service, tmp_path, documents_db):
+    """测试条件请求先校验文档归属：其他用户或不存在的文档即使带匹配的ETag也返回404"""
+    source = tmp_path / "scan.jpg"
+    Image.new("RGB", (400, 300), color="white").save(source)
+    documents_db.add(Document(id="doc1", user_id="alice", name="scan", type="scan", file_path=str(source)))
+    documents_db.commit()
+
+    with patch("app.api.documents.thumbnail_service", service):
+        client = TestClient(app)
+        etag = client.get("/api/v1/documents/doc1/thumbnail?user_id=alice").headers["etag"]
+
+        response = client.get("/api/v1/documents/doc1/thumbnail?user_id=alice", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        response = client.get("/api/v1/documents/doc1/thumbnail?user_id=bob", headers={"If-None-Match": etag})
+        assert response.status_code == 404
+        response = client.get(
+            "/api/v1/documents/missing/thumbnail?user_id=alice",
+            headers={"If-None-Match": etag.replace("doc1", "missing")}
+        )
+        assert response.status_code == 404
+
+
+def test_thumbnail_pdf_document(service, tmp_path, documents_db):
+    """测试PDF文档用第一页生成缩略图，无法生成缩略图的文档返回415"""
+    from app.services.pdf_writer import PdfStreamWriter
+
+    pdf_path = tmp_path / "export.pdf"
+    with PdfStreamWriter(pdf_path, dpi=72) as writer:
+        writer.add_image_page(Image.new("RGB", (600, 800), "white"))
+        writer.add_image_page(Image.new("RGB", (800, 600), "white"))
+    broken_path = tmp_path / "notes.txt"
+    broken_path.write_text("not an image")
+    documents_db.add(Document(id="pdf1", user_id="default", name="export", type="pdf", file_path=str(pdf_path)))
+    documents_db.add(Document(id="txt1", user_id="default", name="notes", type="text", file_path=str(broken_path)))
+    documents_db.commit()
+
+    with patch("app.api.documents.thumbnail_service", service):
+        client = TestClient(app)
+        response = client.get("/api/v1/documents/pdf1/thumbnail?size=512")
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "image/webp"
+        # 第一页为竖版
+        assert Image.open(service.path_for("pdf1", 512)).size == (384, 512)
+        assert Image.open(service.path_for("pdf1", 128)).size == (96, 128)
+
+        response = client.get("/api/v1/documents/txt1/thumbnail")
+        assert response.status_code == 415
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
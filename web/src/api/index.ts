@@ -8,6 +8,7 @@ export interface Document {
   created_at: string | null
   status: string
   metadata?: any
+  thumbnail_url: string  // 列表页使用缩略图，不加载原图
 }
 
 // 请求配置